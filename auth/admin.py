@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import AccountDeletionJob
+
+
+@admin.register(AccountDeletionJob)
+class AccountDeletionJobAdmin(admin.ModelAdmin):
+    list_display = ['username', 'user_id', 'status', 'stage', 'created_at', 'finished_at']
+    list_filter = ['status']
+    search_fields = ['username']
+    readonly_fields = ['user_id', 'username', 'status', 'stage', 'deleted', 'error', 'created_at', 'updated_at', 'finished_at']
@@ -1,7 +1,58 @@
-from rest_framework import authentication, exceptions
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework import authentication, exceptions
 from .utils import decode_token
 
+# Authenticated users' non-secret columns, keyed by id. Cached briefly so a
+# burst of API calls from one session doesn't re-read the same row on every
+# request.
+PRINCIPAL_KEY = 'auth:principal:{user_id}'
+# Never the password hash (loaded lazily if touched). In model field order,
+# as `Model.from_db` expects.
+PRINCIPAL_FIELDS = (
+    'id', 'last_login', 'is_superuser', 'username', 'first_name', 'last_name',
+    'email', 'is_staff', 'is_active', 'date_joined',
+)
+# Per-process or per-host caches: invalidating a principal there misses the
+# other workers, so blocks and deletions wouldn't take effect everywhere
+_UNSHARED_CACHES = (LocMemCache, FileBasedCache, DummyCache)
+
+
+def get_principal(user_id):
+    """
+    Return the User for an access token's `user_id`.
+
+    With a shared cache backend (Redis, Memcached, database) its
+    PRINCIPAL_FIELDS are cached for AUTH_PRINCIPAL_CACHE_TIMEOUT seconds and
+    the User is rebuilt from them with the other columns deferred, so saving
+    it only writes the cached columns. With a per-process cache every call
+    reads the row, since invalidations could not reach other processes.
+
+    Raises:
+        User.DoesNotExist: If the user is gone.
+    """
+    if isinstance(caches['default'], _UNSHARED_CACHES):
+        return User.objects.get(id=user_id)
+
+    key = PRINCIPAL_KEY.format(user_id=user_id)
+    values = cache.get(key)
+    if values is None:
+        values = User.objects.values_list(*PRINCIPAL_FIELDS).get(id=user_id)
+        cache.set(key, values, settings.AUTH_PRINCIPAL_CACHE_TIMEOUT)
+    return User.from_db(User.objects.db, PRINCIPAL_FIELDS, values)
+
+
+def invalidate_principal(*user_ids):
+    """Drop cached principals once the current transaction commits."""
+    keys = [PRINCIPAL_KEY.format(user_id=user_id) for user_id in user_ids if user_id]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
 
 class JWTAuthentication(authentication.BaseAuthentication):
     """
@@ -9,6 +60,8 @@ class JWTAuthentication(authentication.BaseAuthentication):
     
     This class verifies the 'Authorization: Bearer <token>' header, 
     decodes the JWT, and ensures the associated user is valid and active.
+    The user comes from the short-lived principal cache when a shared cache
+    is configured (see `get_principal`); saves and deletes invalidate it.
     """
     
     def authenticate(self, request):
@@ -43,7 +96,7 @@ class JWTAuthentication(authentication.BaseAuthentication):
         
         # 5. Identify and validate the user associated with the token
         try:
-            user = User.objects.get(id=payload['user_id'])
+            user = get_principal(payload['user_id'])
         except User.DoesNotExist:
             raise exceptions.AuthenticationFailed('User not found')
 
@@ -0,0 +1,41 @@
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from auth.storage import STORAGE_BACKENDS, get_storage
+
+
+class Command(BaseCommand):
+    help = "Measure upload throughput of a storage backend with synthetic blobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', default=None, help="Backend name or dotted path (default: STORAGE_BACKEND).")
+        parser.add_argument('--uploads', type=int, default=200)
+        parser.add_argument('--size', type=int, default=64 * 1024, help="Bytes per upload.")
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--prefix', default='bench')
+
+    def handle(self, *args, **options):
+        backend = options['backend']
+        storage = import_string(STORAGE_BACKENDS.get(backend, backend))() if backend else get_storage()
+        uploads, size = options['uploads'], options['size']
+        run = uuid.uuid4().hex[:8]
+        payload = os.urandom(size)
+
+        def upload(i):
+            started = time.perf_counter()
+            storage.save(f"{options['prefix']}/{run}/{i}.bin", payload, 'application/octet-stream')
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            latencies = sorted(pool.map(upload, range(uploads)))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f"backend={type(storage).__name__} uploads={uploads} size={size}B concurrency={options['concurrency']}")
+        self.stdout.write(f"throughput: {uploads / elapsed:.1f} uploads/s, {uploads * size / elapsed / 1e6:.2f} MB/s")
+        self.stdout.write(f"latency p50: {latencies[len(latencies) // 2] * 1000:.1f} ms  p99: {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.tasks import TaskResultStatus
+from django.utils import timezone
+
+from auth.models import AccountDeletionJob
+from auth.services import AccountDeletionService
+from auth.tasks import delete_account
+from project.tasks import runs_inline
+
+
+class Command(BaseCommand):
+    help = (
+        "Show unfinished account deletions and enqueue those that stopped making progress. "
+        "Under the ImmediateBackend this is what runs new deletions too; schedule it from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-seconds',
+            type=int,
+            default=600,
+            help='Resume jobs with no progress for this many seconds (default: 600). Failed jobs always resume.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list unfinished jobs.',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['stale_seconds'])
+        # Without task workers, nothing else will ever start a pending job
+        inline = runs_inline(delete_account)
+        resumed = failed = 0
+        for job in AccountDeletionJob.objects.exclude(status='done').order_by('created_at'):
+            stale = job.status == 'failed' or job.updated_at < cutoff or (inline and job.status == 'pending')
+            progress = ', '.join(f"{name}={count}" for name, count in job.deleted.items()) or 'nothing yet'
+            self.stdout.write(
+                f"#{job.id} {job.username}: {job.status}, at {job.stage or 'start'}; deleted {progress}"
+                + (' (stale)' if stale else '')
+            )
+            if stale and not options['dry_run']:
+                result = AccountDeletionService.enqueue(job.id)
+                resumed += 1
+                if result.status == TaskResultStatus.FAILED:
+                    failed += 1
+                    self.stderr.write(f"#{job.id} failed: {result.errors[-1].exception_class_path}")
+        self.stdout.write(self.style.SUCCESS(f"Resumed {resumed} account deletions ({failed} failed)."))
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+import auth.models
+
+
+def fill_tokens(apps, schema_editor):
+    AccountDeletionJob = apps.get_model('authentication', 'AccountDeletionJob')
+    for job in AccountDeletionJob.objects.filter(token__isnull=True):
+        job.token = auth.models.new_job_token()
+        job.save(update_fields=['token'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0007_accountdeletionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountdeletionjob',
+            name='token',
+            field=models.CharField(editable=False, max_length=32, null=True),
+        ),
+        migrations.RunPython(fill_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='accountdeletionjob',
+            name='token',
+            field=models.CharField(default=auth.models.new_job_token, editable=False, max_length=32, unique=True),
+        ),
+    ]
@@ -1,3 +1,68 @@
+import secrets
+
+from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_principal
 
 # UserProfile and UserFollow have been moved to the 'profiles' app.
+
+
+def new_job_token():
+    return secrets.token_urlsafe(24)
+
+
+class AccountDeletionJob(models.Model):
+    """
+    Background deletion of one account.
+
+    The account is deactivated when the job is created; the job then deletes
+    the user's rows one bounded chunk per task (see AccountDeletionService),
+    recording the step it is on and how many rows each step removed. Every
+    step only deletes what is left, so a job can be resumed at any point.
+
+    The deactivated user can no longer authenticate, so progress is read
+    with the job's `token` instead (see AccountDeletionStatusView).
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    # Not a foreign key: the job outlives the user it deletes
+    user_id = models.PositiveIntegerField(unique=True)
+    username = models.CharField(max_length=150)
+    token = models.CharField(max_length=32, unique=True, default=new_job_token, editable=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    stage = models.CharField(max_length=40, blank=True, default='', help_text="Step currently being deleted.")
+    deleted = models.JSONField(default=dict, blank=True, help_text="Rows deleted so far, per step.")
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Resuming scans unfinished jobs that stopped making progress
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"Deletion of {self.username} ({self.status})"
+
+    @classmethod
+    def deleting_user_ids(cls):
+        """`user_id` subquery of accounts whose deletion hasn't finished."""
+        return cls.objects.exclude(status='done').values('user_id')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_principal(sender, instance, **kwargs):
+    # Blocks, renames and deletions take effect on the next request
+    invalidate_principal(instance.id)
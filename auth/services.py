@@ -1,8 +1,18 @@
 import logging
+from functools import partial
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import transaction
+from django.db.models import Q
+from django.tasks import TaskResultStatus
 from django.core.exceptions import ValidationError
-from users.models import UserProfile
+from django.utils import timezone
+from chat.models import Message
+from project.tasks import runs_inline
+from feed.models import ActivityEvent, FeedEntry
+from rewards.models import DailyCheckIn, XPTransaction
+from users.models import PlatformStatsSnapshot, UnfollowLog, UserProfile, UserFollow
+from users.services import ModerationService
 from .utils import (
     generate_tokens,
     get_github_access_token,
@@ -15,6 +25,7 @@ from .utils import (
     get_discord_user,
 )
 from .emails import send_welcome_email
+from .models import AccountDeletionJob
 
 logger = logging.getLogger(__name__)
 
@@ -166,7 +177,8 @@ class AuthService:
             # User Found! Update their latest tokens
             profile.access_token = tokens['access']
             profile.refresh_token = tokens['refresh']
-            profile.save()
+            # Write only the tokens; a full-row save could clobber concurrent XP updates
+            profile.save(update_fields=['access_token', 'refresh_token', 'updated_at'])
             return profile.user
             
         except UserProfile.DoesNotExist:
@@ -233,7 +245,9 @@ class AuthService:
             # Update visual assets only if they are missing (preserve user customizations)
             if not profile.avatar_url:
                 profile.avatar_url = user_info['avatar_url']
-            profile.save()
+            profile.save(update_fields=[
+                'provider', 'provider_id', 'access_token', 'refresh_token', 'avatar_url', 'updated_at',
+            ])
         else:
             # Create fresh profile
             UserProfile.objects.create(
@@ -256,3 +270,119 @@ class AuthService:
             username = f"{base_username}_{counter}"
             counter += 1
         return username
+
+
+class AccountDeletionService:
+    """
+    Deletes accounts in the background, in bounded chunks.
+
+    Deleting a long-time user in one `user.delete()` cascades through every
+    message, check-in and follow in a single transaction. Instead, each
+    step below is emptied ACCOUNT_DELETION_CHUNK_SIZE rows at a time, one
+    short transaction per chunk, and the user row itself goes last.
+    """
+
+    # (step, model, rows of the user's that the step deletes). Fanned-out
+    # feed copies go before their events so no single cascade is large.
+    STEPS = [
+        ('feed_entries', FeedEntry, lambda user_id: Q(owner_id=user_id)),
+        ('fanned_out_feed_entries', FeedEntry, lambda user_id: Q(event__actor_id=user_id) | Q(event__target_id=user_id)),
+        ('activity_events', ActivityEvent, lambda user_id: Q(actor_id=user_id) | Q(target_id=user_id)),
+        ('messages', Message, lambda user_id: Q(user_id=user_id)),
+        ('check_ins', DailyCheckIn, lambda user_id: Q(user_id=user_id)),
+        ('xp_transactions', XPTransaction, lambda user_id: Q(user_id=user_id)),
+        # Per-row delete signals keep the other side's counters right; the
+        # unfollow log gets one entry for the whole account at the end
+        ('follows', UserFollow, lambda user_id: Q(follower_id=user_id) | Q(following_id=user_id)),
+        ('platform_stats', PlatformStatsSnapshot, lambda user_id: Q(user_id=user_id)),
+    ]
+
+    @staticmethod
+    def request_deletion(user):
+        """
+        Deactivate `user` now and queue the deletion of their data.
+
+        Deactivation drops cached principals and closes chat sockets, so the
+        account is unusable immediately. Calling again for the same user
+        returns the existing job.
+
+        The deletion never runs in the caller's request: with a queue-backed
+        task backend it is enqueued for a worker; under the ImmediateBackend
+        the job stays pending until `resume_account_deletions` (run from
+        cron) picks it up.
+
+        Returns:
+            AccountDeletionJob
+        """
+        from .tasks import delete_account
+
+        with transaction.atomic():
+            job, _ = AccountDeletionJob.objects.get_or_create(
+                user_id=user.id, defaults={'username': user.username}
+            )
+            ModerationService.set_active([user.id], False)
+            if not runs_inline(delete_account):
+                transaction.on_commit(partial(AccountDeletionService.enqueue, job.id))
+        return job
+
+    @staticmethod
+    def enqueue(job_id):
+        """
+        Enqueue the deletion task for a job and check how it went.
+
+        Returns:
+            TaskResult
+        """
+        from .tasks import delete_account
+
+        result = delete_account.enqueue(job_id)
+        if result.status == TaskResultStatus.FAILED:
+            # delete_account already marked the job failed; resuming retries it
+            logger.warning(
+                "Account deletion job %s failed: %s", job_id, result.errors[-1].exception_class_path
+            )
+        return result
+
+    @staticmethod
+    def run_chunk(job_id):
+        """
+        Delete the next chunk of a job's rows and record progress.
+
+        Returns:
+            bool: True if there is more to delete.
+        """
+        job = AccountDeletionJob.objects.filter(id=job_id).exclude(status='done').first()
+        if job is None:
+            return False
+
+        steps = AccountDeletionService.STEPS
+        names = [name for name, _, _ in steps]
+        start = names.index(job.stage) if job.stage in names else 0
+        chunk_size = settings.ACCOUNT_DELETION_CHUNK_SIZE
+
+        for name, model, rows in steps[start:]:
+            ids = list(
+                model.objects.filter(rows(job.user_id)).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+            )
+            if not ids:
+                continue
+            with transaction.atomic():
+                model.objects.filter(pk__in=ids).delete()
+                job.deleted[name] = job.deleted.get(name, 0) + len(ids)
+                job.stage = name
+                job.status = 'running'
+                job.error = ''
+                job.save(update_fields=['deleted', 'stage', 'status', 'error', 'updated_at'])
+            return True
+
+        # Only the user row and its small cascades (profile) are left
+        with transaction.atomic():
+            for user in User.objects.filter(id=job.user_id):
+                user.delete()
+            # The follows step skipped per-edge unfollow entries; other processes' graphs drop the user here
+            UnfollowLog.objects.create(follower_id=job.user_id, following_id=None)
+            job.status = 'done'
+            job.stage = ''
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'stage', 'finished_at', 'updated_at'])
+        return False
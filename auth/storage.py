@@ -0,0 +1,144 @@
+import logging
+import os
+import time
+from functools import lru_cache
+
+import httpx
+from django.conf import settings
+from django.utils.module_loading import import_string
+from storage3.utils import StorageException
+
+from .supabase_client import get_storage_client
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKENDS = {
+    'supabase': 'auth.storage.SupabaseStorage',
+    'local': 'auth.storage.LocalStorage',
+}
+
+
+class SupabaseStorage:
+    """
+    Supabase Storage backend.
+
+    Uses the process-wide Supabase client, so every upload goes over the same
+    pooled HTTP connections. Transient failures (network errors, timeouts,
+    5xx responses) are retried with exponential backoff.
+    """
+
+    def __init__(self, bucket=None):
+        self.bucket = bucket or settings.STORAGE_BUCKET
+        self.retries = settings.STORAGE_RETRIES
+        self.backoff = settings.STORAGE_RETRY_BACKOFF
+
+    def _bucket(self):
+        client = get_storage_client()
+        if not client:
+            raise Exception("Supabase credentials not configured")
+        return client.from_(self.bucket)
+
+    @staticmethod
+    def _is_transient(exc):
+        # storage3 can re-raise network errors as something else while handling
+        # them, so look through the exception chain for the original cause
+        while exc is not None:
+            if isinstance(exc, httpx.TransportError):
+                return True
+            if isinstance(exc, StorageException) and exc.args and isinstance(exc.args[0], dict):
+                return exc.args[0].get('statusCode', 0) >= 500
+            exc = exc.__cause__ or exc.__context__
+        return False
+
+    def save(self, path, data, content_type, cache_control=None):
+        bucket = self._bucket()
+        file_options = {"content-type": content_type, "upsert": "true"}
+        if cache_control:
+            file_options["cache-control"] = str(cache_control)
+        for attempt in range(self.retries + 1):
+            try:
+                # storage3 mutates the options it is given
+                bucket.upload(path=path, file=data, file_options=dict(file_options))
+                break
+            except Exception as e:
+                if attempt == self.retries or not self._is_transient(e):
+                    logger.error("Supabase upload failed for %s: %s", path, e)
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                logger.warning("Supabase upload for %s failed (%s), retrying in %.2fs", path, e, delay)
+                time.sleep(delay)
+        return self.url(path)
+
+    def url(self, path):
+        return self._bucket().get_public_url(path)
+
+    def delete(self, paths):
+        if paths:
+            self._bucket().remove(list(paths))
+
+
+class LocalStorage:
+    """
+    Filesystem backend for development, tests and benchmarks.
+
+    Files are written under STORAGE_LOCAL_ROOT and addressed by
+    STORAGE_LOCAL_URL + path.
+    """
+
+    def __init__(self, root=None, base_url=None):
+        self.root = root or settings.STORAGE_LOCAL_ROOT
+        self.base_url = base_url or settings.STORAGE_LOCAL_URL
+
+    def save(self, path, data, content_type, cache_control=None):
+        # Cache headers are left to whatever serves STORAGE_LOCAL_ROOT
+        full_path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        # Write next to the target then rename, so readers never see a partial file
+        tmp_path = f"{full_path}.tmp{os.getpid()}"
+        with open(tmp_path, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp_path, full_path)
+        return self.url(path)
+
+    def url(self, path):
+        return f"{self.base_url.rstrip('/')}/{path}"
+
+    def delete(self, paths):
+        for path in paths:
+            try:
+                os.remove(os.path.join(self.root, path))
+            except FileNotFoundError:
+                pass
+
+
+@lru_cache(maxsize=1)
+def get_storage():
+    """Return the configured storage backend (one instance per process)."""
+    backend = settings.STORAGE_BACKEND
+    return import_string(STORAGE_BACKENDS.get(backend, backend))()
+
+
+class StorageService:
+    """Upload facade used by the rest of the codebase."""
+
+    @staticmethod
+    def upload_file(file, path):
+        """
+        Uploads a file to the configured storage backend.
+        Returns the public URL of the uploaded file.
+        """
+        return StorageService.upload_bytes(file.read(), path, file.content_type)
+
+    @staticmethod
+    def upload_bytes(data, path, content_type, cache_control=None):
+        """
+        Uploads raw bytes to the configured storage backend.
+        `cache_control` is a max-age in seconds for the stored object.
+        Returns the public URL of the uploaded file.
+        """
+        return get_storage().save(path, data, content_type, cache_control)
+
+    @staticmethod
+    def delete(paths):
+        """Deletes the given paths from the configured storage backend."""
+        get_storage().delete(paths)
@@ -0,0 +1,32 @@
+import logging
+
+from django.tasks import task
+
+from .models import AccountDeletionJob
+from .services import AccountDeletionService
+
+logger = logging.getLogger(__name__)
+
+
+@task
+def delete_account(job_id):
+    """
+    Run an account deletion to the end, one chunk (transaction) at a time.
+
+    Chunks run in a loop within this task rather than each enqueuing the
+    next, which would nest task runs under the ImmediateBackend. A failure
+    marks the job failed (the rows deleted so far stay deleted);
+    `resume_account_deletions` picks it up again.
+
+    Returns:
+        int: Number of chunks run.
+    """
+    chunks = 0
+    try:
+        while AccountDeletionService.run_chunk(job_id):
+            chunks += 1
+    except Exception as e:
+        logger.exception("Account deletion job %s failed", job_id)
+        AccountDeletionJob.objects.filter(id=job_id).update(status='failed', error=str(e))
+        raise
+    return chunks
@@ -0,0 +1,77 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from chat.models import Message
+from .models import AccountDeletionJob
+from .services import AccountDeletionService
+from .utils import generate_access_token
+
+DELETE_URL = '/api/auth/user/delete/'
+
+
+@override_settings(ACCOUNT_DELETION_CHUNK_SIZE=2)
+class AccountDeletionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='leaving')
+        Message.objects.bulk_create([Message(user=self.user, content=f'message {i}') for i in range(5)])
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {generate_access_token(self.user)}')
+
+    def request_deletion(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(DELETE_URL)
+        self.client.credentials()
+        return response
+
+    def resume(self):
+        call_command('resume_account_deletions', stdout=StringIO(), stderr=StringIO())
+
+    def test_delete_deactivates_without_deleting_in_the_request(self):
+        response = self.request_deletion()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertFalse(User.objects.get(id=self.user.id).is_active)
+        self.assertEqual(Message.objects.filter(user=self.user).count(), 5)
+
+        # The account can't authenticate any more; the token still reads progress
+        progress = self.client.get(response.data['status_url'])
+        self.assertEqual(progress.status_code, 200)
+        self.assertEqual(progress.data['status'], 'pending')
+
+    def test_unknown_token_is_not_found(self):
+        self.assertEqual(self.client.get(f'{DELETE_URL}nope/').status_code, 404)
+
+    def test_resume_continues_after_a_failed_chunk(self):
+        status_url = self.request_deletion().data['status_url']
+        run_chunk = AccountDeletionService.run_chunk
+        calls = []
+
+        def fail_third_chunk(job_id):
+            calls.append(job_id)
+            if len(calls) == 3:
+                raise RuntimeError('database went away')
+            return run_chunk(job_id)
+
+        with mock.patch.object(AccountDeletionService, 'run_chunk', side_effect=fail_third_chunk):
+            with self.assertLogs('auth', 'WARNING'):
+                self.resume()
+
+        job = AccountDeletionJob.objects.get(user_id=self.user.id)
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.deleted, {'messages': 4})
+        self.assertEqual(Message.objects.filter(user_id=self.user.id).count(), 1)
+        self.assertTrue(User.objects.filter(id=self.user.id).exists())
+
+        self.resume()
+
+        progress = self.client.get(status_url).data
+        self.assertEqual(progress['status'], 'done')
+        self.assertEqual(progress['deleted'], {'messages': 5})
+        self.assertFalse(Message.objects.filter(user_id=self.user.id).exists())
+        self.assertFalse(User.objects.filter(id=self.user.id).exists())
@@ -9,6 +9,7 @@ from .views import (
     RefreshTokenView,
     LogoutView,
     DeleteAccountView,
+    AccountDeletionStatusView,
     AdminLoginView
 )
 
@@ -29,5 +30,6 @@ urlpatterns = [
     path('refresh/', RefreshTokenView.as_view(), name='refresh_token'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('user/delete/', DeleteAccountView.as_view(), name='delete_account'),
+    path('user/delete/<str:token>/', AccountDeletionStatusView.as_view(), name='delete_account_status'),
     path('admin/login/', AdminLoginView.as_view(), name='admin_login'),
 ]
@@ -1,6 +1,7 @@
 from urllib.parse import urlencode
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.urls import reverse
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
@@ -8,7 +9,8 @@ from rest_framework.views import APIView
 
 from users.serializers import UserSerializer
 from .serializers import RefreshTokenSerializer, AdminLoginSerializer
-from .services import AuthService
+from .models import AccountDeletionJob
+from .services import AccountDeletionService, AuthService
 from .utils import generate_access_token, decode_token, generate_tokens
 
 # --- OAuth Views ---
@@ -193,13 +195,48 @@ class LogoutView(APIView):
 
 
 class DeleteAccountView(APIView):
-    """View to delete the user account."""
+    """
+    View to delete the user account.
+
+    The account is deactivated immediately; its data is deleted by a job
+    in bounded chunks (see AccountDeletionService), never within this
+    request. Returns 202 with the job's token, which reads its progress
+    from AccountDeletionStatusView once the account can't authenticate.
+    """
     permission_classes = [IsAuthenticated]
     
     def delete(self, request):
-        user = request.user
-        user.delete()
-        return Response({'message': 'Account deleted successfully'})
+        job = AccountDeletionService.request_deletion(request.user)
+        return Response(
+            {
+                'message': 'Account deletion started',
+                'job_id': job.id,
+                'status': job.status,
+                'token': job.token,
+                'status_url': reverse('delete_account_status', args=[job.token]),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class AccountDeletionStatusView(APIView):
+    """
+    Progress of an account deletion, keyed by the token DELETE returned.
+    Returns: { "status": "running", "stage": "messages", "deleted": {...}, ... }
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request, token):
+        job = AccountDeletionJob.objects.filter(token=token).first()
+        if job is None:
+            return Response({'error': 'Unknown deletion job'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'status': job.status,
+            'stage': job.stage,
+            'deleted': job.deleted,
+            'created_at': job.created_at,
+            'finished_at': job.finished_at,
+        })
 
 
 # --- Admin Views ---
@@ -1,11 +1,47 @@
+import asyncio
 import json
+from asgiref.sync import async_to_sync
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from .mentions import username_index
 from .models import Message
 
+# Per-user group every socket of a user joins, so the server can reach them all
+USER_GROUP = "user_{user_id}"
+# Close code sent to sockets of blocked users (4000-4999 are application codes)
+CLOSE_CODE_BLOCKED = 4003
+
+# Ephemeral typing state lives in the cache, so with a shared CACHE_BACKEND
+# every process sees the same throttles and pending typers
+TYPING_THROTTLE_KEY = "chat:typing:throttle:{user_id}"
+TYPING_PENDING_KEY = "chat:typing:pending:{room}"
+TYPING_FLUSH_KEY = "chat:typing:flush:{room}"
+
+
+def disconnect_users(user_ids):
+    """
+    Close every live chat socket of the given users (call from sync code).
+
+    Reaches sockets in other processes only through a shared channel layer
+    (CHANNEL_REDIS_URL); with the in-memory default, just this process's.
+    """
+    channel_layer = get_channel_layer()
+    send = async_to_sync(channel_layer.group_send)
+    for user_id in user_ids:
+        send(USER_GROUP.format(user_id=user_id), {'type': 'force_disconnect'})
+
 class ChatConsumer(AsyncWebsocketConsumer):
     connected_channels = set()
 
+    # Ephemeral typing state (never persisted, see TYPING_*_KEY).
+    # A user's typing pings are accepted at most once per throttle window, and
+    # all typers in a room are merged into one broadcast per flush interval.
+    TYPING_THROTTLE_SECONDS = 2
+    TYPING_FLUSH_SECONDS = 1
+    typing_flush_tasks = set()
+
     async def connect(self):
         print(f"WS Attempt Connect: {self.channel_name}")
         self.room_group_name = "global_chat"
@@ -22,6 +58,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.room_group_name,
             self.channel_name
         )
+        await self.channel_layer.group_add(USER_GROUP.format(user_id=user.id), self.channel_name)
         # Add to connected list and broadcast update
         ChatConsumer.connected_channels.add(self.channel_name)
         await self.broadcast_user_count()
@@ -29,6 +66,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
         await self.accept()
         print("WS Accepted")
 
+        # Warm the mention index once per process; lookups are in-memory after this
+        await database_sync_to_async(username_index.ensure_loaded)()
+
         # Send last 50 messages
         messages = await self.get_last_50_messages()
         for msg in messages:
@@ -40,6 +80,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
         ChatConsumer.connected_channels.discard(self.channel_name)
         await self.broadcast_user_count()
 
+        user = self.scope.get("user")
+        if user and not user.is_anonymous:
+            await cache.adelete(TYPING_THROTTLE_KEY.format(user_id=user.id))
+            await self.channel_layer.group_discard(USER_GROUP.format(user_id=user.id), self.channel_name)
+
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
@@ -48,15 +93,25 @@ class ChatConsumer(AsyncWebsocketConsumer):
     async def receive(self, text_data):
         print(f"WS Receive: {text_data}")
         data = json.loads(text_data)
+
+        # Ephemeral events short-circuit before any DB work
+        if data.get('type') == 'typing':
+            await self.handle_typing()
+            return
+
         message = data['message']
         user = self.scope["user"]
         username = user.username
+
+        # Sending a message ends the typing state
+        await self.update_typers(self.room_group_name, user.id)
         
         # Get user data safely
         user_data = await self.get_user_data(user)
 
         # Save to DB
         await self.save_message(message)
+        mentions = await database_sync_to_async(username_index.resolve_mentions)(message)
 
         # Broadcast
         await self.channel_layer.group_send(
@@ -66,7 +121,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 'message': message,
                 'username': username,
                 'user_id': user_data['user_id'],
-                'avatar_url': user_data['avatar_url']
+                'avatar_url': user_data['avatar_url'],
+                'mentions': mentions
             }
         )
 
@@ -75,7 +131,66 @@ class ChatConsumer(AsyncWebsocketConsumer):
             'message': event['message'],
             'username': event['username'],
             'user_id': event.get('user_id'),
-            'avatar_url': event.get('avatar_url')
+            'avatar_url': event.get('avatar_url'),
+            'mentions': event.get('mentions', [])
+        }))
+
+    async def force_disconnect(self, event):
+        # Sent by moderation when this socket's user is blocked
+        await self.close(code=CLOSE_CODE_BLOCKED)
+
+    async def handle_typing(self):
+        user = self.scope["user"]
+
+        # Per-user throttle: drop pings inside the window (across all the user's sockets)
+        throttle_key = TYPING_THROTTLE_KEY.format(user_id=user.id)
+        if not await cache.aadd(throttle_key, True, self.TYPING_THROTTLE_SECONDS):
+            return
+
+        room = self.room_group_name
+        await self.update_typers(room, user.id, user.username)
+
+        # First typer in this interval (in any process) schedules the room's single flush
+        if await cache.aadd(TYPING_FLUSH_KEY.format(room=room), True, self.TYPING_FLUSH_SECONDS * 5):
+            task = asyncio.create_task(self.flush_typing(room))
+            ChatConsumer.typing_flush_tasks.add(task)
+            task.add_done_callback(ChatConsumer.typing_flush_tasks.discard)
+
+    async def update_typers(self, room, user_id, username=None):
+        """Add a typer to the room's pending set, or remove them (`username=None`)."""
+        # Read-modify-write: a concurrent ping may be lost for one flush; its
+        # sender pings again after the throttle window
+        key = TYPING_PENDING_KEY.format(room=room)
+        typers = await cache.aget(key, {})
+        if username is None:
+            if typers.pop(user_id, None) is None:
+                return
+        else:
+            typers[user_id] = username
+        await cache.aset(key, typers, self.TYPING_FLUSH_SECONDS * 5)
+
+    async def flush_typing(self, room):
+        await asyncio.sleep(self.TYPING_FLUSH_SECONDS)
+        pending_key = TYPING_PENDING_KEY.format(room=room)
+        typers = await cache.aget(pending_key, {})
+        await cache.adelete_many([pending_key, TYPING_FLUSH_KEY.format(room=room)])
+        if not typers:
+            return
+        await self.channel_layer.group_send(
+            room,
+            {
+                'type': 'typing_update',
+                'users': [
+                    {'user_id': user_id, 'username': username}
+                    for user_id, username in typers.items()
+                ]
+            }
+        )
+
+    async def typing_update(self, event):
+        await self.send(text_data=json.dumps({
+            'type': 'typing',
+            'users': event['users']
         }))
     
     async def user_count(self, event):
@@ -101,9 +216,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     @database_sync_to_async
     def get_last_50_messages(self):
-        messages = Message.objects.all().order_by('-timestamp')[:50]
+        messages = list(reversed(Message.objects.select_related('user__profile').order_by('-timestamp')[:50]))
+        # One lookup for the whole history instead of one per message
+        mentions = username_index.resolve_many([m.content for m in messages])
         result = []
-        for m in reversed(messages):
+        for m, message_mentions in zip(messages, mentions):
             avatar_url = None
             try:
                 if hasattr(m.user, 'profile'):
@@ -115,7 +232,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 'username': m.user.username,
                 'message': m.content,
                 'user_id': m.user.id,
-                'avatar_url': avatar_url
+                'avatar_url': avatar_url,
+                'mentions': message_mentions
             })
         return result
 
@@ -0,0 +1,106 @@
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+
+from .models import Message
+
+# Rows fetched per round-trip from the server-side cursor.
+# Keeps memory flat regardless of how many messages a user has.
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+MESSAGE_EXPORT_FIELDS = ['id', 'username', 'content', 'timestamp']
+
+
+class Echo:
+    """
+    File-like object that hands back whatever is written to it.
+    Lets csv.writer produce one encoded line at a time for streaming.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_user_messages(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield a user's messages oldest-first as plain dicts.
+
+    Uses `iterator()` so Postgres serves rows through a server-side cursor
+    instead of materialising the whole result set.
+    """
+    rows = (
+        Message.objects
+        .filter(user=user)
+        .order_by('timestamp', 'id')
+        .values_list('id', 'content', 'timestamp')
+        .iterator(chunk_size=chunk_size)
+    )
+    for message_id, content, timestamp in rows:
+        yield {
+            'id': message_id,
+            'username': user.username,
+            'content': content,
+            'timestamp': timestamp.isoformat(),
+        }
+
+
+def iter_ndjson(rows):
+    """Encode each row as one JSON document per line."""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def iter_csv(rows, fieldnames):
+    """Encode rows as CSV, header first, one line per yielded chunk."""
+    writer = csv.DictWriter(Echo(), fieldnames=fieldnames)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def encode_rows(rows, export_format, fieldnames):
+    if export_format == 'csv':
+        return iter_csv(rows, fieldnames)
+    return iter_ndjson(rows)
+
+
+def _next_batch(lines, size):
+    return ''.join(islice(lines, size))
+
+
+async def stream_batches(lines, batch_size=None):
+    """
+    Async iterator over `lines` (a sync generator), joined `batch_size` at a time.
+
+    The app is served over ASGI, where Django buffers a sync iterator in
+    full (`sync_to_async(list)`) before sending anything. Pulling one batch
+    per `sync_to_async` call instead keeps memory flat: each batch is sent
+    before the next is read. The calls are thread-sensitive, so the
+    queryset's server-side cursor is always used from the same thread.
+    """
+    batch_size = batch_size or EXPORT_CHUNK_SIZE
+    next_batch = sync_to_async(_next_batch)
+    try:
+        while chunk := await next_batch(lines, batch_size):
+            yield chunk
+    finally:
+        # Releases the cursor if the client disconnects mid-export
+        await sync_to_async(lines.close)()
+
+
+def export_response(rows, export_format, fieldnames, filename):
+    """Wrap a row generator in a streaming download response."""
+    response = StreamingHttpResponse(
+        stream_batches(encode_rows(rows, export_format, fieldnames)),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from chat.exports import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    MESSAGE_EXPORT_FIELDS,
+    encode_rows,
+    iter_user_messages,
+)
+
+
+class Command(BaseCommand):
+    help = "Stream a user's chat messages to stdout or a file as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--output-format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--file', help='Write to this path instead of stdout.')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' not found")
+
+        chunks = encode_rows(
+            iter_user_messages(user, chunk_size=options['chunk_size']),
+            options['output_format'],
+            MESSAGE_EXPORT_FIELDS,
+        )
+
+        if options['file']:
+            with open(options['file'], 'w', encoding='utf-8', newline='') as fh:
+                fh.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,178 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+# Matches `@username` not preceded by a word char or `@` (so emails and
+# "@a@b" don't count as one name). Otherwise mirrors Django's default
+# username validator, minus `@`, which can't be told apart from a second
+# mention.
+MENTION_PATTERN = re.compile(r'(?<![\w@])@([\w.+-]+)')
+
+# Unknown names looked up in the database per message, at most
+MAX_MENTION_LOOKUPS = 10
+
+# Names known not to exist, remembered so repeated misses don't query again.
+# Signals clear an entry when the name is created; the expiry covers users
+# created without them (bulk_create, raw SQL).
+MAX_MISSING_NAMES = 10_000
+MISSING_NAME_SECONDS = 300
+
+# Username changes are appended to a log in the cache so every process's
+# index can replay them (with a shared CACHE_BACKEND). A process that finds
+# an entry gone, or falls too far behind, reloads instead.
+USERNAME_LOG_VERSION_KEY = 'chat:usernames:version'
+USERNAME_LOG_ENTRY_KEY = 'chat:usernames:{version}'
+USERNAME_LOG_TIMEOUT = 60 * 60
+MAX_USERNAME_LOG_REPLAY = 1000
+
+
+def publish_username_change(user_id, username):
+    """Append a change to the shared log; `username=None` for a deleted user. Call after commit."""
+    cache.add(USERNAME_LOG_VERSION_KEY, 0, timeout=None)
+    version = cache.incr(USERNAME_LOG_VERSION_KEY)
+    cache.set(USERNAME_LOG_ENTRY_KEY.format(version=version), (user_id, username), USERNAME_LOG_TIMEOUT)
+
+
+class UsernameIndex:
+    """
+    In-memory map of usernames to user ids.
+
+    Usernames are case-sensitive (as Django's are), so `@Bob` only mentions
+    "Bob". Loaded once per process (a single `values_list` scan), then kept
+    current by User save/delete signals in this process and by replaying
+    the shared username log for changes made elsewhere. Mentions of known
+    and known-missing names never query the database; a name seen for the
+    first time is looked up once, with one query per batch of messages.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_name = {}              # username -> user_id
+        self._by_id = {}                # user_id -> username
+        self._missing = OrderedDict()   # username -> monotonic time it was found missing
+        self._version = 0               # last username log entry applied
+        self.loaded = False
+
+    def ensure_loaded(self):
+        if self.loaded:
+            return
+        with self._lock:
+            if not self.loaded:
+                self._load()
+
+    def _load(self):
+        # Read the log position first: changes made during the scan are replayed after it
+        version = cache.get(USERNAME_LOG_VERSION_KEY, 0)
+        self._by_name, self._by_id, self._missing = {}, {}, OrderedDict()
+        for user_id, username in User.objects.values_list('id', 'username').iterator(chunk_size=5000):
+            self._set(user_id, username)
+        self._version = version
+        self.loaded = True
+
+    def _set(self, user_id, username):
+        old = self._by_id.get(user_id)
+        if old is not None and old != username:
+            self._by_name.pop(old, None)
+        self._by_id[user_id] = username
+        self._by_name[username] = user_id
+        self._missing.pop(username, None)
+
+    def _unset(self, user_id):
+        name = self._by_id.pop(user_id, None)
+        if name is not None:
+            self._by_name.pop(name, None)
+
+    def add(self, user_id, username):
+        if self.loaded:
+            with self._lock:
+                self._set(user_id, username)
+
+    def remove(self, user_id):
+        if self.loaded:
+            with self._lock:
+                self._unset(user_id)
+
+    def sync(self):
+        """Replay username changes other processes logged since the last call."""
+        version = cache.get(USERNAME_LOG_VERSION_KEY, 0)
+        if version == self._version:
+            return
+        with self._lock:
+            if version < self._version or version - self._version > MAX_USERNAME_LOG_REPLAY:
+                # The cache was cleared, or we're too far behind to replay
+                self._load()
+                return
+            keys = [USERNAME_LOG_ENTRY_KEY.format(version=v) for v in range(self._version + 1, version + 1)]
+            entries = cache.get_many(keys)
+            if len(entries) < len(keys):
+                self._load()
+                return
+            for key in keys:
+                user_id, username = entries[key]
+                if username is None:
+                    self._unset(user_id)
+                else:
+                    self._set(user_id, username)
+            self._version = version
+
+    def _is_missing(self, name, now):
+        missing_at = self._missing.get(name)
+        return missing_at is not None and now - missing_at < MISSING_NAME_SECONDS
+
+    def _lookup(self, names):
+        """Load users named in `names` from the database; remember the ones that don't exist."""
+        rows = list(User.objects.filter(username__in=names).values_list('id', 'username'))
+        now = time.monotonic()
+        with self._lock:
+            for user_id, username in rows:
+                self._set(user_id, username)
+            for name in set(names) - {username for _, username in rows}:
+                self._missing[name] = now
+                self._missing.move_to_end(name)
+            while len(self._missing) > MAX_MISSING_NAMES:
+                self._missing.popitem(last=False)
+
+    def resolve_many(self, texts):
+        """
+        Return, for each of `texts`, `[{'user_id', 'username'}]` for every known user it mentions.
+
+        May query the database (once, for names not seen before), so call it
+        from a sync context.
+        """
+        self.ensure_loaded()
+        self.sync()
+        # Trailing punctuation ("hi @bob.") is not part of the name
+        names_per_text = [
+            list(dict.fromkeys(raw.rstrip('.') for raw in MENTION_PATTERN.findall(text)))
+            for text in texts
+        ]
+        now = time.monotonic()
+        unknown = {}
+        for names in names_per_text:
+            new = [name for name in names if name and name not in self._by_name and not self._is_missing(name, now)]
+            unknown.update(dict.fromkeys(new[:MAX_MENTION_LOOKUPS]))
+        if unknown:
+            self._lookup(list(unknown))
+
+        results = []
+        for names in names_per_text:
+            mentions = []
+            seen = set()
+            for name in names:
+                user_id = self._by_name.get(name)
+                if user_id is not None and user_id not in seen:
+                    seen.add(user_id)
+                    mentions.append({'user_id': user_id, 'username': name})
+            results.append(mentions)
+        return results
+
+    def resolve_mentions(self, text):
+        """`resolve_many` for a single message."""
+        return self.resolve_many([text])[0]
+
+
+username_index = UsernameIndex()
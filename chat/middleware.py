@@ -1,6 +1,6 @@
 from channels.db import database_sync_to_async
-from django.contrib.auth.models import User
 from django.contrib.auth.models import AnonymousUser
+from auth.authentication import get_principal
 from auth.utils import decode_token
 
 @database_sync_to_async
@@ -8,7 +8,9 @@ def get_user(token):
     try:
         payload = decode_token(token)
         if payload:
-            return User.objects.get(id=payload['user_id'])
+            user = get_principal(payload['user_id'])
+            # Blocked users can't (re)connect; the consumer rejects anonymous scopes
+            return user if user.is_active else AnonymousUser()
         return AnonymousUser()
     except:
         return AnonymousUser()
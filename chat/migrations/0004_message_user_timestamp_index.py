@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_remove_message_extra_data_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['user', 'timestamp'], name='chat_messag_user_id_06b162_idx'),
+        ),
+    ]
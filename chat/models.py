@@ -1,5 +1,11 @@
-from django.db import models
+from functools import partial
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .mentions import publish_username_change, username_index
 
 class Message(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -7,4 +13,23 @@ class Message(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ['timestamp']
\ No newline at end of file
+        ordering = ['timestamp']
+        indexes = [
+            # Per-user history scans (exports, moderation review)
+            models.Index(fields=['user', 'timestamp']),
+        ]
+
+
+@receiver(post_save, sender=User)
+def sync_username_index(sender, instance, update_fields=None, **kwargs):
+    # Keep mention lookups current across signups and renames, here and in other processes
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    username_index.add(instance.id, instance.username)
+    transaction.on_commit(partial(publish_username_change, instance.id, instance.username))
+
+
+@receiver(post_delete, sender=User)
+def drop_from_username_index(sender, instance, **kwargs):
+    username_index.remove(instance.id)
+    transaction.on_commit(partial(publish_username_change, instance.id, None))
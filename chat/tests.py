@@ -1,3 +1,96 @@
-from django.test import TestCase
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase
+
+from auth.utils import generate_access_token
+from .mentions import UsernameIndex
+from .models import Message
+
+EXPORT_URL = '/api/chat/export/'
+
+
+class MessageExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='exporter')
+        Message.objects.bulk_create([Message(user=self.user, content=f'message {i}') for i in range(7)])
+        self.client = AsyncClient()
+        self.auth = {'Authorization': f'Bearer {generate_access_token(self.user)}'}
+
+    async def collect(self, response):
+        return [chunk async for chunk in response.streaming_content]
+
+    async def test_export_streams_one_chunk_per_batch(self):
+        with mock.patch('chat.exports.EXPORT_CHUNK_SIZE', 3):
+            response = await self.client.get(EXPORT_URL, headers=self.auth)
+            # An async iterator is what ASGI sends without buffering the whole body first
+            self.assertTrue(response.is_async)
+            chunks = await self.collect(response)
+
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [3, 3, 1])
+        rows = [json.loads(line) for line in b''.join(chunks).splitlines()]
+        self.assertEqual([row['content'] for row in rows], [f'message {i}' for i in range(7)])
+        self.assertEqual({row['username'] for row in rows}, {'exporter'})
+
+    async def test_csv_export_starts_with_header(self):
+        with mock.patch('chat.exports.EXPORT_CHUNK_SIZE', 4):
+            response = await self.client.get(EXPORT_URL, {'output': 'csv'}, headers=self.auth)
+            chunks = await self.collect(response)
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(len(chunks), 2)
+        lines = b''.join(chunks).decode().splitlines()
+        self.assertEqual(lines[0], 'id,username,content,timestamp')
+        self.assertEqual(len(lines), 8)
+
+    async def test_unsupported_format_is_rejected(self):
+        response = await self.client.get(EXPORT_URL, {'output': 'xml'}, headers=self.auth)
+
+        self.assertEqual(response.status_code, 400)
+
+
+class UsernameIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.bob = User.objects.create(username='Bob')
+        self.index = UsernameIndex()
+        self.index.ensure_loaded()
+
+    def test_names_are_case_sensitive(self):
+        User.objects.create(username='bob')
+
+        mentions = self.index.resolve_mentions('@bob meet @Bob.')
+
+        self.assertEqual([m['username'] for m in mentions], ['bob', 'Bob'])
+
+    def test_missing_names_are_looked_up_once(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.index.resolve_mentions('@ghost'), [])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.index.resolve_mentions('@ghost @Bob'), [{'user_id': self.bob.id, 'username': 'Bob'}])
+
+    def test_a_batch_is_resolved_with_one_query(self):
+        # Created without signals, so only the database knows the name
+        User.objects.bulk_create([User(username='carol')])
+        carol = User.objects.get(username='carol')
+
+        with self.assertNumQueries(1):
+            results = self.index.resolve_many(['@x1 @Bob', '@carol', '@x2'])
+
+        self.assertEqual(results, [
+            [{'user_id': self.bob.id, 'username': 'Bob'}],
+            [{'user_id': carol.id, 'username': 'carol'}],
+            [],
+        ])
+
+    def test_renames_elsewhere_reach_the_index_through_the_cache(self):
+        # self.index stands in for another process: the rename's signals never touch it
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.username = 'Robert'
+            self.bob.save()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.index.resolve_mentions('@Robert'), [{'user_id': self.bob.id, 'username': 'Robert'}])
+        self.assertEqual(self.index.resolve_mentions('@Bob'), [])
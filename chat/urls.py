@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import MessageExportView
+
+urlpatterns = [
+    path('export/', MessageExportView.as_view(), name='chat_export_self'),
+    path('export/<str:username>/', MessageExportView.as_view(), name='chat_export_user'),
+]
@@ -1,3 +1,47 @@
-from django.shortcuts import render
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from .exports import (
+    EXPORT_FORMATS,
+    MESSAGE_EXPORT_FIELDS,
+    export_response,
+    iter_user_messages,
+)
+
+
+class MessageExportView(APIView):
+    """
+    Streams a user's chat history as NDJSON or CSV.
+
+    - `GET /export/` exports the requesting user's own messages (data access).
+    - `GET /export/<username>/` lets staff export anyone's messages (moderation).
+
+    Query params:
+    - `output`: `ndjson` (default) or `csv`.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, username=None):
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response({'error': 'Unsupported export format'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if username is None:
+            user = request.user
+        else:
+            if not (request.user.is_staff or request.user.is_superuser):
+                return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+            try:
+                user = User.objects.get(username=username)
+            except User.DoesNotExist:
+                return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        return export_response(
+            iter_user_messages(user),
+            export_format,
+            MESSAGE_EXPORT_FIELDS,
+            filename=f"chat_{user.username}",
+        )
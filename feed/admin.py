@@ -0,0 +1,18 @@
+from django.contrib import admin
+from .models import ActivityEvent, FeedEntry
+
+
+@admin.register(ActivityEvent)
+class ActivityEventAdmin(admin.ModelAdmin):
+    list_display = ['actor', 'verb', 'target', 'delivery', 'created_at']
+    list_filter = ['verb', 'delivery', 'created_at']
+    search_fields = ['actor__username', 'target__username']
+    readonly_fields = ['created_at']
+    ordering = ['-created_at']
+
+
+@admin.register(FeedEntry)
+class FeedEntryAdmin(admin.ModelAdmin):
+    list_display = ['owner', 'event', 'created_at']
+    search_fields = ['owner__username']
+    raw_id_fields = ['owner', 'event']
@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('verb', models.CharField(choices=[('check_in', 'Checked In'), ('follow', 'Followed'), ('referral', 'Joined via Referral')], max_length=20)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('delivery', models.CharField(choices=[('push', 'Fan-out on write'), ('pull', 'Pull on read')], default='push', max_length=4)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_events', to=settings.AUTH_USER_MODEL)),
+                ('target', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='targeted_activity_events', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='feed.activityevent')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Feed Entries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='activityevent',
+            index=models.Index(fields=['actor', 'created_at', 'id'], name='feed_activi_actor_i_d7ae82_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activityevent',
+            index=models.Index(condition=models.Q(('delivery', 'pull')), fields=['created_at', 'id'], name='feed_event_pull_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['owner', 'created_at', 'event'], name='feed_entry_timeline_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('owner', 'event'), name='feed_entry_owner_event_uniq'),
+        ),
+    ]
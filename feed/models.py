@@ -0,0 +1,71 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+
+class ActivityEvent(models.Model):
+    """
+    Something a user did that their followers see in their feed.
+
+    Events are written once; delivery to followers happens separately:
+    - **push**: copied into each follower's timeline (FeedEntry) by
+      background fan-out batches.
+    - **pull**: left in place for accounts with very many followers and
+      merged into followers' feeds at read time instead.
+    """
+    VERB_CHOICES = [
+        ('check_in', 'Checked In'),
+        ('follow', 'Followed'),
+        ('referral', 'Joined via Referral'),
+    ]
+    DELIVERY_CHOICES = [
+        ('push', 'Fan-out on write'),
+        ('pull', 'Pull on read'),
+    ]
+
+    actor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_events')
+    verb = models.CharField(max_length=20, choices=VERB_CHOICES)
+    # The other user involved, e.g. who was followed or who referred the actor
+    target = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, blank=True, related_name='targeted_activity_events'
+    )
+    data = models.JSONField(default=dict, blank=True)
+    delivery = models.CharField(max_length=4, choices=DELIVERY_CHOICES, default='push')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['actor', 'created_at', 'id']),
+            # Pull-on-read scans only the (few) events that were not fanned out
+            models.Index(
+                fields=['created_at', 'id'],
+                name='feed_event_pull_idx',
+                condition=models.Q(delivery='pull'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.actor_id} {self.verb} ({self.created_at})"
+
+
+class FeedEntry(models.Model):
+    """
+    One event in one user's timeline (fan-out-on-write).
+
+    `created_at` is copied from the event so a feed page is a single range
+    scan of (owner, created_at, event) without touching the event table.
+    """
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feed_entries')
+    event = models.ForeignKey(ActivityEvent, on_delete=models.CASCADE, related_name='feed_entries')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'event'], name='feed_entry_owner_event_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['owner', 'created_at', 'event'], name='feed_entry_timeline_idx'),
+        ]
+        verbose_name_plural = 'Feed Entries'
+
+    def __str__(self):
+        return f"{self.owner_id} <- {self.event_id}"
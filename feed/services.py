@@ -0,0 +1,187 @@
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from auth.models import AccountDeletionJob
+from users.models import UserProfile
+from users.pagination import encode_cursor, keyset_page
+from .models import ActivityEvent, FeedEntry
+
+
+# Feed item columns, as paths relative to ActivityEvent
+EVENT_FIELDS = {
+    'verb': 'verb',
+    'data': 'data',
+    'actor_username': 'actor__username',
+    'actor_first_name': 'actor__first_name',
+    'actor_avatar_url': 'actor__profile__avatar_url',
+    'target_username': 'target__username',
+}
+
+
+def _event_values(queryset, prefix=''):
+    """`values()` of everything a feed item shows, joined in the same query."""
+    plain = [name for name, path in EVENT_FIELDS.items() if not prefix and name == path]
+    joined = {
+        name: F(f'{prefix}{path}')
+        for name, path in EVENT_FIELDS.items()
+        if name not in plain
+    }
+    key = 'event_id' if prefix else 'id'
+    return queryset.values('created_at', key, *plain, **joined)
+
+
+def _visible_events(queryset, prefix=''):
+    """Drop events of blocked actors and of accounts being deleted."""
+    return queryset.filter(**{f'{prefix}actor__is_active': True}).exclude(
+        **{f'{prefix}actor_id__in': AccountDeletionJob.deleting_user_ids()}
+    )
+
+
+def _item(row):
+    return {
+        'id': row['event_id'],
+        'verb': row['verb'],
+        'actor': {
+            'username': row['actor_username'],
+            'first_name': row['actor_first_name'],
+            'avatar_url': row['actor_avatar_url'],
+        },
+        'target': row['target_username'],
+        'data': row['data'],
+        'created_at': row['created_at'],
+    }
+
+
+class FeedService:
+    """
+    Activity feed: fan-out-on-write with pull-on-read for popular accounts.
+
+    Publishing writes one ActivityEvent and the actor's own timeline entry.
+    Copies for followers are made by background batches after commit. Actors
+    with at least FEED_PULL_THRESHOLD followers are not fanned out at all;
+    their events are merged in when a follower reads the feed.
+    """
+
+    @staticmethod
+    def publish(actor, verb, target=None, data=None):
+        """
+        Record an activity and schedule its delivery.
+
+        Call inside the transaction that writes the underlying change, so the
+        event exists only if the change does. Repeats of the same activity
+        within FEED_EVENT_DEDUPE_SECONDS (e.g. re-following after an
+        unfollow) are dropped, so toggling can't flood followers' feeds.
+
+        Returns:
+            ActivityEvent | None: The event, or None for a dropped repeat.
+        """
+        from .tasks import fan_out_event
+
+        window = settings.FEED_EVENT_DEDUPE_SECONDS.get(verb)
+        if window and ActivityEvent.objects.filter(
+            actor=actor, verb=verb, target=target, created_at__gte=timezone.now() - timedelta(seconds=window)
+        ).exists():
+            return None
+
+        followers = (
+            UserProfile.objects.filter(user=actor).values_list('followers_count', flat=True).first() or 0
+        )
+        delivery = 'pull' if followers >= settings.FEED_PULL_THRESHOLD else 'push'
+
+        with transaction.atomic():
+            event = ActivityEvent.objects.create(
+                actor=actor, verb=verb, target=target, data=data or {}, delivery=delivery
+            )
+            # The actor sees their own activity immediately
+            FeedEntry.objects.create(owner=actor, event=event, created_at=event.created_at)
+            if delivery == 'push' and followers:
+                transaction.on_commit(partial(fan_out_event.enqueue, event.id))
+
+        return event
+
+    @staticmethod
+    def forget(owner_id, actor_id):
+        """Drop an unfollowed actor's events from a timeline, in the background."""
+        from .tasks import prune_feed
+
+        transaction.on_commit(partial(prune_feed.enqueue, owner_id, actor_id))
+
+    @staticmethod
+    def timeline(user, cursor=None, limit=50):
+        """
+        One page of `user`'s feed, newest first.
+
+        Pushed events come from a single range scan of the user's FeedEntry
+        rows; pulled events from the partial index of undelivered events,
+        restricted to actors the user follows. Both are keyed by
+        (created_at, event id), so one cursor pages through the merge.
+        Events of inactive actors (blocked, or being deleted) are left out.
+
+        Returns:
+            tuple: (items, next_cursor)
+
+        Raises:
+            InvalidCursor: If `cursor` is malformed.
+        """
+        entries = _visible_events(FeedEntry.objects.filter(owner=user), prefix='event__')
+        pushed, pushed_next = keyset_page(
+            _event_values(entries, prefix='event__'),
+            cursor=cursor, limit=limit, key_field='event_id',
+        )
+        pulled_events = _visible_events(ActivityEvent.objects.filter(delivery='pull', actor__followers__follower=user))
+        pulled, pulled_next = keyset_page(_event_values(pulled_events), cursor=cursor, limit=limit)
+
+        merged = {row['event_id']: row for row in pushed}
+        for row in pulled:
+            row['event_id'] = row.pop('id')
+            merged.setdefault(row['event_id'], row)
+        rows = sorted(merged.values(), key=lambda row: (row['created_at'], row['event_id']), reverse=True)
+
+        next_cursor = None
+        if len(rows) > limit or pushed_next or pulled_next:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['event_id'])
+
+        return [_item(row) for row in rows], next_cursor
+
+    @staticmethod
+    def count_since(user, event_id, cap=100):
+        """
+        Number of feed items newer than `event_id` (the newest one the
+        client has seen), not counting the user's own activity.
+
+        "Newer" uses the timeline's (created_at, event id) order. Each
+        source stops counting at `cap`, so the cost stays bounded however
+        stale the client is; show `cap` as "99+".
+        """
+        seen_at = ActivityEvent.objects.filter(id=event_id).values_list('created_at', flat=True).first()
+
+        def newer(queryset, time_field, key_field):
+            if seen_at is None:
+                # The event is gone (e.g. its actor was deleted); fall back to id order
+                return queryset.filter(**{f'{key_field}__gt': event_id})
+            # (time_field, key_field) > (seen_at, event_id), written so the time bound stays sargable
+            return queryset.filter(**{f'{time_field}__gte': seen_at}).exclude(
+                Q(**{time_field: seen_at}) & Q(**{f'{key_field}__lte': event_id})
+            )
+
+        pushed = (
+            newer(_visible_events(FeedEntry.objects.filter(owner=user), prefix='event__'), 'created_at', 'event_id')
+            .exclude(event__actor=user)
+            .values('event_id')[:cap]
+            .count()
+        )
+        pulled = (
+            newer(
+                _visible_events(ActivityEvent.objects.filter(delivery='pull', actor__followers__follower=user)),
+                'created_at', 'id',
+            )
+            .values('id')[:cap]
+            .count()
+        )
+        return min(pushed + pulled, cap)
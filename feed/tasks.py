@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.tasks import task
+
+from users.models import UserFollow
+from .models import ActivityEvent, FeedEntry
+
+
+@task
+def fan_out_event(event_id, after_follow_id=0):
+    """
+    Copy an event into its actor's followers' timelines.
+
+    Followers are walked in UserFollow id order, FEED_FANOUT_BATCH_SIZE at a
+    time, each batch its own insert, so a large fan-out never holds one long
+    transaction. Batches run in a loop within this task (re-enqueueing from
+    inside it would recurse under the ImmediateBackend); inserts ignore
+    existing entries, so a retry can start over or from `after_follow_id`.
+    """
+    event = ActivityEvent.objects.filter(id=event_id).values('actor_id', 'created_at').first()
+    if event is None:
+        return 0
+
+    batch_size = settings.FEED_FANOUT_BATCH_SIZE
+    delivered = 0
+    while True:
+        follows = list(
+            UserFollow.objects
+            .filter(following_id=event['actor_id'], id__gt=after_follow_id)
+            .order_by('id')
+            .values_list('id', 'follower_id')[:batch_size]
+        )
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(owner_id=follower_id, event_id=event_id, created_at=event['created_at'])
+                for _, follower_id in follows
+            ],
+            ignore_conflicts=True,
+        )
+        delivered += len(follows)
+        if len(follows) < batch_size:
+            return delivered
+        after_follow_id = follows[-1][0]
+
+
+@task
+def prune_feed(owner_id, actor_id):
+    """Remove an actor's events from one timeline (after an unfollow)."""
+    deleted, _ = FeedEntry.objects.filter(owner_id=owner_id, event__actor_id=actor_id).delete()
+    return deleted
@@ -0,0 +1,31 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from users.pagination import InvalidCursor, get_page_size
+from .services import FeedService
+
+
+class FeedView(APIView):
+    """
+    The requesting user's activity feed: their own activity and that of the
+    people they follow, newest first.
+
+    Query params:
+    - `cursor`: `next_cursor` from the previous page.
+    - `limit`: Page size (default 50, max 100).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            items, next_cursor = FeedService.timeline(
+                request.user,
+                cursor=request.query_params.get('cursor'),
+                limit=get_page_size(request),
+            )
+        except InvalidCursor:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'results': items, 'next_cursor': next_cursor})
@@ -29,6 +29,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "corsheaders",
 
@@ -36,6 +37,7 @@ INSTALLED_APPS = [
     'chat',
     'rewards',
     'users',
+    'feed',
 ]
 
 # Middleware
@@ -74,12 +76,108 @@ WSGI_APPLICATION = "project.wsgi.application"
 
 ASGI_APPLICATION = "project.asgi.application"
 
-CHANNEL_LAYERS = {
+# The in-memory layer only reaches sockets in the same process, so group
+# sends from other processes (e.g. disconnecting blocked users from an admin
+# request) are lost. Set CHANNEL_REDIS_URL when running more than one
+# process to share the layer through Redis (channels_redis).
+CHANNEL_REDIS_URL = os.getenv("CHANNEL_REDIS_URL")
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {"hosts": [CHANNEL_REDIS_URL]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    }
+
+# Cache
+# Local-memory by default (per process). Point CACHE_BACKEND/CACHE_LOCATION at a
+# shared backend such as django.core.cache.backends.redis.RedisCache in production.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", "code-of-clans"),
+    }
+}
+
+# Seconds a public profile payload may be served from cache.
+# Signals invalidate it on change; this only bounds staleness from missed writes.
+PROFILE_CACHE_TIMEOUT = int(os.getenv("PROFILE_CACHE_TIMEOUT", 300))
+
+# Unread/new-item counters in the bootstrap response stop counting here
+BOOTSTRAP_COUNTER_CAP = int(os.getenv("BOOTSTRAP_COUNTER_CAP", 100))
+
+# Rows removed per step of a background account deletion (one transaction each)
+ACCOUNT_DELETION_CHUNK_SIZE = int(os.getenv("ACCOUNT_DELETION_CHUNK_SIZE", 1000))
+
+# Seconds an authenticated user's (non-secret) columns are reused across
+# requests. Only applies with a shared CACHE_BACKEND; per-process caches
+# can't be invalidated everywhere, so the row is read on every request.
+# User saves and deletes invalidate it; keep it short regardless.
+AUTH_PRINCIPAL_CACHE_TIMEOUT = int(os.getenv("AUTH_PRINCIPAL_CACHE_TIMEOUT", 60))
+
+# Referral analytics: cached per-user stats and a precomputed top-referrers list
+# (patched incrementally when a referral is redeemed).
+REFERRAL_STATS_CACHE_TIMEOUT = int(os.getenv("REFERRAL_STATS_CACHE_TIMEOUT", 60 * 60))
+REFERRAL_TOP_CACHE_SIZE = 100
+
+# Key of the permutation that turns user ids into referral codes. Must never
+# change once codes are issued (a new key could reissue a taken code), so it
+# is separate from SECRET_KEY and has no default.
+REFERRAL_CODE_KEY = os.getenv("REFERRAL_CODE_KEY")
+if not REFERRAL_CODE_KEY:
+    raise ImproperlyConfigured("REFERRAL_CODE_KEY is not set")
+
+# Follow suggestions: in-memory follow graph, snapshotted to disk so worker
+# startup restores it instead of rescanning the UserFollow table.
+FOLLOW_GRAPH_SNAPSHOT_PATH = os.getenv("FOLLOW_GRAPH_SNAPSHOT_PATH", str(BASE_DIR / "var" / "follow_graph.snapshot"))
+FOLLOW_GRAPH_REFRESH_SECONDS = int(os.getenv("FOLLOW_GRAPH_REFRESH_SECONDS", 60))
+# Follows and unfollows this recent are re-read on every sync, so rows from
+# transactions that commit late are not skipped. Keep it above the longest
+# transaction that writes follows.
+FOLLOW_GRAPH_SETTLE_SECONDS = int(os.getenv("FOLLOW_GRAPH_SETTLE_SECONDS", 60))
+# Unfollows are logged so other processes can drop the edges; entries older
+# than this are pruned (prune_unfollow_log), and older snapshots are ignored.
+UNFOLLOW_LOG_RETENTION_DAYS = int(os.getenv("UNFOLLOW_LOG_RETENTION_DAYS", 7))
+
+# Activity feed: events are copied into followers' timelines in background
+# batches; accounts with at least FEED_PULL_THRESHOLD followers are merged in
+# at read time instead.
+FEED_FANOUT_BATCH_SIZE = int(os.getenv("FEED_FANOUT_BATCH_SIZE", 1000))
+FEED_PULL_THRESHOLD = int(os.getenv("FEED_PULL_THRESHOLD", 10_000))
+# Repeats of the same (actor, verb, target) event within this many seconds
+# are not published, so follow/unfollow toggling can't spam feeds.
+FEED_EVENT_DEDUPE_SECONDS = {
+    'follow': int(os.getenv("FEED_FOLLOW_DEDUPE_SECONDS", 60 * 60 * 24)),
+}
+
+# Background tasks (django.tasks)
+# The immediate backend runs tasks in-process as soon as the request's
+# transaction commits, i.e. on the request thread before the response is sent
+# (views report finished work in that case, see project.tasks.runs_inline).
+# Point TASKS_BACKEND at a queue-backed backend to move them to workers.
+# Account deletions are the exception: they are never run inline, so with
+# the immediate backend schedule `manage.py resume_account_deletions` (cron).
+TASKS = {
     "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+        "BACKEND": os.getenv("TASKS_BACKEND", "django.tasks.backends.immediate.ImmediateBackend"),
     }
 }
 
+# Profile image uploads are streamed to disk here and processed by a task.
+# With task workers on other hosts this must be storage they all mount.
+MEDIA_SPOOL_DIR = os.getenv("MEDIA_SPOOL_DIR", str(BASE_DIR / "var" / "uploads"))
+PROFILE_IMAGE_MAX_BYTES = int(os.getenv("PROFILE_IMAGE_MAX_BYTES", 10 * 1024 * 1024))
+# Stored images unreferenced for this long are removed by the media GC (gc_media).
+MEDIA_GC_GRACE_SECONDS = int(os.getenv("MEDIA_GC_GRACE_SECONDS", 60 * 60 * 24))
+# Uploads never sit in memory: Django writes them to temporary files in chunks.
+FILE_UPLOAD_HANDLERS = ["django.core.files.uploadhandler.TemporaryFileUploadHandler"]
+
 # Supabase 
 
 # DATABASE_URL = os.getenv("DATABASE_URL")
@@ -164,6 +262,28 @@ GITHUB_CLIENT_ID = os.getenv("GITHUB_CLIENT_ID")
 GITHUB_CLIENT_SECRET = os.getenv("GITHUB_CLIENT_SECRET")
 GITHUB_REDIRECT_URI = f"{FRONTEND_URL}/auth/github/callback"
 
+# GitHub REST API (following import). Page fetches run concurrently; the
+# page cap bounds one import at GITHUB_IMPORT_MAX_PAGES * 100 accounts.
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+GITHUB_API_TIMEOUT = float(os.getenv("GITHUB_API_TIMEOUT", 10))
+GITHUB_IMPORT_CONCURRENCY = int(os.getenv("GITHUB_IMPORT_CONCURRENCY", 8))
+GITHUB_IMPORT_MAX_PAGES = int(os.getenv("GITHUB_IMPORT_MAX_PAGES", 100))
+
+# Linked-platform stats sync (users.platforms). Each snapshot is refreshed
+# about every PLATFORM_STATS_REFRESH_SECONDS, +/- PLATFORM_STATS_JITTER, so
+# refreshes stay spread out; failures retry with exponential backoff from
+# PLATFORM_STATS_RETRY_SECONDS. The GitHub token is optional (raises the
+# rate limit); the stats sync stops before the last GITHUB_RATE_LIMIT_RESERVE
+# requests of the quota.
+PLATFORM_STATS_REFRESH_SECONDS = int(os.getenv("PLATFORM_STATS_REFRESH_SECONDS", 60 * 60 * 6))
+PLATFORM_STATS_JITTER = float(os.getenv("PLATFORM_STATS_JITTER", 0.2))
+PLATFORM_STATS_RETRY_SECONDS = int(os.getenv("PLATFORM_STATS_RETRY_SECONDS", 60 * 5))
+PLATFORM_STATS_BATCH_SIZE = int(os.getenv("PLATFORM_STATS_BATCH_SIZE", 200))
+PLATFORM_STATS_TIMEOUT = float(os.getenv("PLATFORM_STATS_TIMEOUT", 10))
+GITHUB_STATS_TOKEN = os.getenv("GITHUB_STATS_TOKEN")
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", 100))
+LEETCODE_GRAPHQL_URL = os.getenv("LEETCODE_GRAPHQL_URL", "https://leetcode.com/graphql")
+
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
 GOOGLE_REDIRECT_URI = f"{FRONTEND_URL}/auth/google/callback"
@@ -176,6 +296,23 @@ DISCORD_REDIRECT_URI = f"{FRONTEND_URL}/auth/discord/callback"
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
+# File storage
+# "supabase" uploads to the Supabase bucket; "local" writes under
+# STORAGE_LOCAL_ROOT (development, tests, benchmarks). A dotted path to a
+# backend class also works.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase")
+STORAGE_BUCKET = os.getenv("STORAGE_BUCKET", "Code of Clans")
+STORAGE_TIMEOUT = float(os.getenv("STORAGE_TIMEOUT", 20))
+STORAGE_RETRIES = int(os.getenv("STORAGE_RETRIES", 2))
+STORAGE_RETRY_BACKOFF = float(os.getenv("STORAGE_RETRY_BACKOFF", 0.5))
+STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", str(BASE_DIR / "var" / "media"))
+STORAGE_LOCAL_URL = os.getenv("STORAGE_LOCAL_URL", "/media/")
+
+# Leaderboard
+# Each process keeps an in-memory XP rank index; rebuild it this often (seconds)
+# to absorb XP changes written by other processes.
+LEADERBOARD_REFRESH_SECONDS = int(os.getenv("LEADERBOARD_REFRESH_SECONDS", 300))
+
 # Email Configuration
 # To send real emails, we use the SMTP backend.
 # Ensure you have EMAIL_HOST_USER and EMAIL_HOST_PASSWORD set in your .env file.
@@ -0,0 +1,12 @@
+from django.tasks.backends.immediate import ImmediateBackend
+
+
+def runs_inline(task):
+    """
+    Whether `task` runs in the calling process as soon as it is enqueued.
+
+    True under the ImmediateBackend (the default TASKS backend): "background"
+    work then happens on the request thread, before the response is sent,
+    so views report its outcome rather than claiming it is still pending.
+    """
+    return isinstance(task.get_backend(), ImmediateBackend)
@@ -6,4 +6,6 @@ urlpatterns = [
     path('api/auth/', include('auth.urls')),
     path('api/rewards/', include('rewards.urls')),
     path('api/profiles/', include('users.urls')),
+    path('api/chat/', include('chat.urls')),
+    path('api/feed/', include('feed.urls')),
 ]
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import DailyCheckIn
+from .models import DailyCheckIn, XPTransaction
 
 @admin.register(DailyCheckIn)
 class DailyCheckInAdmin(admin.ModelAdmin):
@@ -7,4 +7,13 @@ class DailyCheckInAdmin(admin.ModelAdmin):
     list_filter = ['check_in_date', 'streak_day']
     search_fields = ['user__username']
     readonly_fields = ['created_at']
-    ordering = ['-check_in_date']
\ No newline at end of file
+    ordering = ['-check_in_date']
+
+
+@admin.register(XPTransaction)
+class XPTransactionAdmin(admin.ModelAdmin):
+    list_display = ['user', 'amount', 'reason', 'source', 'created_at']
+    list_filter = ['reason', 'created_at']
+    search_fields = ['user__username', 'source']
+    readonly_fields = ['created_at']
+    ordering = ['-created_at']
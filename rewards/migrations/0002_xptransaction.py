@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rewards', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='XPTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField()),
+                ('reason', models.CharField(choices=[('check_in', 'Daily Check-In'), ('referral', 'Referral Redeemed'), ('opening_balance', 'Opening Balance'), ('adjustment', 'Manual Adjustment')], max_length=32)),
+                ('source', models.CharField(blank=True, help_text="Originating record, e.g. 'check_in:42'.", max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='xp_transactions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'XP Transaction',
+                'verbose_name_plural': 'XP Transactions',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'created_at'], name='rewards_xpt_user_id_95403d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:35
+
+from django.db import migrations
+
+
+def create_opening_balances(apps, schema_editor):
+    """Seed the ledger so that each user's ledger sum equals their current XP."""
+    UserProfile = apps.get_model('users', 'UserProfile')
+    XPTransaction = apps.get_model('rewards', 'XPTransaction')
+
+    balances = (
+        UserProfile.objects
+        .exclude(xp=0)
+        .values_list('user_id', 'xp')
+        .iterator(chunk_size=5000)
+    )
+    batch = []
+    for user_id, xp in balances:
+        batch.append(XPTransaction(user_id=user_id, amount=xp, reason='opening_balance', source='migration'))
+        if len(batch) >= 5000:
+            XPTransaction.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        XPTransaction.objects.bulk_create(batch)
+
+
+def delete_opening_balances(apps, schema_editor):
+    XPTransaction = apps.get_model('rewards', 'XPTransaction')
+    XPTransaction.objects.filter(reason='opening_balance', source='migration').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rewards', '0002_xptransaction'),
+        ('users', '0005_userprofile_xp_rank_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_opening_balances, delete_opening_balances),
+    ]
@@ -19,4 +19,35 @@ class DailyCheckIn(models.Model):
         verbose_name_plural = 'Daily Check-Ins'
     
     def __str__(self):
-        return f"{self.user.username} - Day {self.streak_day} - {self.check_in_date}"
\ No newline at end of file
+        return f"{self.user.username} - Day {self.streak_day} - {self.check_in_date}"
+
+class XPTransaction(models.Model):
+    """
+    Append-only ledger of XP awards.
+
+    `UserProfile.xp` is a cached running total of this table, bumped with an
+    atomic F() increment in the same transaction as each insert.
+    """
+    REASON_CHOICES = [
+        ('check_in', 'Daily Check-In'),
+        ('referral', 'Referral Redeemed'),
+        ('opening_balance', 'Opening Balance'),
+        ('adjustment', 'Manual Adjustment'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='xp_transactions')
+    amount = models.IntegerField()
+    reason = models.CharField(max_length=32, choices=REASON_CHOICES)
+    source = models.CharField(max_length=64, blank=True, help_text="Originating record, e.g. 'check_in:42'.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+        verbose_name = 'XP Transaction'
+        verbose_name_plural = 'XP Transactions'
+
+    def __str__(self):
+        return f"{self.user.username} {self.amount:+d} XP ({self.reason})"
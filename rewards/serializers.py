@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from users.fieldsets import SparseFieldsetMixin
 from .models import DailyCheckIn
 
-class DailyCheckInSerializer(serializers.ModelSerializer):
-    """Serializer for DailyCheckIn model."""
+class DailyCheckInSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Serializer for DailyCheckIn model. Supports sparse fieldsets (`selection=`)."""
     
     class Meta:
         model = DailyCheckIn
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from users.cache import invalidate_profile
+from users.leaderboard import is_ranked, leaderboard
+from users.models import UserProfile
+from .models import DailyCheckIn, XPTransaction
+
+
+class XPService:
+    """
+    Single entry point for changing a user's XP.
+
+    Never read-modify-write `profile.xp` in Python: concurrent awards would
+    overwrite each other. Awards append to the ledger and increment the
+    cached total in the database instead.
+    """
+
+    @staticmethod
+    def award(user, amount, reason, source=''):
+        """
+        Record an XP award and bump the cached total atomically.
+
+        Args:
+            user (User): Recipient.
+            amount (int): XP to add (negative for corrections).
+            reason (str): One of XPTransaction.REASON_CHOICES.
+            source (str): Identifier of the originating record.
+
+        Returns:
+            int: The user's new XP total.
+        """
+        with transaction.atomic():
+            XPTransaction.objects.create(user=user, amount=amount, reason=reason, source=source)
+            # UPDATE ... SET xp = xp + n: conflict-free under concurrency and
+            # leaves every other column (tokens included) untouched
+            UserProfile.objects.filter(user=user).update(xp=F('xp') + amount, updated_at=timezone.now())
+            total = UserProfile.objects.filter(user=user).values_list('xp', flat=True).first() or 0
+
+            # .update() skips model signals, so notify the derived views directly
+            if is_ranked(user.id):
+                transaction.on_commit(lambda: leaderboard.record(user.id, old_xp=total - amount, new_xp=total))
+            invalidate_profile(user.id)
+
+        return total
+
+
+class CheckInService:
+    """Read side of daily check-ins, shared by the check-in and bootstrap views."""
+
+    HISTORY_LENGTH = 7
+
+    @staticmethod
+    def status(user, fields=None):
+        """
+        Today's check-in, the current streak and recent history.
+
+        All three come from one index range scan of the user's latest
+        check-ins: the newest one is both "today's" (if dated today) and
+        the one the streak is read from.
+
+        Args:
+            user (User): Whose check-ins to read.
+            fields (list): DailyCheckIn columns to load (default: all).
+
+        Returns:
+            dict: {'checked_in_today', 'current_streak', 'today_checkin',
+            'recent_checkins'}; check-ins are model instances.
+        """
+        today = timezone.now().date()
+        queryset = DailyCheckIn.objects.filter(user=user)
+        if fields is not None:
+            queryset = queryset.only('check_in_date', 'streak_day', *fields)
+        recent = list(queryset[:CheckInService.HISTORY_LENGTH])
+
+        last_checkin = recent[0] if recent else None
+        today_checkin = last_checkin if last_checkin and last_checkin.check_in_date == today else None
+
+        # The streak survives until a full day is missed
+        current_streak = 0
+        if last_checkin:
+            if last_checkin.check_in_date == today or \
+               last_checkin.check_in_date == today - timedelta(days=1):
+                current_streak = last_checkin.streak_day
+
+        return {
+            'checked_in_today': today_checkin is not None,
+            'current_streak': current_streak,
+            'today_checkin': today_checkin,
+            'recent_checkins': recent,
+        }
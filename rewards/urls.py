@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import CheckInView
+from .views import CheckInView, XPHistoryView
 
 app_name = 'rewards'
 
 urlpatterns = [
     path('check-in/', CheckInView.as_view(), name='check-in'),
+    path('xp/history/', XPHistoryView.as_view(), name='xp-history'),
 ]
\ No newline at end of file
@@ -2,11 +2,16 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
+from django.db.models import DateField, Sum
+from django.db.models.functions import TruncDate, TruncWeek
 from django.utils import timezone
 from datetime import timedelta
-from .models import DailyCheckIn
+from feed.services import FeedService
+from users.fieldsets import FieldSelection, InvalidFieldSelection
+from .models import DailyCheckIn, XPTransaction
 from .serializers import DailyCheckInSerializer
-from users.models import UserProfile
+from .services import CheckInService, XPService
 
 class CheckInView(APIView):
     """
@@ -16,6 +21,8 @@ class CheckInView(APIView):
     - **Streak Tracking**: Tracks consecutive days checked in.
     - **Reset**: If a day is missed, streak resets to 1.
     - **Rewards**: XP increases with higher streaks (up to day 7).
+    - **Sparse fieldsets**: `?fields=` narrows the returned check-in objects
+      (e.g. `fields=check_in_date,streak_day`).
     """
     permission_classes = [IsAuthenticated]
     
@@ -32,6 +39,11 @@ class CheckInView(APIView):
     
     def post(self, request):
         """Process a daily check-in."""
+        try:
+            selection = FieldSelection.from_request(request, DailyCheckInSerializer)
+        except InvalidFieldSelection as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         user = request.user
         today = timezone.now().date()
         
@@ -44,7 +56,7 @@ class CheckInView(APIView):
         if existing_checkin:
             return Response({
                 'error': 'Already checked in today',
-                'check_in': DailyCheckInSerializer(existing_checkin).data
+                'check_in': DailyCheckInSerializer(existing_checkin, selection=selection).data
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Get the last check-in
@@ -69,54 +81,91 @@ class CheckInView(APIView):
         # Get XP reward for this streak day
         xp_reward = self.DAILY_REWARDS.get(streak_day, 5)
         
-        # Create check-in record
-        checkin = DailyCheckIn.objects.create(
-            user=user,
-            streak_day=streak_day,
-            xp_earned=xp_reward
-        )
-        
-        # Update user's XP
-        profile = user.profile
-        profile.xp += xp_reward
-        profile.save()
+        with transaction.atomic():
+            # Create check-in record
+            checkin = DailyCheckIn.objects.create(
+                user=user,
+                streak_day=streak_day,
+                xp_earned=xp_reward
+            )
+
+            # Update user's XP via the ledger (atomic increment, no full-row save)
+            total_xp = XPService.award(user, xp_reward, 'check_in', f'check_in:{checkin.id}')
+            FeedService.publish(user, 'check_in', data={'streak_day': streak_day, 'xp_earned': xp_reward})
         
         return Response({
             'message': f'Check-in successful! Day {streak_day} streak',
-            'check_in': DailyCheckInSerializer(checkin).data,
+            'check_in': DailyCheckInSerializer(checkin, selection=selection).data,
             'xp_earned': xp_reward,
-            'total_xp': profile.xp,
+            'total_xp': total_xp,
             'streak_day': streak_day
         }, status=status.HTTP_201_CREATED)
     
     def get(self, request):
         """Get user's check-in status and history."""
-        user = request.user
-        today = timezone.now().date()
-        
-        # Check today's check-in
-        today_checkin = DailyCheckIn.objects.filter(
-            user=user,
-            check_in_date=today
-        ).first()
-        
-        # Get last check-in for streak calculation
-        last_checkin = DailyCheckIn.objects.filter(user=user).first()
-        
-        # Calculate current streak
-        current_streak = 0
-        if last_checkin:
-            if last_checkin.check_in_date == today or \
-               last_checkin.check_in_date == today - timedelta(days=1):
-                current_streak = last_checkin.streak_day
-        
-        # Get recent check-ins (last 7 days)
-        recent_checkins = DailyCheckIn.objects.filter(user=user)[:7]
+        try:
+            selection = FieldSelection.from_request(request, DailyCheckInSerializer)
+        except InvalidFieldSelection as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(self.status_payload(request.user, selection))
+
+    @classmethod
+    def status_payload(cls, user, selection=None):
+        """Check-in status and history as returned by GET (also used by bootstrap)."""
+        # Only the columns the (possibly narrowed) serializer reads are loaded
+        columns = list(DailyCheckInSerializer(selection=selection).fields)
+        checkins = CheckInService.status(user, fields=columns)
+        today_checkin = checkins['today_checkin']
         
+        return {
+            'checked_in_today': checkins['checked_in_today'],
+            'current_streak': checkins['current_streak'],
+            'today_checkin': DailyCheckInSerializer(today_checkin, selection=selection).data if today_checkin else None,
+            'recent_checkins': DailyCheckInSerializer(checkins['recent_checkins'], many=True, selection=selection).data,
+            'daily_rewards': cls.DAILY_REWARDS
+        }
+
+
+class XPHistoryView(APIView):
+    """
+    XP earned per day or week, aggregated from the XP ledger.
+
+    Query params:
+    - `period`: `day` (default) or `week`.
+    - `days`: How far back to look (default 30, max 365).
+    """
+    permission_classes = [IsAuthenticated]
+
+    PERIODS = {
+        'day': TruncDate,
+        'week': TruncWeek,
+    }
+
+    def get(self, request):
+        period = request.query_params.get('period', 'day')
+        if period not in self.PERIODS:
+            return Response({'error': 'Invalid period'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            days = max(1, min(int(request.query_params.get('days', 30)), 365))
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        since = timezone.now() - timedelta(days=days)
+        buckets = (
+            XPTransaction.objects
+            .filter(user=request.user, created_at__gte=since)
+            .annotate(bucket=self.PERIODS[period]('created_at', output_field=DateField()))
+            .order_by('bucket')
+            .values('bucket')
+            .annotate(xp=Sum('amount'))
+        )
+
         return Response({
-            'checked_in_today': today_checkin is not None,
-            'current_streak': current_streak,
-            'today_checkin': DailyCheckInSerializer(today_checkin).data if today_checkin else None,
-            'recent_checkins': DailyCheckInSerializer(recent_checkins, many=True).data,
-            'daily_rewards': self.DAILY_REWARDS
-        })
\ No newline at end of file
+            'period': period,
+            'results': [
+                {'period': row['bucket'].isoformat(), 'xp': row['xp']}
+                for row in buckets
+            ]
+        })
@@ -1,15 +1,40 @@
 from django.contrib import admin
-from .models import UserProfile, UserFollow
+from .models import UserProfile, UserFollow, MediaObject, PlatformStatsSnapshot
+from .search import normalize
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'provider', 'provider_id', 'created_at']
     list_filter = ['provider', 'created_at']
-    search_fields = ['user__username', 'user__email', 'provider_id']
-    readonly_fields = ['created_at', 'updated_at']
+    # `search_key` covers username, names and linked handles (see get_search_results);
+    # emails keep partial matching (e.g. by domain)
+    search_fields = ['user__email', '=provider_id']
+    readonly_fields = ['created_at', 'updated_at', 'followers_count', 'following_count', 'search_key']
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            # Lowercased substring match on the indexed key instead of icontains across joins
+            results |= queryset.filter(search_key__contains=normalize(search_term))
+        return results, may_have_duplicates
 
 @admin.register(UserFollow)
 class UserFollowAdmin(admin.ModelAdmin):
     list_display = ['follower', 'following', 'created_at']
     list_filter = ['created_at']
     search_fields = ['follower__username', 'following__username']
+
+@admin.register(MediaObject)
+class MediaObjectAdmin(admin.ModelAdmin):
+    list_display = ['path', 'kind', 'variant', 'bytes', 'created_at']
+    list_filter = ['kind', 'created_at']
+    search_fields = ['path', 'sha256']
+    readonly_fields = ['created_at']
+
+
+@admin.register(PlatformStatsSnapshot)
+class PlatformStatsSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['user', 'platform', 'handle', 'status', 'fetched_at', 'next_refresh_at']
+    list_filter = ['platform', 'status']
+    search_fields = ['handle', 'user__username']
+    readonly_fields = ['stats', 'etag', 'fetched_at']
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+
+from .serializers import UserRowSerializer
+
+# Payloads are keyed by user id so follow/profile signals can invalidate
+# without resolving usernames; a small username -> id entry fronts them.
+PROFILE_KEY = 'profile:public:{user_id}'
+USERNAME_KEY = 'profile:username:{username}'
+
+
+def get_public_profile(username):
+    """
+    Return the viewer-independent public profile payload for `username`.
+
+    Served from cache when possible; on a miss, builds it with one joined
+    query plus one for platform stats snapshots, and caches it for
+    PROFILE_CACHE_TIMEOUT seconds.
+
+    Raises:
+        User.DoesNotExist: If no user has this username.
+    """
+    from .platforms import snapshot_payload
+
+    user_id = cache.get(USERNAME_KEY.format(username=username))
+    if user_id is not None:
+        data = cache.get(PROFILE_KEY.format(user_id=user_id))
+        # A rename leaves the old username pointing at a payload for the new one
+        if data is not None and data['username'] == username:
+            return data
+
+    row = UserRowSerializer.rows(User.objects.filter(username=username)).first()
+    if row is None:
+        raise User.DoesNotExist(username)
+    data = UserRowSerializer.serialize(row)
+    # Linked-platform stats come from stored snapshots, never from the platforms
+    data['platform_stats'] = snapshot_payload(data['id'])
+    cache.set_many(
+        {
+            USERNAME_KEY.format(username=username): data['id'],
+            PROFILE_KEY.format(user_id=data['id']): data,
+        },
+        settings.PROFILE_CACHE_TIMEOUT,
+    )
+    return dict(data)
+
+
+def invalidate_profile(*user_ids):
+    """
+    Drop cached public profiles once the current transaction commits.
+
+    Deferring to commit stops a concurrent reader from re-caching the
+    pre-change row between our write and the commit.
+    """
+    keys = [PROFILE_KEY.format(user_id=user_id) for user_id in user_ids if user_id]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,51 @@
+import hashlib
+
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    """
+    Build a weak ETag from version parts (ids, timestamps, counters).
+
+    Versions are cheap to read, so a request can be answered with 304 before
+    anything is serialized.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/{quote_etag(digest)}'
+
+
+def _opaque(etag):
+    # If-None-Match uses weak comparison: W/"x" and "x" match
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def etag_matches(request, etag):
+    """True if the request's If-None-Match covers `etag`."""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    if '*' in candidates:
+        return True
+    return _opaque(etag) in {_opaque(candidate) for candidate in candidates}
+
+
+def conditional_response(request, etag, build, vary_on_auth=False):
+    """
+    Return 304 if the client already has `etag`; otherwise call `build()`
+    for the full response. Either way the ETag is attached and clients are
+    told to revalidate before reusing their copy.
+    """
+    if etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = build()
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    if vary_on_auth:
+        # Payload depends on who is asking (e.g. `is_following`)
+        patch_vary_headers(response, ['Authorization'])
+    return response
@@ -0,0 +1,61 @@
+from chat.exports import EXPORT_CHUNK_SIZE
+
+USER_EXPORT_FIELDS = [
+    'id',
+    'username',
+    'email',
+    'first_name',
+    'last_name',
+    'is_active',
+    'is_staff',
+    'is_superuser',
+    'date_joined',
+    'provider',
+    'xp',
+    'followers_count',
+    'following_count',
+    'referral_code',
+]
+
+
+def iter_user_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield flat user rows with profile columns joined in the same query.
+
+    Reads through a server-side cursor so exporting the whole user table
+    uses constant memory.
+    """
+    rows = queryset.order_by('id').values(
+        'id',
+        'username',
+        'email',
+        'first_name',
+        'last_name',
+        'is_active',
+        'is_staff',
+        'is_superuser',
+        'date_joined',
+        'profile__provider',
+        'profile__xp',
+        'profile__followers_count',
+        'profile__following_count',
+        'profile__referral_code',
+    ).iterator(chunk_size=chunk_size)
+
+    for row in rows:
+        yield {
+            'id': row['id'],
+            'username': row['username'],
+            'email': row['email'],
+            'first_name': row['first_name'],
+            'last_name': row['last_name'],
+            'is_active': row['is_active'],
+            'is_staff': row['is_staff'],
+            'is_superuser': row['is_superuser'],
+            'date_joined': row['date_joined'].isoformat(),
+            'provider': row['profile__provider'],
+            'xp': row['profile__xp'],
+            'followers_count': row['profile__followers_count'],
+            'following_count': row['profile__following_count'],
+            'referral_code': row['profile__referral_code'],
+        }
@@ -0,0 +1,144 @@
+"""
+Sparse fieldsets: `?fields=` / `?expand=` on user, profile and check-in payloads.
+
+- `fields=id,username,profile.avatar_url` keeps only the listed fields;
+  a dotted name selects inside a nested object, and naming the object
+  alone (`profile`) keeps all of it. Without `fields` the default payload
+  is returned unchanged.
+- `expand=rank` adds opt-in fields that are left out (and not computed)
+  by default.
+
+Serializers drop unrequested fields before serializing, so their getters
+and the queries behind them never run.
+"""
+
+
+class InvalidFieldSelection(ValueError):
+    """Raised when `fields`/`expand` names something the payload doesn't have."""
+
+
+def _parse_paths(value):
+    """'a,b.c,b.d' -> {'a': None, 'b': {'c': None, 'd': None}}; None means 'all of it'."""
+    tree = {}
+    for path in value.split(','):
+        parts = [part for part in path.strip().split('.') if part]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                # Already selected whole; a sub-selection can't narrow it
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree
+
+
+class FieldSelection:
+    """A parsed `fields`/`expand` selection for one (possibly nested) object."""
+
+    def __init__(self, fields=None, expand=None):
+        # None selects every default field
+        self.fields = fields or None
+        self.expand = expand or {}
+
+    @classmethod
+    def parse(cls, fields=None, expand=None):
+        return cls(_parse_paths(fields) if fields else None, _parse_paths(expand) if expand else None)
+
+    @classmethod
+    def from_request(cls, request, serializer_class, extra=()):
+        """
+        Parse `?fields=`/`?expand=` and validate them against `serializer_class`.
+
+        `extra` names top-level keys a view adds itself (e.g. `is_following`).
+
+        Raises:
+            InvalidFieldSelection: On unknown field names.
+        """
+        selection = cls.parse(request.query_params.get('fields'), request.query_params.get('expand'))
+        selection.validate(serializer_class, extra)
+        return selection
+
+    @property
+    def is_default(self):
+        return self.fields is None and not self.expand
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expanded(self, name):
+        return name in self.expand or (self.fields is not None and name in self.fields)
+
+    def nested(self, name):
+        """Selection for the nested object under `name`."""
+        return FieldSelection(
+            self.fields.get(name) if self.fields is not None else None,
+            self.expand.get(name),
+        )
+
+    def validate(self, serializer_class, extra=()):
+        unknown = []
+        self._collect_unknown(serializer_class, set(extra), '', unknown)
+        if unknown:
+            raise InvalidFieldSelection(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    def _collect_unknown(self, serializer_class, extra, prefix, unknown):
+        known = set(serializer_class().fields) | extra
+        nested = getattr(serializer_class, 'nested_serializers', {})
+        expandable = set(getattr(serializer_class, 'expandable_fields', {}))
+
+        for name, children in (self.fields or {}).items():
+            if name not in known and name not in expandable:
+                unknown.append(prefix + name)
+            elif children and name not in nested:
+                unknown.extend(f'{prefix}{name}.{child}' for child in children)
+        for name, children in self.expand.items():
+            if name in nested:
+                continue
+            if name not in expandable or children:
+                unknown.append(prefix + name)
+        for name, child_class in nested.items():
+            self.nested(name)._collect_unknown(child_class, set(), f'{prefix}{name}.', unknown)
+
+    def project(self, data):
+        """Apply the selection to an already-built payload (e.g. a cached one)."""
+        if self.fields is None:
+            return data
+        projected = {}
+        for name, value in data.items():
+            if name in self.fields:
+                if self.fields[name] and isinstance(value, dict):
+                    value = self.nested(name).project(value)
+            elif name not in self.expand:
+                continue
+            projected[name] = value
+        return projected
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin applying a FieldSelection passed as `selection=`.
+
+    Subclasses may declare:
+    - `expandable_fields`: name -> factory returning a serializer field,
+      only added when expanded.
+    - `nested_serializers`: name -> serializer class of a nested object, so
+      dotted selections can be validated and passed down.
+    """
+    expandable_fields = {}
+    nested_serializers = {}
+
+    def __init__(self, *args, selection=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.selection = selection or FieldSelection()
+        if self.selection.is_default:
+            return
+        for name, factory in self.expandable_fields.items():
+            if self.selection.expanded(name):
+                self.fields[name] = factory()
+        if self.selection.fields is not None:
+            for name in list(self.fields):
+                if not self.selection.includes(name) and not self.selection.expanded(name):
+                    self.fields.pop(name)
@@ -0,0 +1,133 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.functions import Lower
+from requests.adapters import HTTPAdapter
+
+from .cache import invalidate_profile
+from .models import UserProfile, UserFollow
+from .services import FollowService
+from .suggestions import follow_suggestions
+
+# GitHub's maximum page size for list endpoints
+PAGE_SIZE = 100
+# Logins matched per `IN (...)` query
+MATCH_CHUNK_SIZE = 1000
+
+# Latest import state per user: {'status': queued|running|done|failed, ...}
+IMPORT_STATUS_KEY = 'github:import:{user_id}'
+IMPORT_STATUS_TIMEOUT = 60 * 60 * 24
+
+_LAST_PAGE = re.compile(r'[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+
+class GitHubImportError(Exception):
+    """Raised when the following list can't be fetched from GitHub."""
+
+
+def get_import_status(user_id):
+    return cache.get(IMPORT_STATUS_KEY.format(user_id=user_id))
+
+
+def set_import_status(user_id, status, **details):
+    cache.set(IMPORT_STATUS_KEY.format(user_id=user_id), {'status': status, **details}, IMPORT_STATUS_TIMEOUT)
+
+
+def _get_page(session, page):
+    try:
+        response = session.get(
+            f"{settings.GITHUB_API_URL}/user/following",
+            params={'per_page': PAGE_SIZE, 'page': page},
+            timeout=settings.GITHUB_API_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        raise GitHubImportError(f'GitHub request failed: {e}') from e
+    if response.status_code != 200:
+        raise GitHubImportError(f'GitHub returned {response.status_code} for page {page}')
+    return response
+
+
+def fetch_following(access_token):
+    """
+    Return the logins `access_token`'s user follows on GitHub.
+
+    The first page's `Link` header gives the page count; the remaining pages
+    are then fetched concurrently (GITHUB_IMPORT_CONCURRENCY at a time),
+    capped at GITHUB_IMPORT_MAX_PAGES.
+
+    Raises:
+        GitHubImportError: On a network error or non-200 response.
+    """
+    concurrency = settings.GITHUB_IMPORT_CONCURRENCY
+    with requests.Session() as session:
+        session.headers.update({
+            'Authorization': f'Bearer {access_token}',
+            'Accept': 'application/vnd.github+json',
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        first = _get_page(session, 1)
+        match = _LAST_PAGE.search(first.headers.get('Link', ''))
+        last_page = min(int(match.group(1)) if match else 1, settings.GITHUB_IMPORT_MAX_PAGES)
+
+        pages = [first.json()]
+        if last_page > 1:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                responses = pool.map(lambda page: _get_page(session, page), range(2, last_page + 1))
+                pages.extend(response.json() for response in responses)
+
+    return {account['login'] for page in pages for account in page if account.get('login')}
+
+
+def follow_github_accounts(user_id, logins):
+    """
+    Follow every user whose `github_username` is in `logins`.
+
+    Matching is case-insensitive and done in bulk (one query per
+    MATCH_CHUNK_SIZE logins, on the lower(github_username) index). Follows
+    are inserted with one `bulk_create`, which skips the UserFollow signals,
+    so counters, caches and the suggestion graph are updated here instead.
+
+    Returns:
+        int: Number of new follows.
+    """
+    lowered = sorted({login.lower() for login in logins})
+    matched = set()
+    for start in range(0, len(lowered), MATCH_CHUNK_SIZE):
+        matched.update(
+            UserProfile.objects.annotate(github_login=Lower('github_username'))
+            .filter(github_login__in=lowered[start:start + MATCH_CHUNK_SIZE], user__is_active=True)
+            .exclude(user_id=user_id)
+            .values_list('user_id', flat=True)
+        )
+    if not matched:
+        return 0
+
+    with transaction.atomic():
+        existing = set(
+            UserFollow.objects.filter(follower_id=user_id, following_id__in=matched)
+            .values_list('following_id', flat=True)
+        )
+        new_ids = sorted(matched - existing)
+        # ignore_conflicts covers a follow made by hand while the import ran
+        UserFollow.objects.bulk_create(
+            [UserFollow(follower_id=user_id, following_id=following_id) for following_id in new_ids],
+            batch_size=MATCH_CHUNK_SIZE,
+            ignore_conflicts=True,
+        )
+        FollowService.recount([user_id, *new_ids])
+        invalidate_profile(user_id, *new_ids)
+
+        def record_edges():
+            for following_id in new_ids:
+                follow_suggestions.record_follow(user_id, following_id)
+
+        transaction.on_commit(record_edges)
+
+    return len(new_ids)
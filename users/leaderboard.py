@@ -0,0 +1,258 @@
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from math import isqrt
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, connections, transaction
+from django.db.models import Count, Q
+
+from auth.models import AccountDeletionJob
+from .models import UserProfile, UserFollow
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_SCOPES = ('global', 'following')
+
+
+class XPRankIndex:
+    """
+    Fenwick (binary indexed) tree over distinct XP values holding user counts.
+
+    XP values are coordinate-compressed: slot i counts the users holding the
+    i-th smallest XP seen, so memory is O(distinct XP values) however large
+    XP gets. Values not yet in the tree are kept in a small sorted overflow
+    and merged in with one linear rebuild once it outgrows MERGE_THRESHOLD
+    (or the square root of the slot count, so merges stay amortized on
+    sparse, very large XP ranges).
+
+    Supports O(log n) point updates and "how many users have more XP than x"
+    queries, which is all a rank/percentile lookup needs.
+    """
+
+    MERGE_THRESHOLD = 256
+
+    def __init__(self):
+        self._values = []                # distinct XP per slot, ascending
+        self._counts = array('q')
+        self._tree = array('q', [0])
+        self._overflow = {}              # xp -> user count, for XP not in _values
+        self._overflow_values = []       # keys of _overflow, ascending
+        self.total = 0
+
+    @property
+    def size(self):
+        """Number of distinct XP values tracked."""
+        return len(self._values) + len(self._overflow)
+
+    def _build(self):
+        # Linear-time Fenwick construction from the raw counts
+        size = len(self._counts)
+        tree = array('q', [0]) * (size + 1)
+        for i, count in enumerate(self._counts, start=1):
+            tree[i] += count
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _merge(self):
+        histogram = dict(zip(self._values, self._counts))
+        histogram.update(self._overflow)
+        self.load(histogram.items())
+
+    def load(self, histogram):
+        """Replace contents with `(xp, user_count)` pairs."""
+        counts = {}
+        for xp, count in histogram:
+            xp = max(xp, 0)
+            counts[xp] = counts.get(xp, 0) + count
+        self._values = sorted(xp for xp, count in counts.items() if count)
+        self._counts = array('q', (counts[xp] for xp in self._values))
+        self._overflow = {}
+        self._overflow_values = []
+        self.total = sum(self._counts)
+        self._build()
+
+    def add(self, xp, delta):
+        xp = max(xp, 0)
+        self.total += delta
+        slot = bisect_left(self._values, xp)
+        if slot < len(self._values) and self._values[slot] == xp:
+            self._counts[slot] += delta
+            i = slot + 1
+            while i < len(self._tree):
+                self._tree[i] += delta
+                i += i & -i
+            return
+        if xp not in self._overflow:
+            insort(self._overflow_values, xp)
+            self._overflow[xp] = 0
+        self._overflow[xp] += delta
+        if len(self._overflow) > max(self.MERGE_THRESHOLD, isqrt(len(self._values))):
+            self._merge()
+
+    def count_at_most(self, xp):
+        """Number of users with XP <= `xp`."""
+        if xp < 0:
+            return 0
+        i = bisect_right(self._values, xp)
+        result = 0
+        while i > 0:
+            result += self._tree[i]
+            i -= i & -i
+        for value in self._overflow_values[:bisect_right(self._overflow_values, xp)]:
+            result += self._overflow[value]
+        return result
+
+    def count_above(self, xp):
+        return self.total - self.count_at_most(xp)
+
+
+class Leaderboard:
+    """
+    Process-wide XP ranking of active users (see `ranked_profiles`).
+
+    Built from one `GROUP BY xp` aggregate, then updated incrementally as
+    XP changes and users are blocked or unblocked. Because each worker
+    process holds its own copy, it is also rebuilt every
+    LEADERBOARD_REFRESH_SECONDS to pick up changes made by other processes.
+    Only the first build blocks a request; later ones run in a background
+    thread, one at a time, while the current index keeps serving.
+
+    Changes recorded while a rebuild runs may or may not be in its snapshot
+    already, so they are replayed by absolute value: each touched user's
+    XP as the snapshot saw it (read in the same transaction) is swapped for
+    their latest XP. Replaying a change twice is then harmless.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._index = XPRankIndex()
+        self._built_at = None
+        self._replay = None     # user id -> latest XP (None: unranked) while a rebuild runs
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    def rebuild(self):
+        with self._rebuild_lock:
+            return self._rebuild()
+
+    def _rebuild(self):
+        with self._lock:
+            self._replay = {}
+        try:
+            outermost = not connection.in_atomic_block
+            with transaction.atomic():
+                if outermost and connection.vendor == 'postgresql':
+                    # One snapshot for the histogram and the replayed users' XP
+                    with connection.cursor() as cursor:
+                        cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+                profiles = ranked_profiles()
+                index = XPRankIndex()
+                index.load(profiles.order_by().values_list('xp').annotate(users=Count('id')))
+
+                snapshot = {}   # user id -> XP in the snapshot (None: not in it)
+                while True:
+                    with self._lock:
+                        unseen = [user_id for user_id in self._replay if user_id not in snapshot]
+                        if not unseen:
+                            for user_id, xp in self._replay.items():
+                                if snapshot[user_id] is not None:
+                                    index.add(snapshot[user_id], -1)
+                                if xp is not None:
+                                    index.add(xp, 1)
+                            self._index = index
+                            self._built_at = time.monotonic()
+                            return index
+                    snapshot.update(dict.fromkeys(unseen))
+                    snapshot.update(profiles.filter(user_id__in=unseen).values_list('user_id', 'xp'))
+        finally:
+            with self._lock:
+                self._replay = None
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("Leaderboard rebuild failed")
+        finally:
+            connections.close_all()
+
+    def ensure_fresh(self):
+        if not self.is_built:
+            with self._rebuild_lock:
+                if not self.is_built:
+                    self._rebuild()
+            return
+        max_age = getattr(settings, 'LEADERBOARD_REFRESH_SECONDS', 300)
+        if time.monotonic() - self._built_at > max_age and not self._rebuild_lock.locked():
+            threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    def record(self, user_id, old_xp=None, new_xp=None):
+        """
+        Apply a committed change to a ranked user. Pass only `new_xp` when
+        the user joins the ranking (new or unblocked) and only `old_xp` when
+        they leave it. No-op until the index is first built.
+        """
+        self.record_many([(user_id, old_xp, new_xp)])
+
+    def record_many(self, changes):
+        """Apply `(user_id, old_xp, new_xp)` changes, as `record` does."""
+        with self._lock:
+            for user_id, old_xp, new_xp in changes:
+                if self._replay is not None:
+                    self._replay[user_id] = new_xp
+                if not self.is_built:
+                    continue
+                if old_xp is not None:
+                    self._index.add(old_xp, -1)
+                if new_xp is not None:
+                    self._index.add(new_xp, 1)
+
+    def rank_of(self, xp):
+        """
+        Competition rank (ties share a rank) and percentile for an XP value.
+
+        Returns:
+            dict: {'rank', 'percentile', 'total'} where percentile is the
+            share of users at or below this XP.
+        """
+        self.ensure_fresh()
+        with self._lock:
+            index = self._index
+            total = max(index.total, 1)
+            return {
+                'rank': index.count_above(xp) + 1,
+                'percentile': round(100 * index.count_at_most(xp) / total, 2),
+                'total': index.total,
+            }
+
+
+leaderboard = Leaderboard()
+
+
+def ranked_profiles():
+    """Profiles on the leaderboard: active users whose account isn't being deleted."""
+    return UserProfile.objects.filter(user__is_active=True).exclude(user_id__in=AccountDeletionJob.deleting_user_ids())
+
+
+def is_ranked(user_id):
+    """Whether `user_id` belongs on the leaderboard (checked before their profile row is needed)."""
+    deleting = AccountDeletionJob.deleting_user_ids()
+    return User.objects.filter(id=user_id, is_active=True).exclude(id__in=deleting).exists()
+
+
+def leaderboard_queryset(user, scope):
+    """Ranked profiles competing in `scope`: everyone, or `user` plus the users they follow."""
+    profiles = ranked_profiles()
+    if scope == 'following':
+        followed = UserFollow.objects.filter(follower=user).values('following_id')
+        profiles = profiles.filter(Q(user_id__in=followed) | Q(user_id=user.id))
+    return profiles
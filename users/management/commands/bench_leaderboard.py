@@ -0,0 +1,54 @@
+import random
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from users.leaderboard import XPRankIndex
+
+
+class Command(BaseCommand):
+    help = "Benchmark the XP rank index on a synthetic population (no database access)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000)
+        parser.add_argument('--operations', type=int, default=100_000)
+        parser.add_argument('--max-xp', type=int, default=50_000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        users, ops, max_xp = options['users'], options['operations'], options['max_xp']
+
+        # Skewed distribution: most players have little XP, a few have a lot
+        xps = [min(int(rng.expovariate(1 / (max_xp / 10))), max_xp) for _ in range(users)]
+
+        started = time.perf_counter()
+        index = XPRankIndex()
+        index.load(Counter(xps).items())
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(ops):
+            i = rng.randrange(users)
+            old = xps[i]
+            xps[i] = old + rng.choice((5, 10, 15, 20, 25, 30, 35, 100))
+            index.add(old, -1)
+            index.add(xps[i], 1)
+        update = time.perf_counter() - started
+
+        probes = [xps[rng.randrange(users)] for _ in range(ops)]
+        started = time.perf_counter()
+        for xp in probes:
+            index.count_above(xp)
+        lookup = time.perf_counter() - started
+
+        # Spot-check against a brute-force count
+        sample = probes[0]
+        expected = sum(1 for xp in xps if xp > sample)
+        assert index.count_above(sample) == expected, "rank index disagrees with brute force"
+
+        self.stdout.write(f"users={users} operations={ops} distinct_xp={index.size}")
+        self.stdout.write(f"build:  {build * 1000:.1f} ms")
+        self.stdout.write(f"update: {update / ops * 1e6:.2f} us/op")
+        self.stdout.write(f"rank:   {lookup / ops * 1e6:.2f} us/op")
@@ -0,0 +1,67 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from users.models import UserProfile
+from users.serializers import UserRowSerializer, UserSerializer
+
+
+class Rollback(Exception):
+    """Raised to discard the synthetic users once the benchmark is done."""
+
+
+class Command(BaseCommand):
+    help = "Compare UserSerializer with the UserRowSerializer fast path on synthetic users (rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per serializer; the best is reported.')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['users'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, count, repeat):
+        users = User.objects.bulk_create(
+            [User(username=f'bench_{i}', first_name='Bench', email=f'bench_{i}@example.com') for i in range(count)]
+        )
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user, provider='github', provider_id=f'bench_{user.id}',
+                referral_code=f'B{user.id}', bio='Benchmark user', xp=user.id % 500,
+                referred_by=users[0] if i % 3 else None,
+            )
+            for i, user in enumerate(users)
+        ])
+        queryset = User.objects.filter(id__in=[user.id for user in users]).order_by('id')
+
+        def slow():
+            return UserSerializer(list(queryset.select_related('profile')), many=True).data
+
+        def fast():
+            return UserRowSerializer.serialize_many(UserRowSerializer.rows(queryset))
+
+        renderer = JSONRenderer()
+        if renderer.render(slow()) != renderer.render(fast()):
+            raise AssertionError('fast path output differs from UserSerializer')
+
+        results = {}
+        for name, func in (('UserSerializer', slow), ('UserRowSerializer', fast)):
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+            results[name] = min(timings)
+
+        self.stdout.write(f"users={count} (query + serialization, best of {repeat}); outputs byte-identical")
+        for name, seconds in results.items():
+            self.stdout.write(f"{name:18} {seconds * 1000:8.1f} ms  {seconds / count * 1e6:6.1f} us/user")
+        self.stdout.write(f"speed-up: {results['UserSerializer'] / results['UserRowSerializer']:.1f}x")
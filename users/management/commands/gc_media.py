@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from users.media import collect_garbage
+from users.tasks import collect_media_garbage
+
+
+class Command(BaseCommand):
+    help = "Delete stored profile images that no profile references any more."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-seconds',
+            type=int,
+            default=None,
+            help='Keep objects used within this many seconds (default: MEDIA_GC_GRACE_SECONDS).',
+        )
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Run the collection as a background task instead of inline.',
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            result = collect_media_garbage.enqueue()
+            self.stdout.write(self.style.SUCCESS(f"Enqueued media GC task {result.id}."))
+            return
+        removed = collect_garbage(options['grace_seconds'])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} unreferenced media objects."))
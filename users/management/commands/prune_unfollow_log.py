@@ -0,0 +1,19 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import UnfollowLog
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete UnfollowLog entries older than UNFOLLOW_LOG_RETENTION_DAYS. Follow graph "
+        "snapshots older than that are rebuilt instead of caught up. Run periodically (e.g. from cron)."
+    )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=settings.UNFOLLOW_LOG_RETENTION_DAYS)
+        deleted, _ = UnfollowLog.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} unfollow log entries."))
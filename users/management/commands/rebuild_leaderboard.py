@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.leaderboard import leaderboard
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the XP rank index from the database and report its size and build time. "
+        "Serving processes also rebuild on their own every LEADERBOARD_REFRESH_SECONDS."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        index = leaderboard.rebuild()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt leaderboard: {index.total} users, {index.size} distinct XP values, "
+            f"{elapsed * 1000:.1f} ms"
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from users.services import FollowService
+
+
+class Command(BaseCommand):
+    help = "Rebuild denormalized follower/following counters on UserProfile from UserFollow."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user-id',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Only rebuild these users (repeatable). Defaults to all profiles.',
+        )
+
+    def handle(self, *args, **options):
+        updated = FollowService.recount(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt follow counters for {updated} profiles."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from users.platforms import sync_due
+from users.tasks import sync_platform_stats
+
+
+class Command(BaseCommand):
+    help = "Refresh due GitHub/LeetCode stats snapshots. Run periodically (e.g. every few minutes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Most snapshots to refresh in this run (default: PLATFORM_STATS_BATCH_SIZE).',
+        )
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Run the sync as a background task instead of inline.',
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            result = sync_platform_stats.enqueue()
+            self.stdout.write(self.style.SUCCESS(f"Enqueued platform stats sync task {result.id}."))
+            return
+        counts = sync_due(options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Fetched {counts['fetched']} snapshots ({counts['changed']} changed, {counts['skipped']} skipped)."
+        ))
@@ -0,0 +1,165 @@
+import hashlib
+import io
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Kinds of profile image and the sizes rendered for each. Avatars are square
+# crops (side in px); banners keep their aspect ratio (width in px).
+IMAGE_KINDS = {
+    'avatar': {'field': 'avatar_url', 'variants_field': 'avatar_variants', 'sizes': (64, 128, 256), 'crop': True},
+    'banner': {'field': 'banner_url', 'variants_field': 'banner_variants', 'sizes': (640, 1280), 'crop': False},
+}
+IMAGE_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+OUTPUT_FORMAT = 'WEBP'
+OUTPUT_CONTENT_TYPE = 'image/webp'
+# Refuse decompression bombs before any pixel data is decoded
+MAX_IMAGE_PIXELS = 40_000_000
+# Content-addressed objects never change, so they can be cached for a year
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+# Bump when rendering changes, so new renditions get new (still immutable) paths
+RENDITION_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class InvalidImage(ValueError):
+    """Raised when a spooled upload is not an image we accept."""
+
+
+def spool_upload(upload):
+    """
+    Copy an uploaded file into the spool directory chunk by chunk.
+
+    Returns the spooled path, which the image processing task picks up. The
+    request never holds the whole file in memory.
+    """
+    os.makedirs(settings.MEDIA_SPOOL_DIR, exist_ok=True)
+    path = os.path.join(settings.MEDIA_SPOOL_DIR, uuid.uuid4().hex)
+    with open(path, 'wb') as fh:
+        for chunk in upload.chunks():
+            fh.write(chunk)
+    return path
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def media_path(kind, sha256, size):
+    """Storage path of one rendition of an upload: fixed by its content."""
+    return f"{kind}s/{sha256}_v{RENDITION_VERSION}_{size}.webp"
+
+
+def validate_image(path):
+    """
+    Check a spooled upload's format, dimensions and integrity without
+    decoding its pixels.
+
+    Raises:
+        InvalidImage: If it is not an image we accept.
+    """
+    try:
+        with Image.open(path) as probe:
+            if probe.format not in IMAGE_FORMATS:
+                raise InvalidImage(f'Unsupported image format: {probe.format}')
+            width, height = probe.size
+            if width * height > MAX_IMAGE_PIXELS:
+                raise InvalidImage('Image dimensions are too large')
+            probe.verify()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise InvalidImage(str(e)) from e
+
+
+def open_image(path):
+    """Open and validate a spooled image, returning a decoded RGB(A) Image."""
+    validate_image(path)
+    try:
+        # verify() leaves the image unusable, so decode from a fresh handle
+        with Image.open(path) as source:
+            image = ImageOps.exif_transpose(source)
+            return image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise InvalidImage(str(e)) from e
+
+
+def render_variants(image, kind):
+    """Yield (size, bytes) for every configured size of an image kind."""
+    spec = IMAGE_KINDS[kind]
+    for size in spec['sizes']:
+        if spec['crop']:
+            variant = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        else:
+            variant = image.copy()
+            variant.thumbnail((size, size * 4), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        variant.save(buffer, OUTPUT_FORMAT, quality=85, method=4)
+        yield size, buffer.getvalue()
+
+
+def collect_garbage(grace_seconds=None, batch_size=500):
+    """
+    Delete stored renditions that no profile points at any more.
+
+    Renditions of one upload are kept or dropped together: a group is live
+    while its largest rendition is some profile's avatar_url/banner_url.
+    Objects used within the grace period are never touched, which covers
+    uploads whose profile update has not landed yet. Returns the number of
+    objects removed.
+    """
+    from auth.storage import StorageService
+    from .models import MediaObject, UserProfile
+
+    if grace_seconds is None:
+        grace_seconds = settings.MEDIA_GC_GRACE_SECONDS
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+    removed = 0
+    last_id = 0
+
+    while True:
+        batch = list(
+            MediaObject.objects.filter(last_used_at__lt=cutoff, id__gt=last_id)
+            .order_by('id')
+            .values('id', 'kind', 'sha256', 'path')[:batch_size]
+        )
+        if not batch:
+            return removed
+        last_id = batch[-1]['id']
+
+        # Primary (largest) rendition URL of every group touched by this batch
+        groups = {(row['kind'], row['sha256']) for row in batch}
+        primaries = {}
+        group_filter = Q()
+        for kind, sha256 in groups:
+            group_filter |= Q(kind=kind, sha256=sha256)
+        for kind, sha256, variant, url in (
+            MediaObject.objects.filter(group_filter)
+            .order_by('variant')
+            .values_list('kind', 'sha256', 'variant', 'url')
+        ):
+            primaries[(kind, sha256)] = url
+
+        urls = set(primaries.values())
+        referenced = set(
+            UserProfile.objects.filter(avatar_url__in=urls).values_list('avatar_url', flat=True)
+        ) | set(
+            UserProfile.objects.filter(banner_url__in=urls).values_list('banner_url', flat=True)
+        )
+
+        dead = [row for row in batch if primaries.get((row['kind'], row['sha256'])) not in referenced]
+        if not dead:
+            continue
+
+        # Storage first: if it fails the rows survive and the next pass retries
+        StorageService.delete([row['path'] for row in dead])
+        MediaObject.objects.filter(id__in=[row['id'] for row in dead]).delete()
+        removed += len(dead)
@@ -0,0 +1,51 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:24
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_follow_counts(apps, schema_editor):
+    UserProfile = apps.get_model('users', 'UserProfile')
+    UserFollow = apps.get_model('users', 'UserFollow')
+
+    def counts(field):
+        return Coalesce(
+            Subquery(
+                UserFollow.objects
+                .filter(**{field: OuterRef('user_id')})
+                .order_by()
+                .values(field)
+                .annotate(total=Count('id'))
+                .values('total')
+            ),
+            Value(0),
+        )
+
+    UserProfile.objects.update(
+        followers_count=counts('following_id'),
+        following_count=counts('follower_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of users following this user.'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of users this user follows.'),
+        ),
+        migrations.RunPython(backfill_follow_counts, migrations.RunPython.noop),
+    ]
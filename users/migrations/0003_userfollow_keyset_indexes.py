@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_userprofile_follow_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userfollow',
+            index=models.Index(fields=['following', 'created_at', 'id'], name='users_userf_followi_bf5cbb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userfollow',
+            index=models.Index(fields=['follower', 'created_at', 'id'], name='users_userf_followe_0ac665_idx'),
+        ),
+    ]
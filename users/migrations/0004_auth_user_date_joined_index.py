@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:26
+
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_userfollow_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # auth_user belongs to django.contrib.auth, so the index backing the admin
+    # user list's (date_joined, id) keyset pagination is created with raw SQL.
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS users_auth_user_joined_id_idx ON auth_user (date_joined, id);',
+            reverse_sql='DROP INDEX IF EXISTS users_auth_user_joined_id_idx;',
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_auth_user_date_joined_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['-xp', 'id'], name='users_profile_xp_rank_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_userprofile_xp_rank_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar_variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Resized avatar URLs keyed by pixel size.'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='banner_variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Resized banner URLs keyed by pixel width.'),
+        ),
+    ]
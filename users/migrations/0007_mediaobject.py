@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:39
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_userprofile_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaObject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('avatar', 'Avatar'), ('banner', 'Banner')], max_length=10)),
+                ('sha256', models.CharField(help_text='Digest of the original upload.', max_length=64)),
+                ('variant', models.PositiveIntegerField(help_text='Rendered size in pixels.')),
+                ('path', models.CharField(max_length=255, unique=True)),
+                ('url', models.URLField(max_length=500)),
+                ('content_type', models.CharField(max_length=50)),
+                ('bytes', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'sha256'], name='users_media_kind_9ef70f_idx'), models.Index(fields=['last_used_at', 'id'], name='users_media_last_us_6f1929_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_mediaobject'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='follow_version',
+            field=models.PositiveBigIntegerField(default=0, help_text='Follow-graph change counter.'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:45
+
+import re
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def backfill_search_keys(apps, schema_editor):
+    # Same normalisation as users.search.build_search_key, frozen here
+    UserProfile = apps.get_model('users', 'UserProfile')
+    whitespace = re.compile(r'\s+')
+
+    batch = []
+    rows = UserProfile.objects.values_list(
+        'id', 'user__username', 'user__first_name', 'user__last_name', 'github_username', 'leetcode_username'
+    )
+    for profile_id, *parts in rows.iterator(chunk_size=BATCH_SIZE):
+        key = whitespace.sub(' ', ' '.join(part for part in parts if part).strip().lower())
+        batch.append(UserProfile(id=profile_id, search_key=key))
+        if len(batch) >= BATCH_SIZE:
+            UserProfile.objects.bulk_update(batch, ['search_key'])
+            batch = []
+    if batch:
+        UserProfile.objects.bulk_update(batch, ['search_key'])
+
+
+def create_trigram_index(apps, schema_editor):
+    # Substring and fuzzy matching need pg_trgm; other databases fall back to
+    # the plain B-tree index (prefix lookups) and scans for substrings.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm;')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS users_profile_search_trgm_idx '
+        'ON users_userprofile USING gin (search_key gin_trgm_ops);'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS users_profile_search_trgm_idx;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_userprofile_follow_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='search_key',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=600),
+        ),
+        migrations.RunPython(backfill_search_keys, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
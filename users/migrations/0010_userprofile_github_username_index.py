@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:54
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_userprofile_search_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(django.db.models.functions.text.Lower('github_username'), name='users_profile_github_idx'),
+        ),
+    ]
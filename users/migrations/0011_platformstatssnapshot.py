@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:56
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_userprofile_github_username_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformStatsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(choices=[('github', 'GitHub'), ('leetcode', 'LeetCode')], max_length=20)),
+                ('handle', models.CharField(max_length=100)),
+                ('stats', models.JSONField(blank=True, default=dict)),
+                ('etag', models.CharField(blank=True, default='', max_length=200)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('ok', 'OK'), ('not_found', 'Not found'), ('error', 'Error')], default='pending', max_length=20)),
+                ('failures', models.PositiveSmallIntegerField(default=0)),
+                ('fetched_at', models.DateTimeField(blank=True, null=True)),
+                ('next_refresh_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='platform_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['next_refresh_at', 'id'], name='users_platf_next_re_e34b6e_idx')],
+                'unique_together': {('user', 'platform')},
+            },
+        ),
+    ]
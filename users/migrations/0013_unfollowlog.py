@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-19 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_userprofile_help_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnfollowLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('follower_id', models.PositiveIntegerField()),
+                ('following_id', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
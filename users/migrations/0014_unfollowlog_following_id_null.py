@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 05:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_unfollowlog'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='unfollowlog',
+            name='following_id',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,7 +1,14 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.functions import Greatest, Lower
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
+
+# Fields feeding UserProfile.search_key, on each model
+SEARCH_USER_FIELDS = {'username', 'first_name', 'last_name'}
+SEARCH_PROFILE_FIELDS = {'github_username', 'leetcode_username'}
 
 
 class UserProfile(models.Model):
@@ -50,6 +57,8 @@ class UserProfile(models.Model):
     # Public Profile Visuals
     avatar_url = models.URLField(max_length=500, blank=True, null=True, help_text="URL to user's profile picture.")
     banner_url = models.URLField(max_length=500, blank=True, null=True, help_text="URL to profile background banner.")
+    avatar_variants = models.JSONField(default=dict, blank=True, help_text="Resized avatar URLs keyed by pixel size.")
+    banner_variants = models.JSONField(default=dict, blank=True, help_text="Resized banner URLs keyed by pixel width.")
     bio = models.TextField(max_length=500, blank=True, null=True, help_text="Short user biography.")
 
     # OAuth Tokens (Sensitive)
@@ -61,6 +70,10 @@ class UserProfile(models.Model):
     github_username = models.CharField(max_length=100, blank=True, null=True)
     leetcode_username = models.CharField(max_length=100, blank=True, null=True)
 
+    # Lowercased "username first last github leetcode", kept in sync on save.
+    # Backs user search (trigram-indexed on PostgreSQL).
+    search_key = models.CharField(max_length=600, blank=True, default='', db_index=True)
+
     # Gamification & Referrals
     xp = models.IntegerField(default=0, help_text="Total Experience Points earned.")
     referral_code = models.CharField(max_length=12, unique=True, blank=True, null=True, help_text="Unique code for inviting others.")
@@ -75,6 +88,15 @@ class UserProfile(models.Model):
         help_text="The user who referred this account."
     )
 
+    # Social Graph Counters
+    # Denormalized from UserFollow so serializing a user needs no COUNT queries.
+    # Kept in sync by the UserFollow signals below; `sync_follow_counts` rebuilds them.
+    followers_count = models.PositiveIntegerField(default=0, help_text="Number of users following this user.")
+    following_count = models.PositiveIntegerField(default=0, help_text="Number of users this user follows.")
+    # Bumped whenever a follow edge touching this user changes. `.update()` calls
+    # don't touch `updated_at`, so ETags combine both to detect any change.
+    follow_version = models.PositiveBigIntegerField(default=0, help_text="Follow-graph change counter.")
+
     # Metadata
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -84,26 +106,68 @@ class UserProfile(models.Model):
         unique_together = ['provider', 'provider_id']
         verbose_name = 'User Profile'
         verbose_name_plural = 'User Profiles'
+        indexes = [
+            # Leaderboard top-N is an index range scan
+            models.Index(fields=['-xp', 'id'], name='users_profile_xp_rank_idx'),
+            # Case-insensitive bulk matching of GitHub logins (following import)
+            models.Index(Lower('github_username'), name='users_profile_github_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored XP so saves can report the delta to the leaderboard
+        instance._loaded_xp = instance.xp if 'xp' in field_names else None
+        # ...and the stored search inputs, so saves only rebuild search_key when one changed
+        instance._loaded_search = {
+            field: instance.__dict__[field] for field in SEARCH_PROFILE_FIELDS if field in field_names
+        }
+        return instance
+
+    def _search_inputs_changed(self, update_fields):
+        if self._state.adding or not hasattr(self, '_loaded_search'):
+            return True
+        fields = SEARCH_PROFILE_FIELDS if update_fields is None else SEARCH_PROFILE_FIELDS.intersection(update_fields)
+        # Deferred fields that were never assigned aren't in __dict__ and can't have changed
+        loaded = self._loaded_search
+        return any(
+            field in self.__dict__ and (field not in loaded or self.__dict__[field] != loaded[field])
+            for field in fields
+        )
 
     def save(self, *args, **kwargs):
-        # Auto-generate unique referral code if missing
+        # Auto-generate referral code if missing.
+        # Derived from the user id with a keyed bijection, so it is unique without a lookup.
         if not self.referral_code:
-            import random
-            import string
-            while True:
-                code = ''.join(
-                    random.choices(string.ascii_uppercase + string.digits, k=8)
-                )
-                if not UserProfile.objects.filter(referral_code=code).exists():
-                    self.referral_code = code
-                    break
+            from .referrals import encode_referral_code
+            self.referral_code = encode_referral_code(self.user_id)
+
+        # Rebuild the search key only when one of its profile inputs changed; user
+        # renames are handled by the User post_save receiver, so other saves skip
+        # loading self.user
+        update_fields = kwargs.get('update_fields')
+        if self._search_inputs_changed(update_fields):
+            from .search import build_search_key
+            self.search_key = build_search_key(
+                self.user.username, self.user.first_name, self.user.last_name,
+                self.github_username, self.leetcode_username,
+            )
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'search_key'}
         super().save(*args, **kwargs)
+        self._loaded_search = {
+            field: self.__dict__[field] for field in SEARCH_PROFILE_FIELDS if field in self.__dict__
+        }
 
     def toggle_block(self):
         """Toggle the active status of the associated user."""
+        from .services import ModerationService
+
         # Soft block by disabling login access
-        self.user.is_active = not self.user.is_active
-        self.user.save()
+        # An unblock is refused (nothing changes) while the account is being deleted
+        is_active = not self.user.is_active
+        if ModerationService.set_active([self.user_id], is_active):
+            self.user.is_active = is_active
         return self.user.is_active
 
     def __str__(self):
@@ -138,12 +202,116 @@ class UserFollow(models.Model):
         # Optimize follower/following queries
         indexes = [
             models.Index(fields=['follower', 'following']),
+            # Keyset pagination of follower/following lists by (created_at, id)
+            models.Index(fields=['following', 'created_at', 'id']),
+            models.Index(fields=['follower', 'created_at', 'id']),
         ]
 
     def __str__(self):
         return f"{self.follower.username} follows {self.following.username}"
 
 
+class MediaObject(models.Model):
+    """
+    A stored rendition of an uploaded profile image.
+
+    Objects are content-addressed: the path is derived from the SHA-256 of the
+    uploaded bytes, so a given path never changes content and can be cached
+    forever. Rows not referenced by any profile are removed by the media GC.
+    """
+
+    KIND_CHOICES = [
+        ('avatar', 'Avatar'),
+        ('banner', 'Banner'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    sha256 = models.CharField(max_length=64, help_text="Digest of the original upload.")
+    variant = models.PositiveIntegerField(help_text="Rendered size in pixels.")
+    path = models.CharField(max_length=255, unique=True)
+    url = models.URLField(max_length=500)
+    content_type = models.CharField(max_length=50)
+    bytes = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Bumped whenever an upload resolves to this object; the GC grace period counts from here
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'sha256']),
+            models.Index(fields=['last_used_at', 'id']),
+        ]
+
+    def __str__(self):
+        return self.path
+
+
+class PlatformStatsSnapshot(models.Model):
+    """
+    Last-fetched public stats for a linked GitHub or LeetCode handle.
+
+    Written only by the background sync (see users.platforms); request paths
+    read snapshots and never call the platforms themselves. `etag` holds the
+    validator for the next conditional fetch and `next_refresh_at` when the
+    sync should look again.
+    """
+
+    PLATFORM_CHOICES = [
+        ('github', 'GitHub'),
+        ('leetcode', 'LeetCode'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('ok', 'OK'),
+        ('not_found', 'Not found'),
+        ('error', 'Error'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='platform_stats')
+    platform = models.CharField(max_length=20, choices=PLATFORM_CHOICES)
+    handle = models.CharField(max_length=100)
+    stats = models.JSONField(default=dict, blank=True)
+    etag = models.CharField(max_length=200, blank=True, default='')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Consecutive failed fetches; drives the retry backoff
+    failures = models.PositiveSmallIntegerField(default=0)
+    fetched_at = models.DateTimeField(null=True, blank=True)
+    next_refresh_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ['user', 'platform']
+        indexes = [
+            # The sync picks due snapshots with an index range scan
+            models.Index(fields=['next_refresh_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.platform}:{self.handle}"
+
+
+class UnfollowLog(models.Model):
+    """
+    Append-only record of deleted follows.
+
+    In-memory follow graphs in other processes replay it past their
+    watermark to drop unfollowed edges (scanning UserFollow by id only finds
+    new rows). Plain ids rather than foreign keys, so entries outlive
+    deleted users; `prune_unfollow_log` trims old entries.
+
+    An account deletion logs a single entry with no `following_id` (every
+    edge of `follower_id` is gone) instead of one per deleted follow.
+    """
+
+    follower_id = models.PositiveIntegerField()
+    following_id = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        if self.following_id is None:
+            return f"{self.follower_id} deleted"
+        return f"{self.follower_id} -/-> {self.following_id}"
+
+
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     # Automatically create profile when a user is created
@@ -154,3 +322,111 @@ def create_user_profile(sender, instance, created, **kwargs):
             provider_id=f"local_{instance.id}",
             bio="Administrator" if instance.is_superuser else "User"
         )
+
+
+@receiver(post_save, sender=UserFollow)
+def increment_follow_counts(sender, instance, created, **kwargs):
+    from .cache import invalidate_profile
+    from .suggestions import follow_suggestions
+
+    # Atomic in-database increments; safe under concurrent follows
+    if created:
+        UserProfile.objects.filter(user_id=instance.following_id).update(
+            followers_count=F('followers_count') + 1,
+            follow_version=F('follow_version') + 1,
+        )
+        UserProfile.objects.filter(user_id=instance.follower_id).update(
+            following_count=F('following_count') + 1,
+            follow_version=F('follow_version') + 1,
+        )
+        invalidate_profile(instance.follower_id, instance.following_id)
+        transaction.on_commit(
+            lambda: follow_suggestions.record_follow(instance.follower_id, instance.following_id)
+        )
+
+
+@receiver(post_delete, sender=UserFollow)
+def decrement_follow_counts(sender, instance, **kwargs):
+    from auth.models import AccountDeletionJob
+    from .cache import invalidate_profile
+    from .suggestions import follow_suggestions
+
+    # Guard against going negative if counters drifted before a reconcile
+    UserProfile.objects.filter(user_id=instance.following_id).update(
+        followers_count=Greatest(F('followers_count') - 1, 0),
+        follow_version=F('follow_version') + 1,
+    )
+    UserProfile.objects.filter(user_id=instance.follower_id).update(
+        following_count=Greatest(F('following_count') - 1, 0),
+        follow_version=F('follow_version') + 1,
+    )
+    # A deleting account's follows are logged once, when the deletion finishes
+    deleting = AccountDeletionJob.objects.filter(
+        user_id__in=[instance.follower_id, instance.following_id]
+    ).exclude(status='done')
+    if not deleting.exists():
+        UnfollowLog.objects.create(follower_id=instance.follower_id, following_id=instance.following_id)
+    invalidate_profile(instance.follower_id, instance.following_id)
+    transaction.on_commit(
+        lambda: follow_suggestions.record_unfollow(instance.follower_id, instance.following_id)
+    )
+
+
+@receiver(post_save, sender=UserProfile)
+def update_leaderboard_on_save(sender, instance, created, **kwargs):
+    from .leaderboard import is_ranked, leaderboard
+
+    old_xp = None if created else getattr(instance, '_loaded_xp', None)
+    if (created or (old_xp is not None and old_xp != instance.xp)) and is_ranked(instance.user_id):
+        # Only committed XP may reach the index (a rollback can't be undone there)
+        transaction.on_commit(
+            lambda user_id=instance.user_id, new_xp=instance.xp: leaderboard.record(user_id, old_xp, new_xp)
+        )
+    instance._loaded_xp = instance.xp
+
+
+@receiver(post_delete, sender=UserProfile)
+def update_leaderboard_on_delete(sender, instance, **kwargs):
+    from .leaderboard import is_ranked, leaderboard
+
+    if is_ranked(instance.user_id):
+        old_xp = getattr(instance, '_loaded_xp', instance.xp)
+        transaction.on_commit(lambda user_id=instance.user_id: leaderboard.record(user_id, old_xp=old_xp))
+
+
+@receiver(post_save, sender=User)
+def update_search_key(sender, instance, created, update_fields=None, **kwargs):
+    # New users get their key when the profile is created
+    if created or (update_fields is not None and not SEARCH_USER_FIELDS.intersection(update_fields)):
+        return
+    from .search import build_search_key
+
+    profile = UserProfile.objects.filter(user=instance).values(
+        'github_username', 'leetcode_username', 'search_key'
+    ).first()
+    if profile is None:
+        return
+    key = build_search_key(
+        instance.username, instance.first_name, instance.last_name,
+        profile['github_username'], profile['leetcode_username'],
+    )
+    if key != profile['search_key']:
+        # Also a visible change for ETags keyed on the profile (e.g. follow lists)
+        UserProfile.objects.filter(user=instance).update(search_key=key, updated_at=timezone.now())
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_profile_cache(sender, instance, **kwargs):
+    # Covers username/name changes, blocking and account deletion
+    from .cache import invalidate_profile
+
+    invalidate_profile(instance.id)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_cache(sender, instance, **kwargs):
+    from .cache import invalidate_profile
+
+    invalidate_profile(instance.user_id)
@@ -0,0 +1,81 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+# Defaults for keyset-paginated list endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client-supplied cursor cannot be decoded."""
+
+
+def encode_cursor(timestamp, pk):
+    """Opaque, URL-safe cursor for a (timestamp, id) position."""
+    raw = json.dumps([timestamp.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, pk = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), int(pk)
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+
+
+def get_page_size(request, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Read `?limit=` clamped to [1, maximum]; falls back to `default` when malformed."""
+    try:
+        limit = int(request.query_params.get('limit', default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
+
+
+def _value(row, key):
+    return row[key] if isinstance(row, dict) else getattr(row, key)
+
+
+def keyset_page(queryset, cursor=None, limit=DEFAULT_PAGE_SIZE, time_field='created_at', key_field='id'):
+    """
+    Fetch one page of `queryset`, newest first, keyed by (time_field, key_field).
+
+    Unlike OFFSET pagination, each page is a single bounded index range scan,
+    so page N costs the same as page 1.
+
+    Args:
+        queryset: Model or `values()` queryset.
+        cursor (str, optional): Value returned as `next_cursor` by the previous page.
+        limit (int): Page size.
+        time_field (str): Timestamp column forming the key with `key_field`.
+        key_field (str): Unique tie-breaker column (default `id`).
+
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page.
+
+    Raises:
+        InvalidCursor: If `cursor` is malformed.
+    """
+    queryset = queryset.order_by(f'-{time_field}', f'-{key_field}')
+
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        # (time_field, key_field) < (timestamp, pk), written so the time bound stays sargable
+        queryset = queryset.filter(**{f'{time_field}__lte': timestamp}).exclude(
+            Q(**{time_field: timestamp}) & Q(**{f'{key_field}__gte': pk})
+        )
+
+    # Fetch one extra row to learn whether another page exists
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(_value(last, time_field), _value(last, key_field))
+
+    return rows, next_cursor
@@ -0,0 +1,322 @@
+import hashlib
+import json
+import logging
+import random
+import time
+from datetime import timedelta
+from urllib.parse import quote
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from .cache import invalidate_profile
+from .models import PlatformStatsSnapshot, UserProfile
+
+logger = logging.getLogger(__name__)
+
+# Linked platform -> UserProfile field holding the handle
+PLATFORM_FIELDS = {
+    'github': 'github_username',
+    'leetcode': 'leetcode_username',
+}
+
+# Epoch seconds before which a rate-limited platform is not called again
+PAUSE_KEY = 'platform_stats:pause:{platform}'
+
+LEETCODE_QUERY = """
+query userStats($username: String!) {
+  matchedUser(username: $username) {
+    submitStatsGlobal { acSubmissionNum { difficulty count } }
+  }
+}
+"""
+
+
+class HandleNotFound(Exception):
+    """The platform has no account with this handle."""
+
+
+class RateLimited(Exception):
+    """The platform asked us to back off until `retry_at` (epoch seconds)."""
+
+    def __init__(self, retry_at):
+        super().__init__(f'Rate limited until {retry_at}')
+        self.retry_at = retry_at
+
+
+class PlatformError(Exception):
+    """Any other failed fetch (network error, unexpected response)."""
+
+
+def _retry_at(response):
+    """Epoch seconds to wait until, from Retry-After or GitHub's reset header."""
+    retry_after = response.headers.get('Retry-After')
+    if retry_after and retry_after.isdigit():
+        return time.time() + int(retry_after)
+    reset = response.headers.get('X-RateLimit-Reset')
+    if reset and reset.isdigit():
+        return int(reset)
+    return time.time() + 60
+
+
+def fetch_github(session, handle, etag):
+    """
+    Public profile counters of a GitHub user.
+
+    Sends If-None-Match, so an unchanged profile costs a 304 (which GitHub
+    doesn't count against the rate limit for authenticated requests).
+
+    Returns:
+        tuple: (stats, etag); stats is None when unchanged.
+    """
+    headers = {'Accept': 'application/vnd.github+json'}
+    if settings.GITHUB_STATS_TOKEN:
+        headers['Authorization'] = f'Bearer {settings.GITHUB_STATS_TOKEN}'
+    if etag:
+        headers['If-None-Match'] = etag
+    try:
+        response = session.get(
+            f"{settings.GITHUB_API_URL}/users/{quote(handle, safe='')}", headers=headers, timeout=settings.PLATFORM_STATS_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        raise PlatformError(str(e)) from e
+
+    if response.status_code in (403, 429) and (
+        response.headers.get('X-RateLimit-Remaining') == '0' or 'Retry-After' in response.headers
+    ):
+        raise RateLimited(_retry_at(response))
+    remaining = response.headers.get('X-RateLimit-Remaining')
+    if remaining and remaining.isdigit() and int(remaining) <= settings.GITHUB_RATE_LIMIT_RESERVE:
+        # Leave the rest of the quota to logins and imports
+        _pause('github', _retry_at(response))
+
+    if response.status_code == 304:
+        return None, etag
+    if response.status_code == 404:
+        raise HandleNotFound(handle)
+    if response.status_code != 200:
+        raise PlatformError(f'GitHub returned {response.status_code}')
+    try:
+        data = response.json()
+        stats = {name: data.get(name) for name in ('public_repos', 'public_gists', 'followers', 'following')}
+    except (ValueError, AttributeError) as e:
+        raise PlatformError(f'Unexpected GitHub response: {e}') from e
+    return stats, response.headers.get('ETag', '')
+
+
+def fetch_leetcode(session, handle, etag):
+    """
+    Accepted-submission counts of a LeetCode user, by difficulty.
+
+    LeetCode's GraphQL endpoint has no validators, so `etag` is a digest of
+    the last stats instead: an unchanged result is reported as such and
+    nothing is written.
+
+    Returns:
+        tuple: (stats, etag); stats is None when unchanged.
+    """
+    try:
+        response = session.post(
+            settings.LEETCODE_GRAPHQL_URL,
+            json={'query': LEETCODE_QUERY, 'variables': {'username': handle}},
+            timeout=settings.PLATFORM_STATS_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        raise PlatformError(str(e)) from e
+
+    if response.status_code == 429:
+        raise RateLimited(_retry_at(response))
+    if response.status_code != 200:
+        raise PlatformError(f'LeetCode returned {response.status_code}')
+    try:
+        user = (response.json().get('data') or {}).get('matchedUser')
+        if user is not None:
+            solved = {
+                row['difficulty'].lower(): row['count']
+                for row in user['submitStatsGlobal']['acSubmissionNum']
+            }
+    except (ValueError, AttributeError, KeyError, TypeError) as e:
+        raise PlatformError(f'Unexpected LeetCode response: {e!r}') from e
+    if user is None:
+        raise HandleNotFound(handle)
+
+    stats = {'solved': solved.pop('all', sum(solved.values())), **{f'solved_{k}': v for k, v in solved.items()}}
+    digest = hashlib.blake2b(json.dumps(stats, sort_keys=True).encode(), digest_size=12).hexdigest()
+    if digest == etag:
+        return None, etag
+    return stats, digest
+
+
+FETCHERS = {
+    'github': fetch_github,
+    'leetcode': fetch_leetcode,
+}
+
+
+def _pause(platform, retry_at):
+    cache.set(PAUSE_KEY.format(platform=platform), retry_at, max(int(retry_at - time.time()), 1))
+
+
+def _paused(platform):
+    retry_at = cache.get(PAUSE_KEY.format(platform=platform))
+    return retry_at is not None and retry_at > time.time()
+
+
+def _jittered(seconds):
+    """`seconds` give or take PLATFORM_STATS_JITTER, so refreshes don't bunch up."""
+    jitter = settings.PLATFORM_STATS_JITTER
+    return timedelta(seconds=seconds * random.uniform(1 - jitter, 1 + jitter))
+
+
+def reconcile(user_ids=None, spread_seconds=0):
+    """
+    Make snapshots match the handles on profiles.
+
+    Profiles with a handle that has no snapshot (or a snapshot of an older
+    handle) get a fresh pending one, due at a random point within
+    `spread_seconds` so a large backfill doesn't fire all at once; snapshots
+    of unlinked handles are deleted.
+
+    Returns:
+        int: Number of snapshots created or reset.
+    """
+    now = timezone.now()
+    changed = 0
+    for platform, field in PLATFORM_FIELDS.items():
+        profiles = UserProfile.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+        snapshots = PlatformStatsSnapshot.objects.filter(platform=platform)
+        if user_ids is not None:
+            profiles = profiles.filter(user_id__in=user_ids)
+            snapshots = snapshots.filter(user_id__in=user_ids)
+
+        current = PlatformStatsSnapshot.objects.filter(
+            user_id=OuterRef('user_id'), platform=platform, handle=OuterRef(field)
+        )
+        stale = [
+            PlatformStatsSnapshot(
+                user_id=user_id, platform=platform, handle=handle,
+                next_refresh_at=now + timedelta(seconds=random.uniform(0, spread_seconds)),
+            )
+            for user_id, handle in profiles.exclude(Exists(current)).values_list('user_id', field)
+        ]
+        PlatformStatsSnapshot.objects.bulk_create(
+            stale,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user', 'platform'],
+            update_fields=['handle', 'stats', 'etag', 'status', 'failures', 'fetched_at', 'next_refresh_at'],
+        )
+        changed += len(stale)
+
+        unlinked = snapshots.filter(
+            Q(**{f'user__profile__{field}__isnull': True}) | Q(**{f'user__profile__{field}': ''})
+        )
+        # Cached profiles embed platform_stats, so drop theirs too
+        unlinked_users = list(unlinked.values_list('user_id', flat=True))
+        if unlinked_users:
+            unlinked.delete()
+            invalidate_profile(*unlinked_users)
+    return changed
+
+
+def refresh_snapshot(session, snapshot):
+    """
+    Fetch one due snapshot and schedule its next refresh.
+
+    Only a changed result touches the profile (bumping `updated_at` and
+    dropping its cached payload); unchanged ones just move the schedule.
+
+    Any other failure of the fetch (including unexpected exceptions) backs
+    the snapshot off, so one bad response can't stall every later run.
+
+    Raises:
+        RateLimited: The platform wants us to stop; the snapshot is untouched.
+    """
+    now = timezone.now()
+    interval = settings.PLATFORM_STATS_REFRESH_SECONDS
+    updates = {'fetched_at': now, 'next_refresh_at': now + _jittered(interval)}
+    try:
+        stats, etag = FETCHERS[snapshot.platform](session, snapshot.handle, snapshot.etag)
+    except HandleNotFound:
+        # Only the transition to not_found changes what profiles show
+        stats, etag = ({} if snapshot.status != 'not_found' else None), ''
+        updates.update(status='not_found', failures=0)
+    except RateLimited:
+        raise
+    except Exception as e:
+        # Exponential backoff, never longer than the normal interval; the
+        # last good stats stay visible meanwhile
+        failures = snapshot.failures + 1
+        if isinstance(e, PlatformError):
+            logger.warning("Stats fetch failed for %s: %s", snapshot, e)
+        else:
+            logger.exception("Unexpected error fetching stats for %s", snapshot)
+        delay = min(settings.PLATFORM_STATS_RETRY_SECONDS * 2 ** (failures - 1), interval)
+        PlatformStatsSnapshot.objects.filter(id=snapshot.id).update(
+            status='error' if snapshot.status == 'pending' else snapshot.status,
+            failures=failures,
+            next_refresh_at=now + _jittered(delay),
+        )
+        return False
+    else:
+        updates.update(status='ok', failures=0)
+
+    if stats is None:
+        PlatformStatsSnapshot.objects.filter(id=snapshot.id).update(**updates)
+        return False
+
+    PlatformStatsSnapshot.objects.filter(id=snapshot.id).update(stats=stats, etag=etag, **updates)
+    UserProfile.objects.filter(user_id=snapshot.user_id).update(updated_at=now)
+    invalidate_profile(snapshot.user_id)
+    return True
+
+
+def sync_due(limit=None):
+    """
+    Refresh snapshots whose `next_refresh_at` has passed, oldest first.
+
+    A platform that rate-limits us is skipped for the rest of the run (and
+    later runs) until its reset time; other platforms carry on.
+
+    Returns:
+        dict: {'fetched', 'changed', 'skipped'} counts.
+    """
+    limit = limit or settings.PLATFORM_STATS_BATCH_SIZE
+    reconcile(spread_seconds=settings.PLATFORM_STATS_REFRESH_SECONDS)
+    due = PlatformStatsSnapshot.objects.filter(next_refresh_at__lte=timezone.now()).order_by('next_refresh_at', 'id')
+    counts = {'fetched': 0, 'changed': 0, 'skipped': 0}
+
+    with requests.Session() as session:
+        for snapshot in due[:limit]:
+            if _paused(snapshot.platform):
+                counts['skipped'] += 1
+                continue
+            try:
+                changed = refresh_snapshot(session, snapshot)
+            except RateLimited as e:
+                logger.info("%s rate limit reached; pausing stats sync", snapshot.platform)
+                _pause(snapshot.platform, e.retry_at)
+                counts['skipped'] += 1
+                continue
+            counts['fetched'] += 1
+            counts['changed'] += changed
+    return counts
+
+
+def snapshot_payload(user_id):
+    """Public stats of a user's linked platforms, as shown on their profile."""
+    to_representation = serializers.DateTimeField().to_representation
+    return {
+        platform: {
+            'handle': handle,
+            'stats': stats,
+            'fetched_at': to_representation(fetched_at),
+        }
+        for platform, handle, stats, fetched_at in PlatformStatsSnapshot.objects.filter(
+            user_id=user_id, status='ok'
+        ).values_list('platform', 'handle', 'stats', 'fetched_at')
+    }
@@ -0,0 +1,237 @@
+import hashlib
+import string
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from .models import UserProfile
+
+# Derived referral codes are 9 base-36 characters. Legacy random codes are
+# 8, so the two formats can never collide.
+REFERRAL_CODE_LENGTH = 9
+REFERRAL_CODE_ALPHABET = string.digits + string.ascii_uppercase
+
+# 46-bit Feistel permutation: 2**46 < 36**9, so every output fits in 9 chars
+_HALF_BITS = 23
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_ROUNDS = 4
+
+
+@lru_cache(maxsize=1)
+def _feistel_key(secret):
+    return hashlib.sha256(f"referral-code:{secret}".encode()).digest()
+
+
+def _round_function(key, round_number, value):
+    # Keyed BLAKE2 is a fast PRF; only its low 23 bits are used
+    digest = hashlib.blake2b(bytes([round_number]) + value.to_bytes(4, 'big'), key=key, digest_size=4).digest()
+    return int.from_bytes(digest, 'big') & _HALF_MASK
+
+
+def encode_referral_code(user_id):
+    """
+    Derive a referral code from a user id.
+
+    A keyed Feistel network is a bijection on 46-bit integers, so distinct
+    ids always yield distinct codes: no uniqueness lookup or retry loop is
+    needed, and codes are unguessable without the key.
+    """
+    if not 0 <= user_id < (1 << (2 * _HALF_BITS)):
+        raise ValueError(f"user_id {user_id} is out of range for referral codes")
+
+    key = _feistel_key(settings.REFERRAL_CODE_KEY)
+    left, right = user_id >> _HALF_BITS, user_id & _HALF_MASK
+    for round_number in range(_ROUNDS):
+        left, right = right, left ^ _round_function(key, round_number, right)
+    value = (left << _HALF_BITS) | right
+
+    chars = []
+    for _ in range(REFERRAL_CODE_LENGTH):
+        value, remainder = divmod(value, len(REFERRAL_CODE_ALPHABET))
+        chars.append(REFERRAL_CODE_ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+
+def decode_referral_code(code):
+    """
+    Invert `encode_referral_code`.
+
+    Returns:
+        int | None: The user id, or None if `code` is not a derived code
+        (e.g. a legacy random one).
+    """
+    if len(code) != REFERRAL_CODE_LENGTH or not set(code) <= set(REFERRAL_CODE_ALPHABET):
+        return None
+    value = int(code, len(REFERRAL_CODE_ALPHABET))
+    if value >= 1 << (2 * _HALF_BITS):
+        return None
+
+    key = _feistel_key(settings.REFERRAL_CODE_KEY)
+    left, right = value >> _HALF_BITS, value & _HALF_MASK
+    for round_number in reversed(range(_ROUNDS)):
+        left, right = right ^ _round_function(key, round_number, left), left
+    return (left << _HALF_BITS) | right
+
+
+class ReferralAnalytics:
+    """
+    Referral tree statistics over `UserProfile.referred_by`.
+
+    Tree walks run inside the database as recursive CTEs (one query each,
+    however large the tree). Results are cached and, when a new referral is
+    linked, patched in place for the affected ancestors instead of being
+    recomputed.
+    """
+
+    # Guards against pathological chains (and cycles created before redemption checks existed)
+    MAX_DEPTH = 64
+
+    STATS_KEY = 'referrals:stats:{user_id}'
+    TOP_KEY = 'referrals:top'
+
+    @staticmethod
+    def _sql(template):
+        profile = UserProfile._meta
+        return template.format(
+            table=connection.ops.quote_name(profile.db_table),
+            user=connection.ops.quote_name(profile.get_field('user').column),
+            referrer=connection.ops.quote_name(profile.get_field('referred_by').column),
+        )
+
+    @staticmethod
+    def compute_stats(user_id):
+        """Direct referrals, total downline and depth of the tree below `user_id`."""
+        sql = ReferralAnalytics._sql("""
+            WITH RECURSIVE downline(user_id, depth) AS (
+                SELECT {user}, 1 FROM {table} WHERE {referrer} = %s
+                UNION ALL
+                SELECT p.{user}, d.depth + 1
+                FROM {table} p JOIN downline d ON p.{referrer} = d.user_id
+                WHERE d.depth < %s
+            )
+            SELECT
+                COALESCE(SUM(CASE WHEN depth = 1 THEN 1 ELSE 0 END), 0),
+                COUNT(*),
+                COALESCE(MAX(depth), 0)
+            FROM downline
+        """)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, ReferralAnalytics.MAX_DEPTH])
+            direct, downline, depth = cursor.fetchone()
+        return {'direct_referrals': direct, 'downline_size': downline, 'depth': depth}
+
+    @staticmethod
+    def ancestors(user_id):
+        """`[(ancestor_id, distance)]` walking up the referral chain from `user_id`."""
+        sql = ReferralAnalytics._sql("""
+            WITH RECURSIVE ancestors(user_id, distance) AS (
+                SELECT {referrer}, 1 FROM {table}
+                WHERE {user} = %s AND {referrer} IS NOT NULL
+                UNION ALL
+                SELECT p.{referrer}, a.distance + 1
+                FROM {table} p JOIN ancestors a ON p.{user} = a.user_id
+                WHERE p.{referrer} IS NOT NULL AND a.distance < %s
+            )
+            SELECT user_id, distance FROM ancestors
+        """)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [user_id, ReferralAnalytics.MAX_DEPTH])
+            return cursor.fetchall()
+
+    @staticmethod
+    def compute_top(limit):
+        """Top referrers by total downline, computed for the whole tree in one query."""
+        sql = ReferralAnalytics._sql("""
+            WITH RECURSIVE tree(root_id, user_id, depth) AS (
+                SELECT {referrer}, {user}, 1 FROM {table} WHERE {referrer} IS NOT NULL
+                UNION ALL
+                SELECT t.root_id, p.{user}, t.depth + 1
+                FROM {table} p JOIN tree t ON p.{referrer} = t.user_id
+                WHERE t.depth < %s
+            )
+            SELECT
+                root_id,
+                SUM(CASE WHEN depth = 1 THEN 1 ELSE 0 END),
+                COUNT(*),
+                MAX(depth)
+            FROM tree
+            GROUP BY root_id
+            ORDER BY COUNT(*) DESC, root_id
+            LIMIT %s
+        """)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [ReferralAnalytics.MAX_DEPTH, limit])
+            return [
+                {'user_id': root_id, 'direct_referrals': direct, 'downline_size': downline, 'depth': depth}
+                for root_id, direct, downline, depth in cursor.fetchall()
+            ]
+
+    @staticmethod
+    def get_stats(user_id):
+        key = ReferralAnalytics.STATS_KEY.format(user_id=user_id)
+        stats = cache.get(key)
+        if stats is None:
+            stats = ReferralAnalytics.compute_stats(user_id)
+            cache.set(key, stats, settings.REFERRAL_STATS_CACHE_TIMEOUT)
+        return stats
+
+    @staticmethod
+    def get_top(k):
+        top = cache.get(ReferralAnalytics.TOP_KEY)
+        if top is None:
+            top = ReferralAnalytics.compute_top(settings.REFERRAL_TOP_CACHE_SIZE)
+            cache.set(ReferralAnalytics.TOP_KEY, top, settings.REFERRAL_STATS_CACHE_TIMEOUT)
+        return top[:k]
+
+    @staticmethod
+    def record_referral(user_id, referrer_id):
+        """
+        Patch cached analytics after `user_id` was linked under `referrer_id`.
+
+        Every ancestor of the new link gains the new account's whole subtree;
+        only those ancestors' cached entries (and the top list) change.
+        Must be called after the link is saved.
+        """
+        # The subtree joining the tree: the account itself plus anything it already referred
+        subtree = ReferralAnalytics.compute_stats(user_id)
+        added = subtree['downline_size'] + 1
+
+        chain = [(referrer_id, 0)] + ReferralAnalytics.ancestors(referrer_id)
+
+        keys = {ReferralAnalytics.STATS_KEY.format(user_id=a): (a, d) for a, d in chain}
+        cached = cache.get_many(list(keys))
+        for key, stats in cached.items():
+            ancestor_id, distance = keys[key]
+            stats['downline_size'] += added
+            stats['depth'] = max(stats['depth'], distance + 1 + subtree['depth'])
+            if ancestor_id == referrer_id:
+                stats['direct_referrals'] += 1
+        if cached:
+            cache.set_many(cached, settings.REFERRAL_STATS_CACHE_TIMEOUT)
+
+        top = cache.get(ReferralAnalytics.TOP_KEY)
+        if top is None:
+            return
+
+        by_id = {entry['user_id']: entry for entry in top}
+        for ancestor_id, _ in chain:
+            if ancestor_id in by_id:
+                entry = by_id[ancestor_id]
+                entry['downline_size'] += added
+                if ancestor_id == referrer_id:
+                    entry['direct_referrals'] += 1
+                # Depth is refreshed from the (now current) per-user stats
+                entry['depth'] = ReferralAnalytics.get_stats(ancestor_id)['depth']
+            else:
+                # Post-link stats, either patched above or freshly computed
+                stats = ReferralAnalytics.get_stats(ancestor_id)
+                top.append({'user_id': ancestor_id, **stats})
+
+        top.sort(key=lambda entry: (-entry['downline_size'], entry['user_id']))
+        cache.set(
+            ReferralAnalytics.TOP_KEY,
+            top[:settings.REFERRAL_TOP_CACHE_SIZE],
+            settings.REFERRAL_STATS_CACHE_TIMEOUT,
+        )
@@ -0,0 +1,61 @@
+import re
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+# Shorter queries match too much to be useful
+SEARCH_MIN_LENGTH = 2
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(text):
+    """Lowercase and collapse whitespace, the form search keys are stored in."""
+    return _WHITESPACE.sub(' ', (text or '').strip().lower())
+
+
+def build_search_key(username, first_name='', last_name='', github_username='', leetcode_username=''):
+    """
+    Denormalized search text for one user.
+
+    The username always comes first, so "username starts with" is a prefix
+    match on the whole key.
+    """
+    parts = (username, first_name, last_name, github_username, leetcode_username)
+    return normalize(' '.join(part for part in parts if part))
+
+
+def search_profiles(queryset, query):
+    """
+    Filter and rank `queryset` (UserProfile) by `query`.
+
+    Ranking, best first: exact username, username prefix, prefix of any
+    other word (display name, GitHub/LeetCode handle), substring anywhere.
+    On PostgreSQL, trigram word similarity also admits near-misses (typos),
+    ranked last by similarity. Matching runs on `search_key`, which has a
+    trigram GIN index on PostgreSQL.
+    """
+    q = normalize(query)
+    match = Q(search_key__contains=q)
+    fuzzy = connection.vendor == 'postgresql'
+    if fuzzy:
+        match |= Q(search_key__trigram_word_similar=q)
+
+    queryset = queryset.filter(match).annotate(
+        search_rank=Case(
+            When(Q(search_key=q) | Q(search_key__startswith=f'{q} '), then=Value(0)),
+            When(search_key__startswith=q, then=Value(1)),
+            When(search_key__contains=f' {q}', then=Value(2)),
+            When(search_key__contains=q, then=Value(3)),
+            default=Value(4),
+            output_field=IntegerField(),
+        )
+    )
+    ordering = ['search_rank']
+    if fuzzy:
+        queryset = queryset.annotate(search_similarity=TrigramWordSimilarity(q, 'search_key'))
+        ordering.append(F('search_similarity').desc())
+    return queryset.order_by(*ordering, '-followers_count', 'user_id')
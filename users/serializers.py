@@ -1,12 +1,15 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from .fieldsets import FieldSelection, SparseFieldsetMixin
+from .leaderboard import leaderboard
 from .models import UserProfile, UserFollow
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Public-facing serializer for user profile data.
     Explicitly excludes sensitive fields like OAuth tokens.
+    Supports sparse fieldsets (`selection=`, see users.fieldsets).
     """
 
     # Computed field to indicate whether this user was referred by someone
@@ -21,6 +24,8 @@ class UserProfileSerializer(serializers.ModelSerializer):
             'provider',
             'avatar_url',
             'banner_url',
+            'avatar_variants',
+            'banner_variants',
             'bio',
             'xp',
             'referral_code',
@@ -31,20 +36,29 @@ class UserProfileSerializer(serializers.ModelSerializer):
         ]
 
     def get_is_referred(self, obj):
-        # Boolean derived from presence of a referrer
-        return obj.referred_by is not None
+        # Boolean derived from presence of a referrer (FK id avoids loading the referrer row)
+        return obj.referred_by_id is not None
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     High-level user serializer used across authenticated APIs.
     Combines core User fields with derived profile and social metrics.
+    Supports sparse fieldsets (`selection=`, see users.fieldsets); `rank`
+    (global leaderboard position) is only computed when expanded.
     """
 
+    expandable_fields = {
+        'rank': serializers.SerializerMethodField,
+    }
+    nested_serializers = {
+        'profile': UserProfileSerializer,
+    }
+
     # Profile is injected manually to avoid nested serializer overhead
     profile = serializers.SerializerMethodField()
 
-    # Social graph metrics (computed, not stored)
+    # Social graph metrics (denormalized counters on the profile)
     followers_count = serializers.SerializerMethodField()
     following_count = serializers.SerializerMethodField()
 
@@ -69,14 +83,143 @@ class UserSerializer(serializers.ModelSerializer):
     def get_profile(self, obj):
         # Defensive access in case profile was not created (edge cases)
         try:
-            return UserProfileSerializer(obj.profile).data
-        except:
+            return UserProfileSerializer(obj.profile, selection=self.selection.nested('profile')).data
+        except UserProfile.DoesNotExist:
             return None
 
     def get_followers_count(self, obj):
-        # Count of users following this user
-        return obj.followers.count()
+        # Count of users following this user (read from the cached profile, no query)
+        profile = getattr(obj, 'profile', None)
+        return profile.followers_count if profile else 0
 
     def get_following_count(self, obj):
-        # Count of users this user follows
-        return obj.following.count()
+        # Count of users this user follows (read from the cached profile, no query)
+        profile = getattr(obj, 'profile', None)
+        return profile.following_count if profile else 0
+
+    def get_rank(self, obj):
+        # In-memory rank index lookup; only runs when `rank` is expanded
+        profile = getattr(obj, 'profile', None)
+        return leaderboard.rank_of(profile.xp) if profile else None
+
+
+class UserRowSerializer:
+    """
+    Read-only fast path producing exactly what `UserSerializer` produces.
+
+    Works on flat `values()` rows (see `rows()`), one joined query for any
+    number of users. The per-field plan - source column plus the DRF
+    field's own `to_representation` - is derived once from the serializers
+    above, so output stays identical to theirs without running the
+    serializer machinery (attribute lookups, method fields, nested
+    serializer instances) per object.
+    """
+
+    # Serializer method fields, computed from row columns instead:
+    # name -> (columns it reads, function of the row)
+    PROFILE_COMPUTED = {
+        'is_referred': (('profile__referred_by',), lambda row: row['profile__referred_by'] is not None),
+    }
+    USER_COMPUTED = {
+        'followers_count': (
+            ('profile__id', 'profile__followers_count'),
+            lambda row: row['profile__followers_count'] if row['profile__id'] is not None else 0,
+        ),
+        'following_count': (
+            ('profile__id', 'profile__following_count'),
+            lambda row: row['profile__following_count'] if row['profile__id'] is not None else 0,
+        ),
+        'rank': (('profile__id', 'profile__xp'), lambda row: _rank_of_row(row)),
+    }
+
+    _default_plans = None
+
+    @classmethod
+    def plans(cls, selection=None):
+        """
+        (user_plan, profile_plan, columns) for a FieldSelection.
+
+        Plans are lists of (name, column, convert); a None column marks a
+        computed field. `profile_plan` is None when the profile isn't
+        selected. The default plan is built once and reused.
+        """
+        if selection is None or selection.is_default:
+            if cls._default_plans is None:
+                cls._default_plans = cls._build_plans(FieldSelection())
+            return cls._default_plans
+        return cls._build_plans(selection)
+
+    @classmethod
+    def _build_plans(cls, selection):
+        columns = set()
+        user_serializer = UserSerializer(selection=selection)
+        user_plan = cls._build_plan(user_serializer, '', cls.USER_COMPUTED, columns)
+        profile_plan = None
+        if 'profile' in user_serializer.fields:
+            columns.add('profile__id')
+            profile_serializer = UserProfileSerializer(selection=selection.nested('profile'))
+            profile_plan = cls._build_plan(profile_serializer, 'profile__', cls.PROFILE_COMPUTED, columns)
+        return user_plan, profile_plan, sorted(columns)
+
+    @staticmethod
+    def _build_plan(serializer, prefix, computed, columns):
+        plan = []
+        for name, field in serializer.fields.items():
+            if name in computed:
+                needs, convert = computed[name]
+                columns.update(needs)
+                plan.append((name, None, convert))
+            elif name == 'profile':
+                plan.append((name, None, None))
+            else:
+                columns.add(prefix + field.source)
+                plan.append((name, prefix + field.source, field.to_representation))
+        return plan
+
+    @classmethod
+    def columns(cls, selection=None):
+        """Columns `values()` must select for `serialize()`."""
+        return cls.plans(selection)[2]
+
+    @classmethod
+    def rows(cls, queryset, *extra, selection=None):
+        """`values()` queryset over User rows with everything `serialize()` needs."""
+        columns = cls.columns(selection)
+        return queryset.values(*columns, *(column for column in extra if column not in columns))
+
+    @classmethod
+    def serialize(cls, row, selection=None):
+        user_plan, profile_plan, _ = cls.plans(selection)
+        return cls._serialize(row, user_plan, profile_plan)
+
+    @classmethod
+    def serialize_many(cls, rows, selection=None):
+        user_plan, profile_plan, _ = cls.plans(selection)
+        return [cls._serialize(row, user_plan, profile_plan) for row in rows]
+
+    @staticmethod
+    def _serialize(row, user_plan, profile_plan):
+        profile = None
+        if profile_plan is not None and row['profile__id'] is not None:
+            profile = {}
+            for name, column, convert in profile_plan:
+                if column is None:
+                    profile[name] = convert(row)
+                else:
+                    value = row[column]
+                    profile[name] = None if value is None else convert(value)
+
+        data = {}
+        for name, column, convert in user_plan:
+            if column is None:
+                data[name] = profile if convert is None else convert(row)
+            else:
+                value = row[column]
+                data[name] = None if value is None else convert(value)
+        return data
+
+
+def _rank_of_row(row):
+    if row['profile__id'] is None:
+        return None
+    return leaderboard.rank_of(row['profile__xp'])
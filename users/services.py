@@ -0,0 +1,144 @@
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from auth.authentication import invalidate_principal
+from auth.models import AccountDeletionJob
+from chat.consumers import disconnect_users
+from .cache import invalidate_profile
+from .leaderboard import leaderboard
+from .models import UserProfile, UserFollow
+
+
+class FollowService:
+    """
+    Maintenance helpers for the denormalized social graph counters.
+    Day-to-day increments happen in the UserFollow signals; this is for
+    rebuilding after bulk writes that bypass signals, or drift repair.
+    """
+
+    @staticmethod
+    def following_ids(viewer, user_ids):
+        """
+        Return the subset of `user_ids` that `viewer` follows.
+
+        Resolves "is the viewer following them" for a whole page in one query.
+        Anonymous viewers follow no one.
+        """
+        if not viewer.is_authenticated or not user_ids:
+            return set()
+        return set(
+            UserFollow.objects
+            .filter(follower=viewer, following_id__in=user_ids)
+            .values_list('following_id', flat=True)
+        )
+
+    @staticmethod
+    def follower_ids(viewer, user_ids):
+        """
+        Return the subset of `user_ids` that follow `viewer`, in one query.
+        Anonymous viewers have no followers.
+        """
+        if not viewer.is_authenticated or not user_ids:
+            return set()
+        return set(
+            UserFollow.objects
+            .filter(following=viewer, follower_id__in=user_ids)
+            .values_list('follower_id', flat=True)
+        )
+
+    @staticmethod
+    def recount(user_ids=None):
+        """
+        Rebuild `followers_count` / `following_count` from UserFollow.
+
+        Runs as a single UPDATE with correlated subqueries, so the work stays
+        in the database regardless of how many profiles are touched.
+
+        Args:
+            user_ids (iterable, optional): Restrict the rebuild to these users.
+
+        Returns:
+            int: Number of profiles updated.
+        """
+        followers = (
+            UserFollow.objects
+            .filter(following_id=OuterRef('user_id'))
+            .order_by()
+            .values('following_id')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+        following = (
+            UserFollow.objects
+            .filter(follower_id=OuterRef('user_id'))
+            .order_by()
+            .values('follower_id')
+            .annotate(total=Count('id'))
+            .values('total')
+        )
+
+        profiles = UserProfile.objects.all()
+        if user_ids is not None:
+            profiles = profiles.filter(user_id__in=list(user_ids))
+
+        return profiles.update(
+            followers_count=Coalesce(Subquery(followers), Value(0)),
+            following_count=Coalesce(Subquery(following), Value(0)),
+            follow_version=F('follow_version') + 1,
+        )
+
+
+class ModerationService:
+    """Blocking and unblocking accounts (soft block via `User.is_active`)."""
+
+    @staticmethod
+    def set_active(user_ids, is_active):
+        """
+        Block (`is_active=False`) or unblock many users with one UPDATE.
+
+        `.update()` skips model signals, so the cached auth principals and
+        public profiles of every given user are dropped explicitly; on a
+        block, their live chat sockets are closed too. Both happen once the
+        transaction commits. Users whose account deletion is still under way
+        are never unblocked (see `pending_deletion`).
+
+        Args:
+            user_ids (list): Users to change.
+            is_active (bool): New status.
+
+        Returns:
+            int: Number of users whose status actually changed.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return 0
+        with transaction.atomic():
+            users = User.objects.filter(id__in=user_ids).exclude(is_active=is_active)
+            if is_active:
+                users = users.exclude(id__in=ModerationService._unfinished_deletions(user_ids).values('user_id'))
+            rows = list(users.values_list('id', 'profile__xp'))
+            changed = User.objects.filter(id__in=[user_id for user_id, _ in rows]).update(is_active=is_active)
+            invalidate_principal(*user_ids)
+            invalidate_profile(*user_ids)
+            # Blocked users leave the leaderboard; unblocked ones rejoin it
+            changes = [
+                (user_id, None, xp) if is_active else (user_id, xp, None)
+                for user_id, xp in rows if xp is not None
+            ]
+            transaction.on_commit(partial(leaderboard.record_many, changes))
+            if not is_active:
+                transaction.on_commit(partial(disconnect_users, user_ids))
+        return changed
+
+    @staticmethod
+    def _unfinished_deletions(user_ids):
+        return AccountDeletionJob.objects.filter(user_id__in=user_ids).exclude(status='done')
+
+    @staticmethod
+    def pending_deletion(user_ids):
+        """Ids among `user_ids` with an account deletion that hasn't finished (and can't be unblocked)."""
+        return set(ModerationService._unfinished_deletions(list(user_ids)).values_list('user_id', flat=True))
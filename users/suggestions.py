@@ -0,0 +1,404 @@
+import heapq
+import logging
+import os
+import struct
+import threading
+import time
+from array import array
+from datetime import timedelta
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import UnfollowLog, UserFollow
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b'CoCFG2\0\0'
+# magic, watermark, unfollow watermark, edge count, node count
+SNAPSHOT_HEADER = struct.Struct('<8sqqqq')
+# Pairs per query when re-reading unfollowed edges
+RECHECK_CHUNK_SIZE = 1000
+
+
+class FollowGraph:
+    """
+    Compact follower -> following adjacency in CSR form.
+
+    Users are mapped to dense integers by position in a sorted id array
+    (`bisect`, no per-user dict), and edges are stored as two flat int
+    arrays. Changes after the build land in small add/remove overlays keyed
+    by real user ids and are folded back in by `compact()`; so do deleted
+    accounts, whose edges are filtered out until then.
+    """
+
+    def __init__(self, node_ids=None, indptr=None, indices=None, watermark=0, unfollow_watermark=0):
+        self.node_ids = node_ids if node_ids is not None else array('q')
+        self.indptr = indptr if indptr is not None else array('q', [0])
+        self.indices = indices if indices is not None else array('i')
+        # Highest UserFollow.id and UnfollowLog.id reflected in the graph
+        self.watermark = watermark
+        self.unfollow_watermark = unfollow_watermark
+        self.added = defaultdict(set)
+        self.removed = defaultdict(set)
+        self.removed_nodes = set()
+        # Net edge delta held in the overlays, and how many changes they hold
+        self.overlay_size = 0
+        self.pending_changes = 0
+
+    @property
+    def edge_count(self):
+        return len(self.indices) + self.overlay_size
+
+    @classmethod
+    def from_edges(cls, edges, watermark=0, unfollow_watermark=0):
+        """Build from `(follower_id, following_id)` pairs."""
+        edges = sorted(set(edges))
+        node_ids = array('q', sorted({uid for edge in edges for uid in edge}))
+
+        def dense(uid):
+            return bisect_left(node_ids, uid)
+
+        indptr = array('q', [0]) * (len(node_ids) + 1)
+        indices = array('i', [0]) * len(edges)
+        for position, (follower_id, following_id) in enumerate(edges):
+            indptr[dense(follower_id) + 1] += 1
+            indices[position] = dense(following_id)
+        for i in range(len(node_ids)):
+            indptr[i + 1] += indptr[i]
+
+        return cls(node_ids, indptr, indices, watermark, unfollow_watermark)
+
+    def _dense(self, user_id):
+        i = bisect_left(self.node_ids, user_id)
+        if i < len(self.node_ids) and self.node_ids[i] == user_id:
+            return i
+        return None
+
+    def following(self, user_id):
+        """Set of user ids `user_id` follows, overlays applied."""
+        result = set()
+        if user_id in self.removed_nodes:
+            return result
+        i = self._dense(user_id)
+        if i is not None:
+            node_ids = self.node_ids
+            result.update(node_ids[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]])
+        if user_id in self.removed:
+            result -= self.removed[user_id]
+        if user_id in self.added:
+            result |= self.added[user_id]
+        return result - self.removed_nodes if self.removed_nodes else result
+
+    def has_edge(self, follower_id, following_id):
+        if follower_id in self.removed_nodes or following_id in self.removed_nodes:
+            return False
+        if following_id in self.added.get(follower_id, ()):
+            return True
+        if following_id in self.removed.get(follower_id, ()):
+            return False
+        i, j = self._dense(follower_id), self._dense(following_id)
+        if i is None or j is None:
+            return False
+        # Rows are sorted, so membership is a binary search within the row
+        lo, hi = self.indptr[i], self.indptr[i + 1]
+        position = bisect_left(self.indices, j, lo, hi)
+        return position < hi and self.indices[position] == j
+
+    def add_edge(self, follower_id, following_id):
+        """Idempotent: re-applying a known edge (e.g. during catch-up) is a no-op."""
+        if self.has_edge(follower_id, following_id):
+            return
+        if follower_id in self.removed_nodes or following_id in self.removed_nodes:
+            return
+        if following_id in self.removed.get(follower_id, ()):
+            self.removed[follower_id].discard(following_id)
+        else:
+            self.added[follower_id].add(following_id)
+        self.overlay_size += 1
+        self.pending_changes += 1
+
+    def remove_edge(self, follower_id, following_id):
+        if not self.has_edge(follower_id, following_id):
+            return
+        if following_id in self.added.get(follower_id, ()):
+            self.added[follower_id].discard(following_id)
+        else:
+            self.removed[follower_id].add(following_id)
+        self.overlay_size -= 1
+        self.pending_changes += 1
+
+    def remove_node(self, user_id):
+        """Drop every edge from and to `user_id` (a deleted account)."""
+        if user_id not in self.removed_nodes:
+            self.removed_nodes.add(user_id)
+            self.pending_changes += 1
+
+    def compact(self):
+        """Fold overlays (and removed nodes) into a fresh CSR."""
+        edges = []
+        for follower_id in self.node_ids:
+            edges.extend((follower_id, following_id) for following_id in self.following(follower_id))
+        for follower_id in self.added:
+            if self._dense(follower_id) is None:
+                edges.extend((follower_id, following_id) for following_id in self.following(follower_id))
+        return FollowGraph.from_edges(edges, self.watermark, self.unfollow_watermark)
+
+    def suggest(self, user_id, limit=20):
+        """
+        Friends-of-friends ranked by number of mutual connections.
+
+        Returns:
+            list: `(candidate_id, mutual_count)`, best first.
+        """
+        direct = self.following(user_id)
+        scores = Counter()
+        for friend_id in direct:
+            for candidate_id in self.following(friend_id):
+                if candidate_id != user_id and candidate_id not in direct:
+                    scores[candidate_id] += 1
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+    def write_snapshot(self, path):
+        """Persist a compacted graph; written to a temp file then renamed into place."""
+        graph = self.compact() if self.pending_changes else self
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as fh:
+            fh.write(SNAPSHOT_HEADER.pack(
+                SNAPSHOT_MAGIC, graph.watermark, graph.unfollow_watermark, len(graph.indices), len(graph.node_ids)
+            ))
+            graph.node_ids.tofile(fh)
+            graph.indptr.tofile(fh)
+            graph.indices.tofile(fh)
+        os.replace(tmp_path, path)
+        return graph
+
+    @classmethod
+    def read_snapshot(cls, path):
+        with open(path, 'rb') as fh:
+            magic, watermark, unfollow_watermark, edge_count, node_count = SNAPSHOT_HEADER.unpack(
+                fh.read(SNAPSHOT_HEADER.size)
+            )
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a follow graph snapshot")
+            node_ids, indptr, indices = array('q'), array('q'), array('i')
+            node_ids.fromfile(fh, node_count)
+            indptr.fromfile(fh, node_count + 1)
+            indices.fromfile(fh, edge_count)
+        return cls(node_ids, indptr, indices, watermark, unfollow_watermark)
+
+
+class FollowSuggestions:
+    """
+    Process-wide suggestion engine.
+
+    Startup prefers the on-disk snapshot plus a catch-up read of follows and
+    unfollows (UnfollowLog) newer than its watermarks; a full table scan
+    only happens when no usable snapshot exists. Follow signals keep the
+    live graph current, and a background thread re-syncs it every
+    FOLLOW_GRAPH_REFRESH_SECONDS to absorb writes from other processes,
+    while requests keep reading the current graph.
+
+    Ids are taken at insert but rows only become visible at commit, so a
+    slow transaction can commit a row below ids already seen. Watermarks
+    therefore never pass rows younger than FOLLOW_GRAPH_SETTLE_SECONDS:
+    those are read again on the next sync, which is harmless because
+    every change is applied idempotently.
+    """
+
+    # Fold overlays back into the CSR once they reach this many edges
+    COMPACT_THRESHOLD = 50_000
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._graph = None
+        self._synced_at = None
+        self._refreshing = False
+
+    @property
+    def is_loaded(self):
+        return self._graph is not None
+
+    @staticmethod
+    def _settled_before():
+        return timezone.now() - timedelta(seconds=settings.FOLLOW_GRAPH_SETTLE_SECONDS)
+
+    def build_from_db(self):
+        settled = self._settled_before()
+        # Read before the scan: unfollows logged during it are replayed by the next catch-up
+        first_recent = UnfollowLog.objects.filter(created_at__gte=settled).aggregate(first=Min('id'))['first']
+        logged = UnfollowLog.objects.filter(id__lt=first_recent) if first_recent else UnfollowLog.objects
+        unfollow_watermark = logged.aggregate(last=Max('id'))['last'] or 0
+        rows = UserFollow.objects.order_by('id').values_list(
+            'id', 'follower_id', 'following_id', 'created_at'
+        ).iterator(chunk_size=10_000)
+        watermark = 0
+        advancing = True
+        edges = []
+        for follow_id, follower_id, following_id, created_at in rows:
+            advancing = advancing and created_at < settled
+            if advancing:
+                watermark = follow_id
+            edges.append((follower_id, following_id))
+        return FollowGraph.from_edges(edges, watermark, unfollow_watermark)
+
+    @staticmethod
+    def _read_past(queryset, watermark, settled):
+        """
+        `(id, follower_id, following_id)` rows of `queryset` past `watermark`,
+        and the watermark to store: the last id before the first row that
+        isn't settled yet.
+        """
+        rows = queryset.filter(id__gt=watermark).order_by('id').values_list(
+            'id', 'follower_id', 'following_id', 'created_at'
+        )
+        result = []
+        advancing = True
+        for row_id, follower_id, following_id, created_at in rows:
+            result.append((row_id, follower_id, following_id))
+            advancing = advancing and created_at < settled
+            if advancing:
+                watermark = row_id
+        return result, watermark
+
+    def _changes_since(self, graph):
+        """
+        Read follows and unfollows newer than the graph's watermarks.
+
+        An unfollow can be followed by a re-follow of the same pair, and the
+        two are logged in different tables, so every pair an unfollow
+        touched is re-read from UserFollow and reported with its current
+        state rather than replayed in order. A deleted account is logged
+        once, without a `following_id`, and reported as `(user_id, None, False)`.
+
+        Returns:
+            tuple: (watermark, unfollow_watermark, [(follower_id, following_id, exists)]).
+        """
+        settled = self._settled_before()
+        follows, watermark = self._read_past(UserFollow.objects, graph.watermark, settled)
+        changes = [(follower_id, following_id, True) for _, follower_id, following_id in follows]
+
+        unfollows, unfollow_watermark = self._read_past(UnfollowLog.objects, graph.unfollow_watermark, settled)
+        touched = set()
+        for _, follower_id, following_id in unfollows:
+            if following_id is None:
+                changes.append((follower_id, None, False))
+            else:
+                touched.add((follower_id, following_id))
+
+        touched = sorted(touched)
+        for start in range(0, len(touched), RECHECK_CHUNK_SIZE):
+            chunk = touched[start:start + RECHECK_CHUNK_SIZE]
+            existing = set(
+                UserFollow.objects.filter(
+                    follower_id__in={pair[0] for pair in chunk},
+                    following_id__in={pair[1] for pair in chunk},
+                ).values_list('follower_id', 'following_id')
+            )
+            changes.extend((*pair, pair in existing) for pair in chunk)
+        return watermark, unfollow_watermark, changes
+
+    @staticmethod
+    def _apply(graph, watermark, unfollow_watermark, changes):
+        for follower_id, following_id, exists in changes:
+            if following_id is None:
+                graph.remove_node(follower_id)
+            elif exists:
+                graph.add_edge(follower_id, following_id)
+            else:
+                graph.remove_edge(follower_id, following_id)
+        graph.watermark = max(graph.watermark, watermark)
+        graph.unfollow_watermark = max(graph.unfollow_watermark, unfollow_watermark)
+
+    def _read_snapshot(self, path):
+        """The snapshot at `path`, caught up; None if missing, unreadable or too old to catch up."""
+        if not os.path.exists(path):
+            return None
+        # Older snapshots may predate UnfollowLog entries that were already pruned
+        max_age = settings.UNFOLLOW_LOG_RETENTION_DAYS * 24 * 60 * 60
+        if time.time() - os.path.getmtime(path) > max_age:
+            return None
+        try:
+            graph = FollowGraph.read_snapshot(path)
+        except (OSError, ValueError, EOFError, struct.error):
+            logger.exception("Unreadable follow graph snapshot at %s", path)
+            return None
+        self._apply(graph, *self._changes_since(graph))
+        return graph
+
+    def load(self):
+        graph = self._read_snapshot(settings.FOLLOW_GRAPH_SNAPSHOT_PATH) or self.build_from_db()
+        with self._lock:
+            self._graph = graph
+            self._synced_at = time.monotonic()
+        return graph
+
+    def refresh(self):
+        """Catch the live graph up with the database, compacting it if the overlays grew large."""
+        # Queries run outside the lock; the results are idempotent, so they
+        # apply cleanly even if signals changed the graph meanwhile
+        changes = self._changes_since(self._graph)
+        with self._lock:
+            graph = self._graph
+            self._apply(graph, *changes)
+            if graph.pending_changes > self.COMPACT_THRESHOLD:
+                graph = self._graph = graph.compact()
+            self._synced_at = time.monotonic()
+        return graph
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Follow graph refresh failed")
+        finally:
+            self._refreshing = False
+            connections.close_all()
+
+    def graph(self):
+        if self._graph is None:
+            # Only the first load blocks a request, and only one runs at a time
+            with self._load_lock:
+                if self._graph is None:
+                    self.load()
+            return self._graph
+        if time.monotonic() - self._synced_at > settings.FOLLOW_GRAPH_REFRESH_SECONDS:
+            with self._lock:
+                start = not self._refreshing
+                self._refreshing = True
+            if start:
+                threading.Thread(target=self._refresh_in_background, daemon=True).start()
+        return self._graph
+
+    def snapshot(self):
+        self.graph()
+        self.refresh()
+        with self._lock:
+            graph = self._graph.write_snapshot(settings.FOLLOW_GRAPH_SNAPSHOT_PATH)
+            self._graph = graph
+        return graph
+
+    def record_follow(self, follower_id, following_id):
+        if self.is_loaded:
+            with self._lock:
+                self._graph.add_edge(follower_id, following_id)
+
+    def record_unfollow(self, follower_id, following_id):
+        if self.is_loaded:
+            with self._lock:
+                self._graph.remove_edge(follower_id, following_id)
+
+    def suggest(self, user_id, limit=20):
+        graph = self.graph()
+        with self._lock:
+            return graph.suggest(user_id, limit)
+
+
+follow_suggestions = FollowSuggestions()
@@ -0,0 +1,132 @@
+import logging
+import os
+
+from django.tasks import task
+from django.utils import timezone
+
+from auth.storage import StorageService
+from .cache import invalidate_profile
+from .github import GitHubImportError, fetch_following, follow_github_accounts, set_import_status
+from .media import (
+    IMAGE_KINDS, IMMUTABLE_MAX_AGE, OUTPUT_CONTENT_TYPE, InvalidImage,
+    collect_garbage, file_sha256, media_path, open_image, render_variants,
+)
+from .models import MediaObject, UserProfile
+from .platforms import sync_due
+
+logger = logging.getLogger(__name__)
+
+
+@task
+def process_profile_image(user_id, kind, spool_path):
+    """
+    Validate a spooled avatar/banner upload, render its resized variants,
+    upload them and point the profile at the new URLs.
+
+    Renditions are stored under the SHA-256 of the upload, so re-uploading
+    an image that is already stored skips decoding and uploading entirely.
+    The spooled file is removed once processed or rejected; after any other
+    failure (e.g. storage being unreachable) it is kept so the task can be
+    retried with the same arguments.
+    """
+    spec = IMAGE_KINDS[kind]
+    try:
+        sha256 = file_sha256(spool_path)
+        stored = dict(
+            MediaObject.objects.filter(kind=kind, sha256=sha256).values_list('variant', 'url')
+        )
+        missing = [size for size in spec['sizes'] if size not in stored]
+        if missing:
+            image = open_image(spool_path)
+            new_objects = []
+            for size, data in render_variants(image, kind):
+                if size not in missing:
+                    continue
+                path = media_path(kind, sha256, size)
+                url = StorageService.upload_bytes(data, path, OUTPUT_CONTENT_TYPE, IMMUTABLE_MAX_AGE)
+                stored[size] = url
+                new_objects.append(MediaObject(
+                    kind=kind, sha256=sha256, variant=size, path=path, url=url,
+                    content_type=OUTPUT_CONTENT_TYPE, bytes=len(data),
+                ))
+            # Concurrent uploads of the same image race harmlessly on the unique path
+            MediaObject.objects.bulk_create(new_objects, ignore_conflicts=True)
+    except InvalidImage as e:
+        logger.warning("Rejected %s upload for user %s: %s", kind, user_id, e)
+        _remove_spooled(spool_path)
+        return None
+    _remove_spooled(spool_path)
+
+    now = timezone.now()
+    # Keep reused objects out of the GC grace window
+    MediaObject.objects.filter(kind=kind, sha256=sha256).update(last_used_at=now)
+
+    # The largest rendition stays the canonical URL existing clients read
+    variants = {str(size): stored[size] for size in spec['sizes']}
+    primary = stored[max(spec['sizes'])]
+    UserProfile.objects.filter(user_id=user_id).update(**{
+        spec['field']: primary,
+        spec['variants_field']: variants,
+        'updated_at': now,
+    })
+    invalidate_profile(user_id)
+    return primary
+
+
+def _remove_spooled(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@task
+def collect_media_garbage():
+    """Remove stored profile images no profile references any more."""
+    removed = collect_garbage()
+    logger.info("Media GC removed %d objects", removed)
+    return removed
+
+
+@task
+def import_github_following(user_id):
+    """
+    Follow the user's GitHub followings that have accounts here.
+
+    Uses the GitHub access token stored at login. Progress and the outcome
+    are kept in the cache for the import status endpoint. Any failure ends
+    in the 'failed' state, so the user can start another import.
+    """
+    try:
+        access_token = (
+            UserProfile.objects.filter(user_id=user_id, provider='github')
+            .values_list('access_token', flat=True)
+            .first()
+        )
+        if not access_token:
+            set_import_status(user_id, 'failed', error='No GitHub account linked')
+            return None
+
+        set_import_status(user_id, 'running')
+        try:
+            logins = fetch_following(access_token)
+        except GitHubImportError as e:
+            logger.warning("GitHub import failed for user %s: %s", user_id, e)
+            set_import_status(user_id, 'failed', error='Could not fetch your GitHub following list')
+            return None
+
+        followed = follow_github_accounts(user_id, logins)
+        set_import_status(user_id, 'done', github_following=len(logins), followed=followed)
+        return followed
+    except Exception:
+        logger.exception("GitHub import crashed for user %s", user_id)
+        set_import_status(user_id, 'failed', error='GitHub import failed')
+        raise
+
+
+@task
+def sync_platform_stats():
+    """Refresh due GitHub/LeetCode stats snapshots (run periodically)."""
+    counts = sync_due()
+    logger.info("Platform stats sync: %s", counts)
+    return counts
@@ -0,0 +1,559 @@
+import csv
+import io
+import json
+import random
+import threading
+from collections import Counter
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from unittest import mock
+
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from auth.models import AccountDeletionJob
+from auth.services import AccountDeletionService
+from auth.tasks import delete_account
+from auth.utils import generate_access_token
+from .leaderboard import Leaderboard, XPRankIndex, leaderboard
+from .models import UnfollowLog, UserFollow, UserProfile
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page
+from .fieldsets import FieldSelection
+from .referrals import REFERRAL_CODE_ALPHABET, decode_referral_code, encode_referral_code
+from .serializers import UserRowSerializer, UserSerializer
+from .services import ModerationService
+from .suggestions import FollowSuggestions
+
+IMPORT_URL = '/api/profiles/user/github/import/'
+ADMIN_USERS_URL = '/api/profiles/admin/users/'
+LEADERBOARD_URL = '/api/profiles/leaderboard/'
+FOLLOWERS_URL = '/api/profiles/users/{username}/followers/'
+
+
+class StubGitHubHandler(BaseHTTPRequestHandler):
+    """Serves `GET /user/following` from the class attributes, with GitHub's Link pagination."""
+
+    logins = []
+    broken = False
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.headers.get('Authorization') != 'Bearer ghtoken':
+            self.send_response(401)
+            self.end_headers()
+            return
+        if self.broken:
+            # A 200 that isn't JSON, e.g. an error page from a proxy
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b'<html>oops</html>')
+            return
+
+        query = parse_qs(urlparse(self.path).query)
+        page, per_page = int(query['page'][0]), int(query['per_page'][0])
+        last = max((len(self.logins) + per_page - 1) // per_page, 1)
+        body = [{'login': login} for login in self.logins[(page - 1) * per_page:page * per_page]]
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Link', f'<http://stub/user/following?per_page={per_page}&page={last}>; rel="last"')
+        self.end_headers()
+        self.wfile.write(json.dumps(body).encode())
+
+
+class GitHubImportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubGitHubHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.github_api_url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        StubGitHubHandler.broken = False
+        StubGitHubHandler.logins = [f'GhUser{i}' for i in range(250)]
+
+        self.user = User.objects.create(username='importer')
+        UserProfile.objects.filter(user=self.user).update(provider='github', access_token='ghtoken')
+        self.targets = []
+        for i in (0, 5, 120, 249):
+            target = User.objects.create(username=f'target{i}')
+            UserProfile.objects.filter(user=target).update(github_username=f'ghuser{i}')
+            self.targets.append(target)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {generate_access_token(self.user)}')
+
+    def start_import(self):
+        """POST an import, run the task it enqueues on commit, and return the resulting status."""
+        with override_settings(GITHUB_API_URL=self.github_api_url):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(IMPORT_URL)
+        return self.client.get(IMPORT_URL)
+
+    def test_import_follows_matching_accounts_across_pages(self):
+        response = self.start_import()
+
+        self.assertEqual(response.data['status'], 'done')
+        self.assertEqual(response.data['github_following'], 250)
+        self.assertEqual(response.data['followed'], 4)
+        self.assertEqual(
+            set(UserFollow.objects.filter(follower=self.user).values_list('following_id', flat=True)),
+            {target.id for target in self.targets},
+        )
+        self.assertEqual(UserProfile.objects.get(user=self.user).following_count, 4)
+
+    def test_reimport_adds_nothing(self):
+        self.start_import()
+        response = self.start_import()
+
+        self.assertEqual(response.data['status'], 'done')
+        self.assertEqual(response.data['followed'], 0)
+        self.assertEqual(UserFollow.objects.filter(follower=self.user).count(), 4)
+
+    def test_unreachable_github_marks_import_failed(self):
+        with override_settings(GITHUB_API_URL='http://127.0.0.1:1'), self.assertLogs('users.tasks', 'WARNING'):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(IMPORT_URL)
+
+        self.assertEqual(self.client.get(IMPORT_URL).data['status'], 'failed')
+
+    def test_unexpected_error_marks_import_failed_and_allows_retry(self):
+        StubGitHubHandler.broken = True
+        with self.assertLogs('users.tasks', 'ERROR'):
+            self.start_import()
+        self.assertEqual(self.client.get(IMPORT_URL).data['status'], 'failed')
+
+        StubGitHubHandler.broken = False
+        response = self.start_import()
+        self.assertEqual(response.data['status'], 'done')
+
+    def test_requires_linked_github_account(self):
+        UserProfile.objects.filter(user=self.user).update(access_token=None)
+
+        response = self.client.post(IMPORT_URL)
+
+        self.assertEqual(response.status_code, 400)
+
+
+class UserExportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(username='admin', is_staff=True)
+        for i in range(6):
+            User.objects.create(username=f'member{i}', is_active=i % 2 == 0)
+        self.client = AsyncClient()
+        self.auth = {'Authorization': f'Bearer {generate_access_token(self.admin)}'}
+
+    async def export(self, **params):
+        with mock.patch('chat.exports.EXPORT_CHUNK_SIZE', 2):
+            response = await self.client.get(ADMIN_USERS_URL, params, headers=self.auth)
+            self.assertTrue(response.is_async)
+            return response, [chunk async for chunk in response.streaming_content]
+
+    async def test_export_streams_filtered_users_in_batches(self):
+        response, chunks = await self.export(export='ndjson', is_active='true')
+
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [2, 2])
+        rows = [json.loads(line) for line in b''.join(chunks).splitlines()]
+        self.assertEqual([row['username'] for row in rows], ['admin', 'member0', 'member2', 'member4'])
+        self.assertEqual(rows[1]['provider'], 'local')
+
+    async def test_csv_export(self):
+        response, chunks = await self.export(export='csv')
+
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="users.csv"')
+        rows = list(csv.DictReader(io.StringIO(b''.join(chunks).decode())))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[0]['username'], 'admin')
+
+
+class XPRankIndexTests(SimpleTestCase):
+    def test_counts_match_brute_force_across_overflow_merges(self):
+        rng = random.Random(7)
+        xps = [rng.randrange(500) for _ in range(300)]
+        index = XPRankIndex()
+        index.MERGE_THRESHOLD = 4
+        index.load(Counter(xps).items())
+
+        for step in range(600):
+            user = rng.randrange(len(xps))
+            # New values beyond the loaded range land in the overflow first
+            old, xps[user] = xps[user], rng.randrange(2000)
+            index.add(old, -1)
+            index.add(xps[user], 1)
+            if step % 50 == 0:
+                for probe in (-1, 0, rng.randrange(2000), 1999):
+                    self.assertEqual(index.count_at_most(probe), sum(1 for xp in xps if xp <= probe))
+                    self.assertEqual(index.count_above(probe), sum(1 for xp in xps if xp > probe))
+        self.assertEqual(index.total, len(xps))
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.users = {}
+        for username, xp in (('ann', 10), ('bob', 20), ('cid', 20), ('dee', 30)):
+            self.users[username] = User.objects.create(username=username)
+            UserProfile.objects.filter(user=self.users[username]).update(xp=xp)
+
+    def test_ties_share_a_rank(self):
+        board = Leaderboard()
+        board.rebuild()
+
+        self.assertEqual(board.rank_of(30), {'rank': 1, 'percentile': 100.0, 'total': 4})
+        self.assertEqual(board.rank_of(20), {'rank': 2, 'percentile': 75.0, 'total': 4})
+        self.assertEqual(board.rank_of(10)['rank'], 4)
+
+    def test_replaying_a_change_the_snapshot_already_has_counts_it_once(self):
+        board = Leaderboard()
+        ann = self.users['ann']
+        UserProfile.objects.filter(user=ann).update(xp=50)
+        load = XPRankIndex.load
+
+        def load_then_record(index, histogram):
+            load(index, histogram)
+            # The committed change is only reported once the snapshot is taken
+            board.record(ann.id, old_xp=10, new_xp=50)
+
+        with mock.patch.object(XPRankIndex, 'load', autospec=True, side_effect=load_then_record):
+            board.rebuild()
+
+        self.assertEqual(board.rank_of(50), {'rank': 1, 'percentile': 100.0, 'total': 4})
+        self.assertEqual(board.rank_of(10)['percentile'], 0.0)
+
+    def test_xp_changes_reach_the_index_on_commit(self):
+        leaderboard.rebuild()
+        profile = UserProfile.objects.get(user=self.users['ann'])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            profile.xp = 40
+            profile.save()
+            self.assertEqual(leaderboard.rank_of(40)['rank'], 1)
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(leaderboard.rank_of(40)['rank'], 1)
+        self.assertEqual(leaderboard.rank_of(30)['rank'], 2)
+        self.assertEqual(leaderboard.rank_of(10)['total'], 4)
+
+    def test_blocked_users_leave_the_ranking(self):
+        leaderboard.rebuild()
+        dee = self.users['dee']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ModerationService.set_active([dee.id], False)
+        self.assertEqual(leaderboard.rank_of(20), {'rank': 1, 'percentile': 100.0, 'total': 3})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ModerationService.set_active([dee.id], True)
+        self.assertEqual(leaderboard.rank_of(20)['rank'], 2)
+
+    def test_view_excludes_inactive_and_deleting_users(self):
+        User.objects.filter(id=self.users['dee'].id).update(is_active=False)
+        AccountDeletionJob.objects.create(user_id=self.users['cid'].id, username='cid')
+        leaderboard.rebuild()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {generate_access_token(self.users["ann"])}')
+
+        response = client.get(LEADERBOARD_URL)
+
+        self.assertEqual(
+            [(row['username'], row['rank']) for row in response.data['results']],
+            [('bob', 1), ('ann', 2)],
+        )
+
+
+@override_settings(REFERRAL_CODE_KEY='test-referral-key')
+class ReferralCodeTests(TestCase):
+    def test_encoding_round_trips_and_never_repeats(self):
+        rng = random.Random(3)
+        ids = [*range(5000), (1 << 46) - 1, *(rng.randrange(1 << 46) for _ in range(5000))]
+
+        codes = [encode_referral_code(user_id) for user_id in ids]
+
+        self.assertEqual(len(set(codes)), len(set(ids)))
+        self.assertEqual([decode_referral_code(code) for code in codes], ids)
+        for code in codes[:100]:
+            self.assertEqual(len(code), 9)
+            self.assertLessEqual(set(code), set(REFERRAL_CODE_ALPHABET))
+
+    def test_every_code_in_range_is_some_users_code(self):
+        rng = random.Random(4)
+        for _ in range(1000):
+            value = rng.randrange(1 << 46)
+            code = ''
+            while len(code) < 9:
+                value, remainder = divmod(value, 36)
+                code = REFERRAL_CODE_ALPHABET[remainder] + code
+            self.assertEqual(encode_referral_code(decode_referral_code(code)), code)
+
+    def test_legacy_and_malformed_codes_are_not_decoded(self):
+        self.assertIsNone(decode_referral_code('AB12CD34'))
+        self.assertIsNone(decode_referral_code('ab12cd34e'))
+        self.assertIsNone(decode_referral_code('ZZZZZZZZZ'))
+
+    def test_codes_depend_on_the_key(self):
+        code = encode_referral_code(42)
+        with override_settings(REFERRAL_CODE_KEY='another-key'):
+            self.assertNotEqual(encode_referral_code(42), code)
+
+    def test_new_profiles_get_their_derived_code(self):
+        user = User.objects.create(username='referrer')
+
+        code = UserProfile.objects.get(user=user).referral_code
+
+        self.assertEqual(decode_referral_code(code), user.id)
+
+
+class FollowListETagTests(TestCase):
+    def setUp(self):
+        self.star = User.objects.create(username='star')
+        self.fans = [User.objects.create(username=f'fan{i}') for i in range(3)]
+        for fan in self.fans:
+            UserFollow.objects.create(follower=fan, following=self.star)
+        self.viewer = User.objects.create(username='viewer')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {generate_access_token(self.viewer)}')
+        self.url = FOLLOWERS_URL.format(username='star')
+
+    def revalidate(self):
+        """GET the list; returns the response and a function re-requesting it with its ETag."""
+        first = self.client.get(self.url)
+        return first, lambda: self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+    def test_unchanged_list_is_not_modified(self):
+        first, again = self.revalidate()
+
+        response = again()
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+    def test_new_follower_changes_the_etag(self):
+        _, again = self.revalidate()
+        UserFollow.objects.create(follower=User.objects.create(username='newfan'), following=self.star)
+
+        response = again()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['username'], 'newfan')
+
+    def test_renamed_follower_changes_the_etag(self):
+        _, again = self.revalidate()
+        self.fans[1].username = 'renamed'
+        self.fans[1].save()
+
+        response = again()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('renamed', [row['username'] for row in response.data['results']])
+
+    def test_new_avatar_changes_the_etag(self):
+        _, again = self.revalidate()
+        # As the image task stores it
+        UserProfile.objects.filter(user=self.fans[0]).update(
+            avatar_url='https://cdn.example/new.webp', updated_at=timezone.now()
+        )
+
+        response = again()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('https://cdn.example/new.webp', [row['avatar_url'] for row in response.data['results']])
+
+    def test_viewer_following_a_listed_user_changes_the_etag(self):
+        _, again = self.revalidate()
+        UserFollow.objects.create(follower=self.viewer, following=self.fans[2])
+
+        response = again()
+
+        self.assertEqual(response.status_code, 200)
+        following = {row['username']: row['is_following'] for row in response.data['results']}
+        self.assertEqual(following, {'fan0': False, 'fan1': False, 'fan2': True})
+
+
+@override_settings(FOLLOW_GRAPH_SNAPSHOT_PATH='/nonexistent/follow_graph.snapshot', FOLLOW_GRAPH_SETTLE_SECONDS=60)
+class FollowGraphSyncTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create(username=f'node{i}') for i in range(4)]
+
+    def follow(self, follower, following, **fields):
+        return UserFollow.objects.create(follower=self.users[follower], following=self.users[following], **fields)
+
+    def test_rows_committed_late_below_seen_ids_are_not_skipped(self):
+        old = self.follow(0, 1)
+        UserFollow.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(minutes=5))
+        recent = self.follow(0, 2, id=old.id + 5)
+        suggestions = FollowSuggestions()
+        graph = suggestions.load()
+        # The recent row holds the watermark back
+        self.assertEqual(graph.watermark, old.id)
+
+        # A slow transaction commits a row with an id taken before `recent`
+        self.follow(0, 3, id=old.id + 2)
+        suggestions.refresh()
+
+        self.assertEqual(graph.following(self.users[0].id), {self.users[i].id for i in (1, 2, 3)})
+        self.assertLess(graph.watermark, recent.id)
+
+    def test_account_deletion_logs_one_entry_and_drops_the_user_everywhere(self):
+        self.follow(0, 1)
+        self.follow(0, 2)
+        self.follow(3, 0)
+        self.follow(3, 1)
+        # Stands in for another process's graph: it only learns of the deletion from the log
+        suggestions = FollowSuggestions()
+        graph = suggestions.load()
+        leaving = self.users[0]
+
+        AccountDeletionService.request_deletion(leaving)
+        delete_account.call(AccountDeletionJob.objects.get(user_id=leaving.id).id)
+        suggestions.refresh()
+
+        self.assertEqual(list(UnfollowLog.objects.values_list('follower_id', 'following_id')), [(leaving.id, None)])
+        self.assertEqual(graph.following(leaving.id), set())
+        self.assertEqual(graph.following(self.users[3].id), {self.users[1].id})
+        # Compaction drops the user's edges for good
+        self.assertNotIn(leaving.id, graph.compact().node_ids)
+
+
+class UserSearchKeyTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='keyholder', first_name='Kay', email='kay@example.org')
+        UserProfile.objects.filter(user=self.user).update(provider='github', provider_id='gh-4242')
+
+    def test_saves_that_leave_search_inputs_alone_do_not_load_the_user(self):
+        profile = UserProfile.objects.get(user=self.user)
+        profile.bio = 'Hello'
+
+        with self.assertNumQueries(1):
+            profile.save()
+        with self.assertNumQueries(1):
+            profile.save(update_fields=['bio', 'github_username'])
+
+    def test_changed_handle_rebuilds_the_key(self):
+        profile = UserProfile.objects.get(user=self.user)
+        profile.github_username = 'KayCodes'
+        profile.save(update_fields=['github_username'])
+
+        self.assertIn('kaycodes', UserProfile.objects.get(user=self.user).search_key)
+
+    def test_admin_list_matches_email_and_provider_id(self):
+        admin = User.objects.create(username='admin', is_staff=True)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {generate_access_token(admin)}')
+
+        for query in ('kay', '@example.org', 'gh-4242'):
+            response = client.get(ADMIN_USERS_URL, {'q': query})
+            self.assertEqual([row['username'] for row in response.data['results']], ['keyholder'], query)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.star = User.objects.create(username='star')
+        for i in range(7):
+            UserFollow.objects.create(follower=User.objects.create(username=f'fan{i}'), following=self.star)
+        self.follows = UserFollow.objects.filter(following=self.star)
+
+    def walk(self, queryset, limit):
+        """Every page in order; the ids seen and the number of pages."""
+        ids, cursor, pages = [], None, 0
+        while True:
+            rows, cursor = keyset_page(queryset, cursor=cursor, limit=limit)
+            ids.extend(row['id'] for row in rows)
+            pages += 1
+            if cursor is None:
+                return ids, pages
+
+    def test_cursor_round_trips(self):
+        timestamp = timezone.now()
+
+        cursor = encode_cursor(timestamp, 42)
+
+        self.assertNotIn('=', cursor)
+        self.assertEqual(decode_cursor(cursor), (timestamp, 42))
+
+    def test_malformed_cursors_are_rejected(self):
+        for cursor in ('', 'not a cursor', encode_cursor(timezone.now(), 1)[:-3], 'WzFd'):
+            with self.assertRaises(InvalidCursor, msg=cursor):
+                decode_cursor(cursor)
+        with self.assertRaises(InvalidCursor):
+            keyset_page(self.follows, cursor='garbage')
+
+    def test_pages_are_newest_first(self):
+        ordered = list(self.follows.order_by('-created_at', '-id').values_list('id', flat=True))
+
+        ids, pages = self.walk(self.follows.values('id', 'created_at'), limit=3)
+
+        self.assertEqual(ids, ordered)
+        self.assertEqual(pages, 3)
+
+    def test_rows_sharing_a_timestamp_are_neither_repeated_nor_skipped(self):
+        # A page boundary falling inside a run of equal timestamps
+        self.follows.update(created_at=timezone.now())
+        expected = sorted(self.follows.values_list('id', flat=True), reverse=True)
+
+        for limit in (1, 2, 3, 7):
+            ids, _ = self.walk(self.follows.values('id', 'created_at'), limit=limit)
+            self.assertEqual(ids, expected, limit)
+
+    def test_exact_last_page_has_no_cursor(self):
+        rows, cursor = keyset_page(self.follows, limit=7)
+
+        self.assertEqual(len(rows), 7)
+        self.assertIsNone(cursor)
+
+
+class UserRowSerializerTests(TestCase):
+    def setUp(self):
+        self.referrer = User.objects.create(username='referrer', email='ref@example.org', is_staff=True)
+        self.referred = User.objects.create(username='referred', first_name='Rae', last_name='Ferd')
+        UserProfile.objects.filter(user=self.referred).update(
+            referred_by=self.referrer.profile, xp=120, bio='Hi', followers_count=3, avatar_variants={'64': 'a.webp'},
+        )
+        self.bare = User.objects.create(username='bare')
+        UserProfile.objects.filter(user=self.bare).delete()
+
+    def assertMatchesUserSerializer(self, selection=None):
+        users = User.objects.order_by('id')
+        expected = [UserSerializer(user, selection=selection).data for user in users.select_related('profile')]
+
+        actual = UserRowSerializer.serialize_many(UserRowSerializer.rows(users, selection=selection), selection=selection)
+
+        self.assertEqual(actual, [dict(data) for data in expected])
+
+    def test_default_fields(self):
+        self.assertMatchesUserSerializer()
+
+    def test_sparse_and_expanded_fields(self):
+        for fields, expand in (
+            ('id,username', None),
+            ('username,profile.xp,profile.is_referred', None),
+            ('profile', None),
+            (None, 'rank'),
+            ('username,followers_count', 'rank'),
+        ):
+            with self.subTest(fields=fields, expand=expand):
+                self.assertMatchesUserSerializer(FieldSelection.parse(fields, expand))
+
+    def test_extra_columns_are_not_serialized(self):
+        rows = UserRowSerializer.rows(User.objects.filter(id=self.referred.id), 'date_joined')
+
+        data = UserRowSerializer.serialize(rows.get())
+
+        self.assertNotIn('date_joined', data)
+        self.assertTrue(data['profile']['is_referred'])
+        self.assertEqual(data['followers_count'], 3)
@@ -1,27 +1,51 @@
 from django.urls import path
 from .views import (
     CurrentUserView,
+    BootstrapView,
     ProfileUpdateView,
     RedeemReferralView,
+    GitHubImportView,
     ProfileDetailView,
     FollowToggleView,
     UserFollowersView,
     UserFollowingView,
     UserListView,
-    UserBlockToggleView
+    UserBlockToggleView,
+    BulkModerationView,
+    LeaderboardView,
+    LeaderboardRankView,
+    ReferralStatsView,
+    TopReferrersView,
+    FollowSuggestionsView,
+    BatchUserCardsView,
+    BatchRelationshipsView,
+    UserSearchView
 )
 
 urlpatterns = [
     path('user/', CurrentUserView.as_view(), name='get_current_user'),
+    path('user/bootstrap/', BootstrapView.as_view(), name='bootstrap'),
     path('user/update/', ProfileUpdateView.as_view(), name='update_profile'),
     path('user/redeem-referral/', RedeemReferralView.as_view(), name='redeem_referral'),
+    path('user/github/import/', GitHubImportView.as_view(), name='github_import'),
+    path('user/referrals/', ReferralStatsView.as_view(), name='referral_stats'),
+    path('user/suggestions/', FollowSuggestionsView.as_view(), name='follow_suggestions'),
+    path('referrals/top/', TopReferrersView.as_view(), name='top_referrers'),
     
     path('users/<str:username>/', ProfileDetailView.as_view(), name='profile_detail'),
     path('users/<str:username>/follow/', FollowToggleView.as_view(), name='toggle_follow'),
     path('users/<str:username>/followers/', UserFollowersView.as_view(), name='user_followers'),
     path('users/<str:username>/following/', UserFollowingView.as_view(), name='user_following'),
+
+    path('search/', UserSearchView.as_view(), name='user_search'),
+    path('batch/users/', BatchUserCardsView.as_view(), name='batch_user_cards'),
+    path('batch/relationships/', BatchRelationshipsView.as_view(), name='batch_relationships'),
+
+    path('leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
+    path('leaderboard/me/', LeaderboardRankView.as_view(), name='leaderboard_rank'),
     
     # Admin routes (moved from auth)
     path('admin/users/', UserListView.as_view(), name='admin_user_list'),
+    path('admin/users/moderate/', BulkModerationView.as_view(), name='admin_bulk_moderation'),
     path('admin/users/<str:username>/toggle-block/', UserBlockToggleView.as_view(), name='admin_toggle_block_user'),
 ]
@@ -1,22 +1,135 @@
+import os
+from datetime import datetime, time
+from functools import partial
+
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.tasks import TaskResultStatus
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from chat.exports import EXPORT_FORMATS, export_response
+from chat.models import Message
+from feed.services import FeedService
+from project.tasks import runs_inline
+from rewards.services import XPService
+from rewards.views import CheckInView
+from .cache import get_public_profile
+from .conditional import conditional_response, make_etag
+from .exports import USER_EXPORT_FIELDS, iter_user_rows
+from .fieldsets import FieldSelection, InvalidFieldSelection
+from .github import get_import_status, set_import_status
+from .leaderboard import LEADERBOARD_SCOPES, leaderboard, leaderboard_queryset
+from .media import IMAGE_KINDS, InvalidImage, spool_upload, validate_image
 from .models import UserProfile, UserFollow
-from .serializers import UserSerializer
+from .pagination import InvalidCursor, get_page_size, keyset_page
+from .platforms import reconcile as reconcile_platform_stats
+from .referrals import ReferralAnalytics
+from .search import (
+    SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT, SEARCH_MIN_LENGTH, normalize, search_profiles,
+)
+from .serializers import UserRowSerializer, UserSerializer
+from .services import FollowService, ModerationService
+from .suggestions import follow_suggestions
+from .tasks import import_github_following, process_profile_image
+
 
-# Helper to handle file uploads
-from auth.supabase_client import StorageService
+def selection_version(request, selection, xp):
+    """
+    ETag parts for a sparse fieldset: the raw selection, plus the current
+    rank when it is expanded (it moves as other users gain XP).
+    """
+    if selection.is_default:
+        return ()
+    parts = (request.query_params.get('fields'), request.query_params.get('expand'))
+    if selection.expanded('rank') and xp is not None:
+        parts += (leaderboard.rank_of(xp),)
+    return parts
 
 
 class CurrentUserView(APIView):
-    """Get the currently authenticated user."""
+    """
+    Get the currently authenticated user.
+
+    Supports sparse fieldsets (`?fields=`, `?expand=rank`) and conditional
+    GET: the ETag is built from the already-loaded user row, the profile's
+    version fields and the selection, so unchanged polls get 304.
+    """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        return Response(UserSerializer(request.user).data)
+        try:
+            selection = FieldSelection.from_request(request, UserSerializer)
+        except InvalidFieldSelection as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        profile = getattr(user, 'profile', None)
+        etag = make_etag(
+            'me', user.id, user.username, user.email, user.first_name, user.last_name,
+            user.is_staff, user.is_superuser, user.is_active,
+            profile and profile.updated_at, profile and profile.follow_version,
+            *selection_version(request, selection, profile and profile.xp),
+        )
+        return conditional_response(
+            request, etag, lambda: Response(UserSerializer(user, selection=selection).data)
+        )
+
+
+class BootstrapView(APIView):
+    """
+    Everything the app needs at startup, in one authenticated request.
+
+    Returns:
+    - `user`: the current user, as from `GET user/` (includes follower and
+      following counts).
+    - `check_in`: check-in status, streak and history, as from
+      `GET /api/rewards/check-in/`.
+    - `counters`: `unread_messages` and `new_feed_items` since the newest
+      chat message / feed item id the client has seen (`chat_since`,
+      `feed_since` query params), capped at BOOTSTRAP_COUNTER_CAP. A counter
+      is null when its marker isn't sent.
+
+    Each part is a single indexed read, so the whole response costs a
+    handful of queries instead of three requests' worth of auth and lookups.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        markers = {}
+        for param in ('chat_since', 'feed_since'):
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            try:
+                markers[param] = int(value)
+            except ValueError:
+                return Response({'error': f'{param} must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user
+        cap = settings.BOOTSTRAP_COUNTER_CAP
+        counters = {'unread_messages': None, 'new_feed_items': None}
+        if 'chat_since' in markers:
+            counters['unread_messages'] = (
+                Message.objects.filter(id__gt=markers['chat_since'])
+                .exclude(user=user)
+                .values('id')[:cap]
+                .count()
+            )
+        if 'feed_since' in markers:
+            counters['new_feed_items'] = FeedService.count_since(user, markers['feed_since'], cap)
+
+        return Response({
+            'user': UserSerializer(user).data,
+            'check_in': CheckInView.status_payload(user),
+            'counters': counters,
+        })
 
 
 class ProfileUpdateView(APIView):
@@ -25,7 +138,12 @@ class ProfileUpdateView(APIView):
     
     Supports:
     - **Text Fields**: username, first_name, last_name, bio, external links.
-    - **File Uploads**: avatar, banner (handled via StorageService).
+    - **File Uploads**: avatar, banner. Uploads are spooled to disk and
+      validated here (400 if not an acceptable image), then resized and
+      uploaded by `process_profile_image`. With a queue-backed TASKS backend
+      that runs on a worker and the response lists the kinds still
+      `processing`; under the default ImmediateBackend it runs on this
+      request, and a failure is reported as an error.
     """
     permission_classes = [IsAuthenticated]
     
@@ -33,6 +151,30 @@ class ProfileUpdateView(APIView):
         user = request.user
         data = request.data
         
+        # Upload checks before anything is written
+        for kind in IMAGE_KINDS:
+            upload = request.FILES.get(kind)
+            if upload is None:
+                continue
+            if not (upload.content_type or '').startswith('image/'):
+                return Response({'error': f'{kind} must be an image'}, status=status.HTTP_400_BAD_REQUEST)
+            if upload.size > settings.PROFILE_IMAGE_MAX_BYTES:
+                return Response({'error': f'{kind} is too large'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Spool to disk and validate headers (no pixel decoding); resizing and storage happen in a task
+        spooled = {}
+        for kind in IMAGE_KINDS:
+            upload = request.FILES.get(kind)
+            if upload is None:
+                continue
+            spooled[kind] = spool_upload(upload)
+            try:
+                validate_image(spooled[kind])
+            except InvalidImage:
+                for path in spooled.values():
+                    os.remove(path)
+                return Response({'error': f'{kind} is not a valid image'}, status=status.HTTP_400_BAD_REQUEST)
+        
         # 1. Update Core User Model Fields
         if 'username' in data:
             user.username = data['username']
@@ -43,63 +185,98 @@ class ProfileUpdateView(APIView):
         user.save()
         
         # 2. Update Extended UserProfile Fields
+        # Only the touched columns are written, so concurrent XP/counter updates survive
         profile = user.profile
-        if 'bio' in data:
-            profile.bio = data['bio']
-        if 'github_username' in data:
-            profile.github_username = data['github_username']
-        if 'leetcode_username' in data:
-            profile.leetcode_username = data['leetcode_username']
-            
-        # 3. Handle File Uploads (to Supabase Storage)
-        if 'avatar' in request.FILES:
-            try:
-                avatar_url = StorageService.upload_file(
-                    request.FILES['avatar'], 
-                    f"avatars/{user.id}_{request.FILES['avatar'].name}"
-                )
-                profile.avatar_url = avatar_url
-            except Exception as e:
-                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-                
-        if 'banner' in request.FILES:
-            try:
-                banner_url = StorageService.upload_file(
-                    request.FILES['banner'], 
-                    f"banners/{user.id}_{request.FILES['banner'].name}"
-                )
-                profile.banner_url = banner_url
-            except Exception as e:
-                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        changed = ['updated_at']
+        for field in ('bio', 'github_username', 'leetcode_username'):
+            if field in data:
+                setattr(profile, field, data[field])
+                changed.append(field)
+        profile.save(update_fields=changed)
+        if {'github_username', 'leetcode_username'} & set(changed):
+            # Schedule stats for new handles; the background sync fetches them
+            reconcile_platform_stats(user_ids=[user.id])
         
-        profile.save()
+        # 3. Hand the spooled images to the processing task
+        results = {}
+
+        def enqueue(kind, spool_path):
+            results[kind] = process_profile_image.enqueue(user.id, kind, spool_path)
+
+        for kind, spool_path in spooled.items():
+            transaction.on_commit(partial(enqueue, kind, spool_path))
+        processing = list(spooled)
+        if processing and runs_inline(process_profile_image):
+            # No task workers: the images were already processed on this request
+            failed = [kind for kind, result in results.items() if result.status == TaskResultStatus.FAILED]
+            if failed:
+                # Nothing will retry an inline task; the client uploads again
+                for kind in failed:
+                    if os.path.exists(spooled[kind]):
+                        os.remove(spooled[kind])
+                return Response(
+                    {'error': f"Could not store {', '.join(failed)}; please try again"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            profile.refresh_from_db()
+            processing = []
         
-        return Response(UserSerializer(user).data)
+        data = UserSerializer(user).data
+        # Image kinds still being processed; their URLs update once the task finishes
+        data['processing'] = processing
+        return Response(data)
 
 
 class ProfileDetailView(APIView):
-    """View to get public profile details."""
+    """
+    View to get public profile details.
+
+    The viewer-independent payload (including `platform_stats`, read from
+    stored snapshots) is served from the profile cache; only `is_following`
+    (and `rank`, when expanded) is computed per request, and only when
+    selected. Supports sparse fieldsets (`?fields=`, `?expand=`)
+    and conditional GET: the ETag covers the profile's version fields, the
+    selection and the viewer, and follows to or from the target bump its
+    follow version.
+    """
     permission_classes = [AllowAny]
     
     def get(self, request, username):
         try:
-            user = User.objects.get(username=username)
+            selection = FieldSelection.from_request(
+                request, UserSerializer, extra=('is_following', 'platform_stats')
+            )
+        except InvalidFieldSelection as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        version = UserProfile.objects.filter(user__username=username).values_list(
+            'user_id', 'updated_at', 'follow_version',
+            'user__first_name', 'user__last_name', 'user__email', 'user__is_active', 'xp',
+        ).first()
+        if version is None:
+            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+        xp = version[-1]
+        etag = make_etag('profile', *version, request.user.id, *selection_version(request, selection, xp))
+        return conditional_response(
+            request, etag, lambda: self.build(request, username, selection, xp), vary_on_auth=True
+        )
+
+    def build(self, request, username, selection, xp):
+        try:
+            data = get_public_profile(username)
         except User.DoesNotExist:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
-            
-        data = UserSerializer(user).data
-        
-        # Add stats
-        data['followers_count'] = user.followers.count()
-        data['following_count'] = user.following.count()
         
-        # Check if requesting user is following
-        if request.user.is_authenticated:
-            data['is_following'] = user.followers.filter(follower=request.user).exists()
-        else:
-            data['is_following'] = False
+        # Check if requesting user is following (skipped when not selected)
+        if selection.includes('is_following'):
+            data['is_following'] = request.user.is_authenticated and UserFollow.objects.filter(
+                follower=request.user, following_id=data['id']
+            ).exists()
+
+        if selection.expanded('rank'):
+            data['rank'] = leaderboard.rank_of(xp)
             
-        return Response(data)
+        return Response(selection.project(data))
 
 
 class FollowToggleView(APIView):
@@ -115,91 +292,126 @@ class FollowToggleView(APIView):
         if target_user == request.user:
             return Response({'error': 'Cannot follow yourself'}, status=status.HTTP_400_BAD_REQUEST)
             
-        follow, created = UserFollow.objects.get_or_create(
-            follower=request.user,
-            following=target_user
-        )
-        
-        if not created:
-            # If relationship exists, unfollow
-            follow.delete()
-            is_following = False
-        else:
-            is_following = True
+        with transaction.atomic():
+            follow, created = UserFollow.objects.get_or_create(
+                follower=request.user,
+                following=target_user
+            )
+            
+            if not created:
+                # If relationship exists, unfollow
+                follow.delete()
+                FeedService.forget(request.user.id, target_user.id)
+                is_following = False
+            else:
+                FeedService.publish(request.user, 'follow', target=target_user)
+                is_following = True
+
+        # Counters were just updated in the database by the UserFollow signals
+        counts = UserProfile.objects.filter(user=target_user).values(
+            'followers_count', 'following_count'
+        ).first() or {'followers_count': 0, 'following_count': 0}
             
         return Response({
             'is_following': is_following,
-            'follower_count': target_user.followers.count(),
-            'following_count': target_user.following.count()
+            'follower_count': counts['followers_count'],
+            'following_count': counts['following_count']
         })
 
 
-class UserFollowersView(APIView):
-    """View to get list of followers for a user."""
+class FollowListView(APIView):
+    """
+    Base view for keyset-paginated follower/following lists.
+
+    Each page is one joined query over UserFollow plus one set-membership
+    query for the viewer's follow status, regardless of page size.
+
+    Supports conditional GET. The ETag is built from the follow versions of
+    the target (its list changed) and of the viewer (an `is_following` flag
+    changed), plus the latest `updated_at` among the listed profiles
+    (renames and new avatars bump it). The page query runs either way; a
+    304 skips the follow-status query and serialization.
+
+    Query params:
+    - `cursor`: `next_cursor` from the previous page.
+    - `limit`: Page size (default 50, max 100).
+    """
     permission_classes = [AllowAny]
 
+    # UserFollow field pointing at the target user, and at the listed user
+    target_field = None
+    listed_field = None
+
     def get(self, request, username):
-        try:
-            target_user = User.objects.get(username=username)
-        except User.DoesNotExist:
+        viewer_id = request.user.id
+        versions = UserProfile.objects.filter(
+            Q(user__username=username) | Q(user_id=viewer_id)
+        ).values_list('user_id', 'user__username', 'follow_version')
+        target_id = viewer_version = None
+        for user_id, name, follow_version in versions:
+            if name == username:
+                target_id, target_version = user_id, follow_version
+            if user_id == viewer_id:
+                viewer_version = follow_version
+        if target_id is None:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        followers = target_user.followers.all()
+        listed = self.listed_field
+        relations = UserFollow.objects.filter(**{f'{self.target_field}_id': target_id}).values(
+            'id',
+            'created_at',
+            user_id=F(f'{listed}_id'),
+            username=F(f'{listed}__username'),
+            first_name=F(f'{listed}__first_name'),
+            avatar_url=F(f'{listed}__profile__avatar_url'),
+            profile_updated_at=F(f'{listed}__profile__updated_at'),
+        )
+        try:
+            rows, next_cursor = keyset_page(
+                relations,
+                cursor=request.query_params.get('cursor'),
+                limit=get_page_size(request),
+            )
+        except InvalidCursor:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+        listed_version = max((row['profile_updated_at'] for row in rows if row['profile_updated_at']), default=None)
+        etag = make_etag(
+            listed, target_id, target_version, viewer_id, viewer_version, listed_version,
+            request.query_params.get('cursor'), request.query_params.get('limit'),
+        )
+        return conditional_response(
+            request, etag, lambda: self.build(request, rows, next_cursor), vary_on_auth=True
+        )
+
+    def build(self, request, rows, next_cursor):
         # We want to show: username, avatar, and if the *requesting user* is following them
-        
-        data = []
-        auth_user = request.user
-        
-        for rel in followers:
-            follower_user = rel.follower
-            is_following = False
-            if auth_user.is_authenticated:
-                is_following = auth_user.following.filter(following=follower_user).exists()
-            
-            profile = getattr(follower_user, 'profile', None)
-            
-            data.append({
-                'username': follower_user.username,
-                'first_name': follower_user.first_name,
-                'avatar_url': profile.avatar_url if profile else None,
-                'is_following': is_following
-            })
-            
-        return Response(data)
+        followed = FollowService.following_ids(request.user, [row['user_id'] for row in rows])
 
+        return Response({
+            'results': [
+                {
+                    'username': row['username'],
+                    'first_name': row['first_name'],
+                    'avatar_url': row['avatar_url'],
+                    'is_following': row['user_id'] in followed,
+                }
+                for row in rows
+            ],
+            'next_cursor': next_cursor,
+        })
 
-class UserFollowingView(APIView):
-    """View to get list of users a user is following."""
-    permission_classes = [AllowAny]
 
-    def get(self, request, username):
-        try:
-            target_user = User.objects.get(username=username)
-        except User.DoesNotExist:
-            return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+class UserFollowersView(FollowListView):
+    """View to get list of followers for a user."""
+    target_field = 'following'
+    listed_field = 'follower'
 
-        following = target_user.following.all()
-        
-        data = []
-        auth_user = request.user
-        
-        for rel in following:
-            following_user = rel.following
-            is_following = False
-            if auth_user.is_authenticated:
-                 # Check if auth user is following this person (who target_user is also following)
-                is_following = auth_user.following.filter(following=following_user).exists()
-                
-            profile = getattr(following_user, 'profile', None)
-            
-            data.append({
-                'username': following_user.username,
-                'first_name': following_user.first_name,
-                'avatar_url': profile.avatar_url if profile else None,
-                'is_following': is_following
-            })
-            
-        return Response(data)
+
+class UserFollowingView(FollowListView):
+    """View to get list of users a user is following."""
+    target_field = 'follower'
+    listed_field = 'following'
 
 
 class RedeemReferralView(APIView):
@@ -227,29 +439,382 @@ class RedeemReferralView(APIView):
             referrer_profile = UserProfile.objects.get(referral_code=code)
         except UserProfile.DoesNotExist:
             return Response({'error': 'Invalid referral code'}, status=status.HTTP_404_NOT_FOUND)
+
+        # Linking under someone you referred (directly or not) would create a cycle
+        upline = {ancestor_id for ancestor_id, _ in ReferralAnalytics.ancestors(referrer_profile.user_id)}
+        if request.user.id in upline:
+            return Response({'error': 'Cannot redeem a code from your own referral network'}, status=status.HTTP_400_BAD_REQUEST)
             
-        # Update user profile
-        profile.referred_by = referrer_profile.user
-        profile.xp += 100  # Award 100 XP
-        profile.save()
+        with transaction.atomic():
+            # Conditional update: a concurrent second redemption matches no row
+            linked = UserProfile.objects.filter(pk=profile.pk, referred_by__isnull=True).update(
+                referred_by=referrer_profile.user, updated_at=timezone.now()
+            )
+            if not linked:
+                return Response({'error': 'You have already redeemed a referral code'}, status=status.HTTP_400_BAD_REQUEST)
+
+            # Award 100 XP via the ledger
+            new_total_xp = XPService.award(request.user, 100, 'referral', f'referral:{referrer_profile.user_id}')
+            FeedService.publish(request.user, 'referral', target=referrer_profile.user)
+
+        # Patch cached referral analytics for the referrer's chain
+        ReferralAnalytics.record_referral(request.user.id, referrer_profile.user_id)
         
         return Response({
             'message': 'Referral code redeemed successfully',
             'xp_awarded': 100,
-            'new_total_xp': profile.xp
+            'new_total_xp': new_total_xp
         })
 
 
+class GitHubImportView(APIView):
+    """
+    Opt-in import of the user's GitHub following list.
+
+    - `POST` starts an import: everyone the user follows on GitHub who has
+      an account here (matched on `github_username`) gets followed. Returns
+      202 once queued for a task worker; under the ImmediateBackend the
+      import runs on the request and its final state is returned with 200.
+    - `GET` returns the latest import's state: `{"status": "queued" |
+      "running" | "done" | "failed", ...}`, or `{"status": null}`.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(get_import_status(request.user.id) or {'status': None})
+
+    def post(self, request):
+        user = request.user
+        if not UserProfile.objects.filter(user=user, provider='github').exclude(access_token=None).exists():
+            return Response({'error': 'No GitHub account linked'}, status=status.HTTP_400_BAD_REQUEST)
+
+        current = get_import_status(user.id)
+        if current and current['status'] in ('queued', 'running'):
+            return Response(current, status=status.HTTP_202_ACCEPTED)
+
+        set_import_status(user.id, 'queued')
+        transaction.on_commit(partial(import_github_following.enqueue, user.id))
+        if runs_inline(import_github_following):
+            return Response(get_import_status(user.id))
+        return Response(get_import_status(user.id), status=status.HTTP_202_ACCEPTED)
+
+
+class ReferralStatsView(APIView):
+    """
+    The requesting user's referral network: direct referrals, total
+    downline and depth. Served from the referral analytics cache.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(ReferralAnalytics.get_stats(request.user.id))
+
+
+class TopReferrersView(APIView):
+    """
+    Top referrers by total downline size.
+
+    Query params:
+    - `k`: Number of entries (default 10, max 100).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            k = max(1, min(int(request.query_params.get('k', 10)), settings.REFERRAL_TOP_CACHE_SIZE))
+        except ValueError:
+            return Response({'error': 'k must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        top = ReferralAnalytics.get_top(k)
+        users = {
+            row['id']: row
+            for row in User.objects.filter(id__in=[entry['user_id'] for entry in top]).values(
+                'id', 'username', avatar_url=F('profile__avatar_url')
+            )
+        }
+
+        return Response([
+            {
+                'username': users[entry['user_id']]['username'],
+                'avatar_url': users[entry['user_id']]['avatar_url'],
+                'direct_referrals': entry['direct_referrals'],
+                'downline_size': entry['downline_size'],
+                'depth': entry['depth'],
+            }
+            for entry in top
+            if entry['user_id'] in users
+        ])
+
+
+class FollowSuggestionsView(APIView):
+    """
+    "People you may know": users followed by the people you follow,
+    ranked by how many of them follow each candidate.
+
+    Scored in memory on the follow graph; the only query hydrates the cards.
+
+    Query params:
+    - `limit`: Number of suggestions (default 20, max 100).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        scored = follow_suggestions.suggest(request.user.id, limit=get_page_size(request, default=20))
+        cards = {
+            row['id']: row
+            for row in User.objects.filter(id__in=[user_id for user_id, _ in scored], is_active=True).values(
+                'id', 'username', 'first_name', avatar_url=F('profile__avatar_url')
+            )
+        }
+
+        return Response([
+            {
+                'username': cards[user_id]['username'],
+                'first_name': cards[user_id]['first_name'],
+                'avatar_url': cards[user_id]['avatar_url'],
+                'mutual_count': mutual_count,
+            }
+            for user_id, mutual_count in scored
+            if user_id in cards
+        ])
+
+
+# Most users a single batch request may look up
+BATCH_LOOKUP_LIMIT = 200
+
+
+def parse_batch_keys(data, limit=BATCH_LOOKUP_LIMIT):
+    """
+    Read `usernames` / `ids` lists from a batch request body.
+
+    Returns (usernames, ids, error). Duplicates are dropped, order is kept.
+    """
+    if not isinstance(data, dict):
+        return None, None, 'Body must be a JSON object'
+    usernames = data.get('usernames', [])
+    ids = data.get('ids', [])
+    if not isinstance(usernames, list) or not isinstance(ids, list):
+        return None, None, '`usernames` and `ids` must be lists'
+    if not all(isinstance(name, str) for name in usernames):
+        return None, None, '`usernames` must contain strings'
+    if not all(isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in ids):
+        return None, None, '`ids` must contain integers'
+    usernames, ids = list(dict.fromkeys(usernames)), list(dict.fromkeys(ids))
+    if not usernames and not ids:
+        return None, None, 'Provide `usernames` or `ids`'
+    if len(usernames) + len(ids) > limit:
+        return None, None, f'At most {limit} users per request'
+    return usernames, ids, None
+
+
+class BatchUserCardsView(APIView):
+    """
+    Compact profile cards for many users in one request.
+
+    Two queries regardless of batch size: one joined read of the cards and
+    one for the viewer's follow status.
+
+    Body: `{"usernames": [...], "ids": [...]}` (up to 200 in total).
+    Returns `{"results": [...], "missing": [...]}`, results in request order.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        usernames, ids, error = parse_batch_keys(request.data)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = User.objects.filter(Q(username__in=usernames) | Q(id__in=ids)).values(
+            'id',
+            'username',
+            'first_name',
+            'last_name',
+            avatar_url=F('profile__avatar_url'),
+            xp=F('profile__xp'),
+            followers_count=F('profile__followers_count'),
+            following_count=F('profile__following_count'),
+        )
+        by_username = {row['username']: row for row in rows}
+        by_id = {row['id']: row for row in by_username.values()}
+        followed = FollowService.following_ids(request.user, list(by_id))
+
+        results, missing, seen = [], [], set()
+        for key, lookup in [(name, by_username) for name in usernames] + [(user_id, by_id) for user_id in ids]:
+            row = lookup.get(key)
+            if row is None:
+                missing.append(key)
+            elif row['id'] not in seen:
+                seen.add(row['id'])
+                results.append({**row, 'is_following': row['id'] in followed})
+
+        return Response({'results': results, 'missing': missing})
+
+
+class BatchRelationshipsView(APIView):
+    """
+    The viewer's relationship with many users in one request.
+
+    Body: `{"usernames": [...], "ids": [...]}` (up to 200 in total).
+    Returns `{"results": {username: {"id", "is_following", "follows_you"}}}`.
+    Three queries regardless of batch size.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        usernames, ids, error = parse_batch_keys(request.data)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        users = dict(
+            User.objects.filter(Q(username__in=usernames) | Q(id__in=ids)).values_list('id', 'username')
+        )
+        following = FollowService.following_ids(request.user, list(users))
+        followers = FollowService.follower_ids(request.user, list(users))
+
+        return Response({
+            'results': {
+                username: {
+                    'id': user_id,
+                    'is_following': user_id in following,
+                    'follows_you': user_id in followers,
+                }
+                for user_id, username in users.items()
+            }
+        })
+
+
+class UserSearchView(APIView):
+    """
+    Search users by username, display name or linked GitHub/LeetCode handle.
+
+    Results are ranked: exact username, username prefix, word prefix,
+    substring, then (PostgreSQL only) fuzzy matches. Only active users are
+    returned.
+
+    Query params:
+    - `q`: Search text (at least 2 characters).
+    - `limit`: Number of results (default 20, max 50).
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = normalize(request.query_params.get('q', ''))
+        if len(query) < SEARCH_MIN_LENGTH:
+            return Response(
+                {'error': f'q must be at least {SEARCH_MIN_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = get_page_size(request, default=SEARCH_DEFAULT_LIMIT, maximum=SEARCH_MAX_LIMIT)
+
+        rows = list(
+            search_profiles(UserProfile.objects.filter(user__is_active=True), query).values(
+                'user_id',
+                'avatar_url',
+                'xp',
+                'followers_count',
+                'github_username',
+                'leetcode_username',
+                username=F('user__username'),
+                first_name=F('user__first_name'),
+                last_name=F('user__last_name'),
+            )[:limit]
+        )
+        followed = FollowService.following_ids(request.user, [row['user_id'] for row in rows])
+
+        results = []
+        for row in rows:
+            user_id = row.pop('user_id')
+            results.append({'id': user_id, **row, 'is_following': user_id in followed})
+        return Response({'results': results})
+
+
 class UserListView(APIView):
-    """View to list all users for admin."""
+    """
+    View to list users for admin.
+
+    Query params:
+    - Filters: `is_active`, `is_staff` (true/false), `provider`,
+      `joined_after`, `joined_before` (ISO date or datetime),
+      `q` (substring of username, name, linked handles or email, or an
+      exact provider id).
+    - Paging: `cursor`, `limit` (keyset on date_joined, id).
+    - `fields`, `expand`: sparse fieldsets; only selected columns are queried.
+    - `export`: `csv` or `ndjson` streams every matching user instead of a page.
+    """
     permission_classes = [IsAuthenticated]
 
+    BOOLEAN_FILTERS = ['is_active', 'is_staff']
+
     def get(self, request):
         if not (request.user.is_staff or request.user.is_superuser):
              return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
-        
-        users = User.objects.all().order_by('-date_joined')
-        return Response(UserSerializer(users, many=True).data)
+
+        try:
+            selection = FieldSelection.from_request(request, UserSerializer)
+            users = self.filter_users(User.objects.all(), request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        export_format = request.query_params.get('export')
+        if export_format:
+            if export_format not in EXPORT_FORMATS:
+                return Response({'error': 'Unsupported export format'}, status=status.HTTP_400_BAD_REQUEST)
+            return export_response(iter_user_rows(users), export_format, USER_EXPORT_FIELDS, filename='users')
+
+        try:
+            page, next_cursor = keyset_page(
+                UserRowSerializer.rows(users, 'id', 'date_joined', selection=selection),
+                cursor=request.query_params.get('cursor'),
+                limit=get_page_size(request),
+                time_field='date_joined',
+            )
+        except InvalidCursor:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'results': UserRowSerializer.serialize_many(page, selection=selection),
+            'next_cursor': next_cursor,
+        })
+
+    def filter_users(self, users, params):
+        """Apply server-side filters; raises ValueError on malformed input."""
+        for field in self.BOOLEAN_FILTERS:
+            value = params.get(field)
+            if value is not None:
+                if value.lower() not in ('true', 'false'):
+                    raise ValueError(f"{field} must be 'true' or 'false'")
+                users = users.filter(**{field: value.lower() == 'true'})
+
+        if params.get('provider'):
+            users = users.filter(profile__provider=params['provider'])
+
+        if params.get('q'):
+            # Same matches as the admin search: the search key, partial email or exact provider id
+            query = params['q']
+            users = users.filter(
+                Q(profile__search_key__contains=normalize(query))
+                | Q(email__icontains=query)
+                | Q(profile__provider_id=query)
+            )
+
+        for param, lookup in (('joined_after', 'date_joined__gte'), ('joined_before', 'date_joined__lt')):
+            value = params.get(param)
+            if value:
+                users = users.filter(**{lookup: self.parse_timestamp(param, value)})
+
+        return users
+
+    @staticmethod
+    def parse_timestamp(param, value):
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f"{param} must be an ISO date or datetime")
+            parsed = datetime.combine(day, time.min)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
 
 
 class UserBlockToggleView(APIView):
@@ -268,11 +833,140 @@ class UserBlockToggleView(APIView):
         if user == request.user:
              return Response({'error': 'Cannot block yourself'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Toggle status directly on user model
-        user.is_active = not user.is_active
-        user.save()
+        # Same path as bulk moderation: one UPDATE, caches dropped, sockets closed
+        is_active = not user.is_active
+        if is_active and ModerationService.pending_deletion([user.id]):
+            return Response({'error': 'Account is being deleted'}, status=status.HTTP_409_CONFLICT)
+        ModerationService.set_active([user.id], is_active)
         
         return Response({
-            'message': f"User {'unblocked' if user.is_active else 'blocked'} successfully",
-            'is_active': user.is_active
+            'message': f"User {'unblocked' if is_active else 'blocked'} successfully",
+            'is_active': is_active
         })
+
+
+# Most users a single bulk moderation request may change
+MODERATION_BATCH_LIMIT = 1000
+
+
+class BulkModerationView(APIView):
+    """
+    Block or unblock many users at once (staff only).
+
+    Body: `{"action": "block" | "unblock", "usernames": [...], "ids": [...]}`
+    (up to 1000 in total). Resolving the users is one query and the status
+    change one UPDATE, whatever the batch size; cached auth principals and
+    profiles are invalidated and blocked users' chat sockets closed.
+
+    Returns `{"updated": n, "missing": [...]}`; `updated` counts users whose
+    status actually changed. Unblocks also list `pending_deletion`: users
+    left blocked because their account deletion hasn't finished.
+    """
+    permission_classes = [IsAuthenticated]
+
+    ACTIONS = {'block': False, 'unblock': True}
+
+    def post(self, request):
+        if not (request.user.is_staff or request.user.is_superuser):
+             return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+        usernames, ids, error = parse_batch_keys(request.data, limit=MODERATION_BATCH_LIMIT)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        action = request.data.get('action')
+        if action not in self.ACTIONS:
+            return Response({'error': "action must be 'block' or 'unblock'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        found = dict(
+            User.objects.filter(Q(username__in=usernames) | Q(id__in=ids)).values_list('id', 'username')
+        )
+        if action == 'block' and request.user.id in found:
+            return Response({'error': 'Cannot block yourself'}, status=status.HTTP_400_BAD_REQUEST)
+        known_names = set(found.values())
+        missing = [name for name in usernames if name not in known_names]
+        missing += [user_id for user_id in ids if user_id not in found]
+
+        updated = ModerationService.set_active(list(found), self.ACTIONS[action])
+        result = {'updated': updated, 'missing': missing}
+        if action == 'unblock':
+            # Left blocked: their account deletion is still running
+            result['pending_deletion'] = sorted(ModerationService.pending_deletion(found))
+        return Response(result)
+
+
+class LeaderboardView(APIView):
+    """
+    XP leaderboard.
+
+    Query params:
+    - `scope`: `global` (default) or `following` (you plus the users you follow).
+    - `limit`: Number of entries (default 50, max 100).
+
+    Top-N is an index range scan on (xp desc, id); global ranks come from the
+    in-memory rank index, so the response costs one query.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        scope = request.query_params.get('scope', 'global')
+        if scope not in LEADERBOARD_SCOPES:
+            return Response({'error': 'Invalid scope'}, status=status.HTTP_400_BAD_REQUEST)
+
+        profiles = leaderboard_queryset(request.user, scope)
+        rows = list(
+            profiles.order_by('-xp', 'id').values(
+                'xp',
+                'avatar_url',
+                username=F('user__username'),
+                first_name=F('user__first_name'),
+            )[:get_page_size(request)]
+        )
+
+        if scope == 'global':
+            for row in rows:
+                row['rank'] = leaderboard.rank_of(row['xp'])['rank']
+        else:
+            # Small, bounded set: competition ranking by position
+            for position, row in enumerate(rows, start=1):
+                if position > 1 and row['xp'] == rows[position - 2]['xp']:
+                    row['rank'] = rows[position - 2]['rank']
+                else:
+                    row['rank'] = position
+
+        return Response({'scope': scope, 'results': rows})
+
+
+class LeaderboardRankView(APIView):
+    """
+    The requesting user's rank and percentile.
+
+    Global lookups are O(log n) against the in-memory rank index; the
+    `following` scope counts within the user's (bounded) follow set.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        scope = request.query_params.get('scope', 'global')
+        if scope not in LEADERBOARD_SCOPES:
+            return Response({'error': 'Invalid scope'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            xp = request.user.profile.xp
+        except UserProfile.DoesNotExist:
+            return Response({'error': 'User profile not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if scope == 'global':
+            result = leaderboard.rank_of(xp)
+        else:
+            counts = leaderboard_queryset(request.user, scope).aggregate(
+                total=Count('id'),
+                above=Count('id', filter=Q(xp__gt=xp)),
+                at_most=Count('id', filter=Q(xp__lte=xp)),
+            )
+            result = {
+                'rank': counts['above'] + 1,
+                'percentile': round(100 * counts['at_most'] / max(counts['total'], 1), 2),
+                'total': counts['total'],
+            }
+
+        return Response({'scope': scope, 'xp': xp, **result})